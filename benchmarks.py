@@ -0,0 +1,770 @@
+#!/usr/bin/env python3
+"""
+Safety Pass Management System - Benchmarks and Stress Checks
+Run `python benchmarks.py <scenario>` or `python benchmarks.py all`
+"""
+
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _multiprocess_worker(data_folder, worker_id, passes_per_worker):
+    from safety_pass_system import SafetyPassManager
+
+    manager = SafetyPassManager(data_folder, quiet=True)
+    for i in range(passes_per_worker):
+        manager.issue_safety_pass(f"W{worker_id}_{i:05d}", "EMP001", "GENERAL", "2025-01-01")
+
+
+def bench_multiprocess(workers=4, passes_per_worker=50):
+    """Several processes issue passes into one data folder; none may be lost"""
+    from safety_pass_system import SafetyPassManager
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = SafetyPassManager(data_folder, quiet=True)
+        manager.add_employee("EMP001", "Bench User", "bench@example.com", "Bench", "Bench Manager")
+        manager.add_pass_type("GENERAL", "General Site Access", "Benchmark pass", "Safety", 365)
+
+        start = time.perf_counter()
+        processes = [multiprocessing.Process(target=_multiprocess_worker,
+                                             args=(data_folder, worker_id, passes_per_worker))
+                     for worker_id in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        saved = len(SafetyPassManager(data_folder, quiet=True).safety_passes)
+        expected = workers * passes_per_worker
+
+        print(f"multiprocess: {workers} processes x {passes_per_worker} issues in {elapsed:.2f}s "
+              f"({expected / elapsed:.0f} writes/s)")
+        print(f"  saved passes: {saved} / {expected} -> {'OK' if saved == expected else 'LOST UPDATES'}")
+        return saved == expected
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def _pass_id_worker(data_folder, count):
+    from safety_pass_system import SafetyPassManager
+
+    manager = SafetyPassManager(data_folder, quiet=True)
+    return [manager.reserve_pass_ids()[0] for _ in range(count)]
+
+
+def bench_pass_ids(threads=4, processes=4, ids_per_worker=20000):
+    """Pass ID allocation rate; IDs from threads and processes must never collide"""
+    import threading
+    from safety_pass_system import SafetyPassManager
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = SafetyPassManager(data_folder, quiet=True)
+
+        allocated = []
+
+        def run_thread():
+            allocated.extend(manager.reserve_pass_ids()[0] for _ in range(ids_per_worker))
+
+        workers = [threading.Thread(target=run_thread) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        print(f"pass ids: {threads} threads x {ids_per_worker} IDs in {elapsed:.2f}s "
+              f"({len(allocated) / elapsed:,.0f} IDs/s)")
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            for pass_ids in pool.starmap(_pass_id_worker, [(data_folder, ids_per_worker)] * processes):
+                allocated.extend(pass_ids)
+        elapsed = time.perf_counter() - start
+        print(f"  {processes} processes x {ids_per_worker} IDs in {elapsed:.2f}s (including startup)")
+
+        unique = len(set(allocated)) == len(allocated)
+        print(f"  {len(allocated)} IDs allocated -> {'OK' if unique else 'DUPLICATES'}")
+        return unique
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def _populated_manager(data_folder, employees=10000, passes=100000, pass_types=20, seed=1):
+    """A manager filled in memory (not saved) with synthetic employees and passes"""
+    from datetime import date, timedelta
+    from safety_pass_system import Employee, SafetyPass, SafetyPassManager, SafetyPassType
+
+    rng = random.Random(seed)
+    manager = SafetyPassManager(data_folder, quiet=True)
+
+    departments = [f"Dept {i}" for i in range(25)]
+    for i in range(employees):
+        employee_id = f"EMP{i:06d}"
+        manager.employees[employee_id] = Employee(employee_id, f"Employee {i}", f"emp{i}@example.com",
+                                                  rng.choice(departments), f"Manager {i % 200}")
+    for i in range(pass_types):
+        pass_type_id = f"TYPE{i:02d}"
+        manager.pass_types[pass_type_id] = SafetyPassType(pass_type_id, f"Pass Type {i}", "Benchmark",
+                                                          rng.choice(['Safety', 'Operations', 'Technical']),
+                                                          rng.choice([90, 180, 270, 365]))
+
+    today = date.today()
+    statuses = ['active'] * 8 + ['expired', 'revoked']
+    for i in range(passes):
+        pass_id = f"PASS{i:07d}"
+        pass_type = manager.pass_types[f"TYPE{rng.randrange(pass_types):02d}"]
+        issued = today - timedelta(days=rng.randrange(0, 400))
+        expiry = issued + timedelta(days=pass_type.validity_period_days)
+        status = rng.choice(statuses)
+        revoked_at = (f"{issued + timedelta(days=rng.randrange(1, pass_type.validity_period_days))} 09:00:00"
+                      if status == 'revoked' else '')
+        manager.safety_passes[pass_id] = SafetyPass(pass_id, f"EMP{rng.randrange(employees):06d}",
+                                                    pass_type.pass_type_id, issued.isoformat(),
+                                                    expiry.isoformat(), status, revoked_at)
+    manager._rebuild_indexes()
+    return manager
+
+
+def bench_clearance(checks=500000):
+    """Badge-scan clearance checks per second against 100k passes"""
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder)
+        rng = random.Random(2)
+        employee_ids = list(manager.employees)
+        pass_type_ids = list(manager.pass_types)
+        scans = [(rng.choice(employee_ids), rng.choice(pass_type_ids)) for _ in range(checks)]
+        today = time.strftime('%Y-%m-%d')
+
+        is_cleared = manager.is_cleared
+        start = time.perf_counter()
+        cleared = 0
+        for employee_id, pass_type_id in scans:
+            if is_cleared(employee_id, pass_type_id, today):
+                cleared += 1
+        elapsed = time.perf_counter() - start
+
+        rate = checks / elapsed
+        print(f"clearance: {checks} checks in {elapsed:.2f}s -> {rate:,.0f} checks/s "
+              f"({cleared} cleared, target > 100,000/s)")
+        return rate > 100000
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_http(requests=5000, clients=4, batch_size=50):
+    """Requests per second against a local HTTP service over keep-alive connections"""
+    import http.client
+    import json
+    import threading
+    from safety_pass_server import SafetyPassServer
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    server = None
+    try:
+        manager = _populated_manager(data_folder)
+        server = SafetyPassServer(('127.0.0.1', 0), manager)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        rng = random.Random(3)
+        employee_ids = list(manager.employees)
+        pass_type_ids = list(manager.pass_types)
+
+        def run_client(count, results):
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            for _ in range(count):
+                connection.request('GET', f"/clearance?employee_id={rng.choice(employee_ids)}"
+                                          f"&pass_type_id={rng.choice(pass_type_ids)}")
+                response = connection.getresponse()
+                response.read()
+                results.append(response.status)
+            connection.close()
+
+        def timed(label, count, target):
+            results = []
+            threads = [threading.Thread(target=target, args=(count // clients, results)) for _ in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f"  {label}: {len(results)} requests in {elapsed:.2f}s -> {len(results) / elapsed:,.0f} req/s")
+            return all(status in (200, 304) for status in results)
+
+        def run_batch_client(count, results):
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            for _ in range(count):
+                checks = [{'employee_id': rng.choice(employee_ids), 'pass_type_id': rng.choice(pass_type_ids)}
+                          for _ in range(batch_size)]
+                connection.request('POST', '/clearance', body=json.dumps({'checks': checks}),
+                                   headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                results.append(response.status)
+            connection.close()
+
+        def run_cached_client(count, results):
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            connection.request('GET', '/stats')
+            response = connection.getresponse()
+            response.read()
+            etag = response.getheader('ETag')
+            for _ in range(count):
+                connection.request('GET', '/stats', headers={'If-None-Match': etag})
+                response = connection.getresponse()
+                response.read()
+                results.append(response.status)
+            connection.close()
+
+        print(f"http: {clients} keep-alive clients against {len(manager.safety_passes)} passes")
+        ok = timed("GET /clearance", requests, run_client)
+        ok = timed(f"POST /clearance x{batch_size}", requests // 10, run_batch_client) and ok
+        ok = timed("GET /stats (304 revalidation)", requests, run_cached_client) and ok
+        return ok
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_reports():
+    """Time to first chunk and total time for each report over 100k passes, in every format"""
+    import itertools
+    from safety_pass_system import REPORT_FORMATS, ReportEngine, iter_report_text, write_report
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        engine = ReportEngine(_populated_manager(data_folder))
+        print(f"reports: {len(engine.manager.safety_passes)} passes, {len(engine.manager.employees)} employees")
+        for name in ReportEngine.REPORTS:
+            start = time.perf_counter()
+            list(itertools.islice(iter_report_text(engine.build(name)), 500))
+            first_chunk = time.perf_counter() - start
+            timings = []
+            for fmt in REPORT_FORMATS:
+                start = time.perf_counter()
+                with open(os.devnull, 'w', encoding='utf-8') as out:
+                    write_report(engine.build(name), out, fmt)
+                timings.append(f"{fmt} {time.perf_counter() - start:.2f}s")
+            print(f"  {name}: first 500 rows in {first_chunk * 1000:.0f} ms; full: {', '.join(timings)}")
+        return True
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_analytics(passes=1000000):
+    """Vectorized pandas statistics against the list-comprehension versions at 1M passes"""
+    try:
+        from safety_pass_analytics import PassAnalytics
+    except ImportError:
+        print("analytics: pandas is not installed, skipped (pip install pandas)")
+        return None
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder, employees=50000, passes=passes)
+        all_passes = manager.get_all_passes()
+        print(f"analytics: {len(all_passes):,} passes, {len(manager.employees):,} employees")
+
+        # What the statistics and reports did before: one list comprehension per figure
+        start = time.perf_counter()
+        statuses = {status: len([p for p in all_passes if p.status == status])
+                    for status in ('active', 'expired', 'revoked')}
+        usage = {pass_type.pass_type_id: len([p for p in all_passes if p.pass_type_id == pass_type.pass_type_id])
+                 for pass_type in manager.get_all_pass_types()}
+        expiring = len([p for p in all_passes if p.status == 'active' and 1 <= p.days_until_expiry() <= 15])
+        loops = time.perf_counter() - start
+        print(f"  list comprehensions (status, usage, expiring): {loops:.2f}s")
+
+        analytics = PassAnalytics(manager)
+        start = time.perf_counter()
+        analytics.frame
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        status_counts = analytics.status_counts()
+        pass_type_usage = analytics.pass_type_usage()
+        histogram = analytics.expiry_histogram(bucket_days=1, horizon_days=16)
+        analytics.department_compliance()
+        analytics.renewal_forecast('M')
+        vectorized = time.perf_counter() - start
+        print(f"  columnar view build: {build:.2f}s (once per data version)")
+        print(f"  vectorized (status, usage, histogram, compliance, forecast): {vectorized:.3f}s "
+              f"-> {loops / vectorized:,.0f}x faster")
+
+        ok = (status_counts.to_dict() == statuses
+              and pass_type_usage['issued'].to_dict() == usage
+              and int(histogram.iloc[1:16].sum()) == expiring)
+        print(f"  results match: {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_compliance(employees=10000):
+    """Full-site compliance gap analysis for 10k employees against department requirements"""
+    from datetime import date, timedelta
+    from safety_pass_system import PassRequirement
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder, employees=employees)
+        rng = random.Random(3)
+        pass_type_ids = list(manager.pass_types)
+        manager.requirements['*'] = PassRequirement('*', ['TYPE00'])
+        for department in {emp.department for emp in manager.employees.values()}:
+            manager.requirements[department] = PassRequirement(department, rng.sample(pass_type_ids, 3))
+        manager._touch('requirements')
+
+        start = time.perf_counter()
+        gaps = manager.get_compliance_gaps()
+        elapsed = time.perf_counter() - start
+
+        # The same answer from a scan of each employee's passes
+        today = date.today().isoformat()
+        warn_until = (date.today() + timedelta(days=30)).isoformat()
+        expected = 0
+        for employee_id in manager.employees:
+            passes = [manager.safety_passes[pass_id] for pass_id in manager._passes_by_employee.get(employee_id, ())]
+            for pass_type_id in manager.get_required_pass_types(employee_id):
+                expiries = [p.expiry_date for p in passes if p.pass_type_id == pass_type_id
+                            and p.status != 'revoked' and p.issue_date <= today]
+                if not expiries or max(expiries) <= warn_until:
+                    expected += 1
+
+        print(f"compliance: {len(manager.employees)} employees, {len(gaps)} gaps in {elapsed * 1000:.0f} ms "
+              f"(target < 1000 ms), cross-check {'OK' if len(gaps) == expected else 'MISMATCH'}")
+        return elapsed < 1 and len(gaps) == expected
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_as_of(queries=2000, scans=20):
+    """Historical "who was cleared on" queries against 100k passes, versus scanning every pass"""
+    from datetime import date, timedelta
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder)
+        rng = random.Random(4)
+        pass_type_ids = list(manager.pass_types)
+        today = date.today()
+        asks = [(rng.choice(pass_type_ids), (today - timedelta(days=rng.randrange(0, 500))).isoformat())
+                for _ in range(queries)]
+
+        start = time.perf_counter()
+        answers = [manager.get_cleared_employees(pass_type_id, day) for pass_type_id, day in asks]
+        indexed = (time.perf_counter() - start) / queries
+        start = time.perf_counter()
+        counts = [manager.count_valid_passes(pass_type_id, day) for pass_type_id, day in asks]
+        counted = (time.perf_counter() - start) / queries
+
+        # The same questions answered by re-deriving every pass's validity
+        all_passes = manager.get_all_passes()
+        start = time.perf_counter()
+        scanned = []
+        for pass_type_id, day in asks[:scans]:
+            cleared = set()
+            for p in all_passes:
+                span = p.validity_span() if p.pass_type_id == pass_type_id else None
+                if span is not None and span[0] <= day <= span[1]:
+                    cleared.add(p.employee_id)
+            scanned.append(sorted(cleared))
+        scan = (time.perf_counter() - start) / scans
+
+        ok = scanned == answers[:scans] and sum(counts) == sum(
+            len(manager.get_passes_as_of(day, pass_type_id)) for pass_type_id, day in asks)
+        print(f"as_of: {len(all_passes)} passes, {queries} queries, "
+              f"{sum(map(len, answers)) / queries:,.0f} employees per answer")
+        print(f"  cleared employees: {indexed * 1000:.2f} ms/query indexed, {scan * 1000:.0f} ms/query scanning "
+              f"-> {scan / indexed:,.0f}x faster")
+        print(f"  valid pass counts: {counted * 1e6:.1f} us/query; results {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_teams(lookups=200, scans=5):
+    """Per-department and per-manager pass lookups from the materialized views, versus scanning every pass"""
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder)
+        managers = manager.get_team_names('manager')
+        rng = random.Random(5)
+        asks = [rng.choice(managers) for _ in range(lookups)]
+
+        start = time.perf_counter()
+        answers = [manager.get_team_passes('manager', name, expiring_within=30) for name in asks]
+        indexed = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        summaries = manager.get_team_summaries('department')
+        summary_time = time.perf_counter() - start
+
+        # The same lookups by joining every pass to its employee
+        start = time.perf_counter()
+        scanned = []
+        for name in asks[:scans]:
+            scanned.append(sorted((p for p in manager.get_all_passes()
+                                   if p.status == 'active' and 1 <= p.days_until_expiry() <= 30
+                                   and manager.employees[p.employee_id].manager == name),
+                                  key=lambda p: (p.expiry_date, p.pass_id)))
+        scan = (time.perf_counter() - start) / scans
+
+        ok = ([[p.pass_id for p in passes] for passes in scanned] ==
+              [[p.pass_id for p in passes] for passes in answers[:scans]]
+              and sum(s.members for s in summaries) == len(manager.employees))
+        print(f"teams: {len(manager.safety_passes)} passes, {len(managers)} managers, "
+              f"{len(summaries)} departments summarized in {summary_time * 1000:.1f} ms")
+        print(f"  team expiring passes: {indexed * 1000:.2f} ms/lookup from views, {scan * 1000:.0f} ms/lookup "
+              f"scanning -> {scan / indexed:,.0f}x faster; results {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_search(employees=50000, passes=200000):
+    """Search-as-you-type over 50k employees: index build, per-keystroke latency and incremental updates"""
+    from safety_pass_system import SearchIndex
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder, employees=employees, passes=passes)
+        start = time.perf_counter()
+        manager.build_search_indexes()
+        build = time.perf_counter() - start
+
+        # Every prefix of each query, as the GUI sees it while it is typed
+        queries = ["Employee 31337", "emp031337", "dept 7 employee 12", "example.com", "Emplyee 4242", "PASS0012345"]
+        latencies = []
+        for query in queries:
+            for end in range(1, len(query) + 1):
+                start = time.perf_counter()
+                manager.search_employees(query[:end])
+                manager.search_passes(query[:end])
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        # Matches must be what checking every employee's words finds
+        index = manager._search_index('employees')
+        ok = True
+        for query in ["employee 12", "dept 2", "emp0499", "49"]:
+            words = SearchIndex.query_words(query)
+            expected = {emp.employee_id for emp in manager.get_all_employees()
+                        if all(any(word.startswith(query_word) for word in SearchIndex.words(
+                            *manager._employee_search_fields(emp))) for query_word in words)}
+            ok = ok and {emp.employee_id for emp in manager.search_employees(query, None, fuzzy=False)} == expected
+            ok = ok and all(index.matches(employee_id, query) for employee_id in expected)
+
+        # Mutations keep the index current; one transaction, so the update is timed without the save
+        rounds = 2000
+        start = time.perf_counter()
+        with manager.write_locked():
+            for i in range(rounds):
+                manager.update_employee(f"EMP{i:06d}", name=f"Renamed Person{i}")
+        update = (time.perf_counter() - start) / rounds
+        ok = ok and [emp.employee_id for emp in manager.search_employees("renamed person7", 5)][:1] == ["EMP000007"]
+
+        print(f"search: {employees} employees, {passes} passes, indexes built in {build:.2f} s")
+        print(f"  per keystroke ({len(latencies)} keystrokes): median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"max {latencies[-1] * 1000:.2f} ms (target < 50 ms)")
+        print(f"  employee update incl. indexes (saved once per batch): {update * 1000:.3f} ms; results {'OK' if ok else 'MISMATCH'}")
+        return ok and latencies[-1] < 0.05
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_sorting(page=200, updates=2000):
+    """Reading the first page of 100k passes sorted by a column, from the sorted indexes versus sorting them all"""
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder)
+        columns = ['expiry_date', 'days_left', 'employee_name', 'status']
+        print(f"sorting: {len(manager.safety_passes)} passes, first {page} rows")
+        ok = True
+        for column in columns:
+            start = time.perf_counter()
+            manager.get_sorted_page('safety_passes', column, count=page)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            ascending = manager.get_sorted_page('safety_passes', column, count=page)
+            descending = manager.get_sorted_page('safety_passes', column, True, count=page)
+            indexed = (time.perf_counter() - start) / 2
+
+            # The same page by sorting every pass on each click
+            start = time.perf_counter()
+            values = manager._sorted_indexes['safety_passes', column].values
+            expected = sorted(manager.get_all_passes(), key=lambda p: (values[p.pass_id], p.pass_id))
+            full_sort = time.perf_counter() - start
+            ok = ok and ascending == expected[:page] and descending == expected[::-1][:page]
+            print(f"  {column}: index built in {build * 1000:.0f} ms, page {indexed * 1000:.2f} ms, "
+                  f"full sort {full_sort * 1000:.0f} ms -> {full_sort / indexed:,.0f}x faster")
+
+        # Keeping all four indexes up to date as passes are issued and renewed
+        rng = random.Random(7)
+        employee_ids = list(manager.employees)
+        start = time.perf_counter()
+        with manager.write_locked():
+            for _ in range(updates):
+                manager.issue_safety_pass(None, rng.choice(employee_ids), "TYPE00")
+        update = (time.perf_counter() - start) / updates
+        for column in columns:
+            values = manager._sorted_indexes['safety_passes', column].values
+            expected = sorted(manager.safety_passes, key=lambda pass_id: (values[pass_id], pass_id))[:page]
+            ok = ok and [p.pass_id for p in manager.get_sorted_page('safety_passes', column, count=page)] == expected
+        print(f"  issue with {len(columns)} sorted indexes: {update * 1000:.2f} ms/pass; "
+              f"results {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_first_paint(employees=50000, passes=200000):
+    """GUI time to first paint on a large data folder, then until the data is shown and each tab first opens"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        # No tkinter, or no display to open a window on
+        print(f"first_paint: skipped ({e})")
+        return True
+    root.withdraw()
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        manager = _populated_manager(data_folder, employees=employees, passes=passes)
+        with manager.write_locked():
+            manager._save_employees()
+            manager._save_pass_types()
+            manager._save_safety_passes()
+        del manager
+        from safety_pass_gui import SafetyPassGUI
+
+        start = time.perf_counter()
+        root.deiconify()
+        gui = SafetyPassGUI(root, data_folder)
+        # Maps and draws the window, with the data still loading behind it
+        root.update()
+        first_paint = time.perf_counter() - start
+        while not gui.built_tabs:
+            root.update()
+            time.sleep(0.005)
+        loaded = time.perf_counter() - start
+
+        tab_times = []
+        for index, (name, *_) in enumerate(gui.TABS):
+            if name not in gui.built_tabs:
+                start = time.perf_counter()
+                gui.notebook.select(index)
+                root.update()
+                tab_times.append(f"{name} {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print(f"first_paint: {employees} employees, {passes} passes")
+        print(f"  window painted in {first_paint * 1000:.0f} ms (target < 500 ms); "
+              f"dashboard filled after {loaded:.2f} s")
+        print(f"  first opening of each tab: {', '.join(tab_times)}")
+        return first_paint < 0.5
+    finally:
+        root.destroy()
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+def bench_audit(events=300000, lookups=200, segment_bytes=2 * 1024 * 1024):
+    """Audit history lookups by pass and employee over a multi-segment log, versus reading it all"""
+    import json
+    from safety_pass_system import AuditLog
+
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        log = AuditLog(os.path.join(data_folder, "audit"), segment_bytes)
+        rng = random.Random(5)
+        pass_ids = [f"PASS{i:07d}" for i in range(events // 3)]
+        start = time.perf_counter()
+        for batch in range(0, events, 1000):
+            log.append([{'at': '2025-01-01 09:00:00', 'event': rng.choice(['issued', 'renewed', 'revoked']),
+                         'pass_id': rng.choice(pass_ids), 'employee_id': f"EMP{rng.randrange(10000):06d}"}
+                        for _ in range(1000)])
+        appended = time.perf_counter() - start
+        segments = len([name for name in os.listdir(log.folder) if name.endswith('.jsonl')])
+        print(f"audit: {events:,} events in {segments} segments, appended in {appended:.2f}s")
+
+        # First lookup loads the sealed segment indexes
+        asks = rng.sample(pass_ids, lookups)
+        start = time.perf_counter()
+        log.history('pass_id', asks[0])
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [log.history('pass_id', pass_id) for pass_id in asks]
+        by_pass = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        for i in range(lookups):
+            log.history('employee_id', f"EMP{i:06d}")
+        by_employee = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        scanned = []
+        for number in sorted(os.listdir(log.folder)):
+            if number.endswith('.jsonl'):
+                with open(os.path.join(log.folder, number), 'rb') as f:
+                    scanned.extend(event for event in map(json.loads, f) if event['pass_id'] == asks[0])
+        scan = time.perf_counter() - start
+
+        ok = scanned == found[0]
+        print(f"  first lookup (loads indexes): {first * 1000:.0f} ms")
+        print(f"  by pass: {by_pass * 1000:.2f} ms, by employee: {by_employee * 1000:.2f} ms, "
+              f"full scan: {scan * 1000:.0f} ms; results {'OK' if ok else 'MISMATCH'}")
+        return ok
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+
+# Modules the launch path must not import up front; each is imported where it is used
+DEFERRED_MODULES = ['pandas', 'numpy', 'schedule', 'smtplib', 'email.mime.multipart']
+
+
+def _import_profile(module):
+    """Import a module in a fresh interpreter under -X importtime: {imported module: (depth, cumulative us)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    profile = {}
+    # Lines read "import time: <self us> | <cumulative us> | <indented module name>"
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            name = fields[2].rstrip()
+            profile[name.strip()] = ((len(name) - len(name.lstrip())) // 2, int(fields[1]))
+    return profile
+
+
+def bench_import_time(runs=5):
+    """Import time of each entry point, and the launcher's dependency check, with and without its cache"""
+    ok = True
+    for module in ['run_app', 'safety_pass_system', 'safety_pass_server', 'safety_pass_gui']:
+        try:
+            profiles = [_import_profile(module) for _ in range(runs)]
+        except ImportError as e:
+            print(f"import_time: {module} skipped ({e})")
+            continue
+        # The fastest run has the least scheduling noise
+        profile = min(profiles, key=lambda p: p[module][1])
+        heaviest = sorted(((us, name) for name, (depth, us) in profile.items() if depth == 1), reverse=True)[:4]
+        deferred = [name for name in DEFERRED_MODULES if name in profile]
+        print(f"import_time: {module} {profile[module][1] / 1000:.0f} ms "
+              f"(heaviest: {', '.join(f'{name} {us / 1000:.0f} ms' for us, name in heaviest)})")
+        if deferred:
+            print(f"  imports {', '.join(deferred)} at startup -> REGRESSION")
+            ok = False
+
+    try:
+        import run_app
+    except ImportError as e:
+        print(f"import_time: dependency check skipped ({e})")
+        return ok
+    cache_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    saved_cache = run_app.DEPENDENCY_CACHE
+    run_app.DEPENDENCY_CACHE = os.path.join(cache_folder, "dependency_check.json")
+    try:
+        start = time.perf_counter()
+        missing = run_app.check_dependencies()
+        uncached = time.perf_counter() - start
+        start = time.perf_counter()
+        run_app.check_dependencies()
+        cached = time.perf_counter() - start
+        print(f"  dependency check: {uncached * 1000:.1f} ms, cached {cached * 1000:.1f} ms"
+              + (f" (missing: {', '.join(missing)}, not cached)" if missing else ""))
+    finally:
+        run_app.DEPENDENCY_CACHE = saved_cache
+        shutil.rmtree(cache_folder, ignore_errors=True)
+    return ok
+
+
+def bench_metrics(calls=200000):
+    """Cost of timing an operation, and of writing the Prometheus metrics file"""
+    from safety_pass_system import Metrics
+
+    metrics = Metrics()
+    timed = metrics.timed('bench')
+    start = time.perf_counter()
+    for _ in range(calls):
+        with metrics.timed('bench'):
+            pass
+    per_call = (time.perf_counter() - start) / calls
+
+    @timed
+    def decorated():
+        pass
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        decorated()
+    per_decorated = (time.perf_counter() - start) / calls
+
+    for i in range(50):
+        metrics.observe(f"operation_{i}", i / 1000)
+        metrics.count(f"event_{i}", i)
+    data_folder = tempfile.mkdtemp(prefix="spt_bench_")
+    try:
+        path = os.path.join(data_folder, "metrics.prom")
+        start = time.perf_counter()
+        metrics.write(path)
+        write = time.perf_counter() - start
+        with open(path, encoding='utf-8') as f:
+            samples = [line.rsplit(' ', 1) for line in f.read().splitlines() if not line.startswith('#')]
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+
+    ok = all(len(sample) == 2 and sample[1].replace('.', '', 1).isdigit() for sample in samples)
+    print(f"metrics: timed block {per_call * 1e6:.2f} us, timed call {per_decorated * 1e6:.2f} us")
+    print(f"  {len(samples)} samples written in {write * 1000:.1f} ms; format {'OK' if ok else 'INVALID'}")
+    return ok
+
+
+SCENARIOS = {
+    'multiprocess': bench_multiprocess,
+    'pass_ids': bench_pass_ids,
+    'clearance': bench_clearance,
+    'http': bench_http,
+    'reports': bench_reports,
+    'analytics': bench_analytics,
+    'compliance': bench_compliance,
+    'as_of': bench_as_of,
+    'teams': bench_teams,
+    'search': bench_search,
+    'sorting': bench_sorting,
+    'first_paint': bench_first_paint,
+    'audit': bench_audit,
+    'import_time': bench_import_time,
+    'metrics': bench_metrics,
+}
+
+
+def main(argv):
+    names = argv[1:] or ['all']
+    if names == ['all']:
+        names = list(SCENARIOS)
+
+    ok = True
+    for name in names:
+        if name not in SCENARIOS:
+            print(f"Unknown scenario '{name}'. Available: {', '.join(SCENARIOS)}")
+            return 2
+        if SCENARIOS[name]() is False:
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main(sys.argv))
@@ -124,8 +124,9 @@ def main():
             print(f"Pass Types: {len(app.manager.pass_types)}")
             print(f"Total Passes: {len(app.manager.safety_passes)}")
 
-            active_passes = len([p for p in app.manager.safety_passes.values() if p.status == 'active'])
-            expired_passes = len([p for p in app.manager.safety_passes.values() if p.status == 'expired'])
+            all_passes = app.manager.get_all_passes()
+            active_passes = len([p for p in all_passes if p.status == 'active'])
+            expired_passes = len([p for p in all_passes if p.status == 'expired'])
             expiring_soon = len(app.manager.get_expiring_passes(15))
 
             print(f"Active Passes: {active_passes}")
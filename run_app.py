@@ -4,26 +4,58 @@ Safety Pass Management System - GUI Application Launcher
 Double-click this file to start the application
 """
 
+import importlib.util
+import json
 import sys
 import os
 import tkinter as tk
 from tkinter import messagebox
 
+# Packages the launcher installs if they are missing
+REQUIRED_PACKAGES = ['schedule', 'pandas']
+# Remembers a passed check and where each package was found, until Python or requirements.txt change
+DEPENDENCY_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.dependency_check.json')
 
-def check_dependencies():
-    """Check if required packages are installed"""
-    missing_packages = []
 
+def dependency_fingerprint():
+    """What a passed dependency check depends on, besides the packages' files"""
+    requirements = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'requirements.txt')
     try:
-        import schedule
-    except ImportError:
-        missing_packages.append('schedule')
+        requirements_mtime = os.path.getmtime(requirements)
+    except OSError:
+        requirements_mtime = None
+    return {'python': sys.executable, 'version': sys.version, 'packages': REQUIRED_PACKAGES,
+            'requirements_mtime': requirements_mtime}
 
-    try:
-        import pandas
-    except ImportError:
-        missing_packages.append('pandas')
 
+def check_dependencies():
+    """Check if required packages are installed.
+
+    Packages are looked up without importing them (pandas alone takes seconds to
+    import), and a passed check is cached with the file each package was found
+    in. Later launches only check those files still exist, so an uninstalled
+    package is still noticed.
+    """
+    fingerprint = dependency_fingerprint()
+    try:
+        with open(DEPENDENCY_CACHE, encoding='utf-8') as f:
+            cached = json.load(f)
+        origins = cached.pop('origins')
+        if (cached == fingerprint and sorted(origins) == sorted(REQUIRED_PACKAGES)
+                and all(origin and os.path.exists(origin) for origin in origins.values())):
+            return []
+    except (OSError, ValueError, KeyError, AttributeError, TypeError):
+        pass
+
+    specs = {package: importlib.util.find_spec(package) for package in REQUIRED_PACKAGES}
+    missing_packages = [package for package, spec in specs.items() if spec is None]
+
+    if not missing_packages:
+        try:
+            with open(DEPENDENCY_CACHE, 'w', encoding='utf-8') as f:
+                json.dump(dict(fingerprint, origins={package: spec.origin for package, spec in specs.items()}), f)
+        except OSError:
+            pass
     return missing_packages
 
 
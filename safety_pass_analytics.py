@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Safety Pass Management System - Vectorized Analytics
+Columnar (pandas) views of the pass data, for statistics over very large
+pass sets without a Python loop per pass. Requires pandas, which also
+installs NumPy.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from safety_pass_system import PASS_STATUSES, SafetyPassManager
+
+# date.toordinal() of the NumPy/pandas epoch, to turn datetime64 days into ordinals
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _categorical(values) -> pd.Categorical:
+    """A categorical over strings, with categories in order of first appearance (no sort)"""
+    codes, distinct = pd.factorize(pd.Series(values, dtype=object))
+    return pd.Categorical.from_codes(codes, categories=distinct)
+
+
+def _day_ordinals(dates) -> np.ndarray:
+    """YYYY-MM-DD strings as integer day ordinals (as date.toordinal()).
+
+    Passes share a few thousand distinct dates at most, so only those are
+    parsed; the result is gathered by code in one vectorized step.
+    """
+    codes, distinct = pd.factorize(pd.Series(dates, dtype=object))
+    ordinals = np.array([date.fromisoformat(value).toordinal() for value in distinct], dtype=np.int32)
+    return ordinals[codes]
+
+
+class PassAnalytics:
+    """Vectorized statistics over a manager's passes.
+
+    The columnar view holds one row per pass: expiry and issue dates as day
+    ordinals, and status, pass type, employee and department as categoricals.
+    It is rebuilt only when the manager's data (or the date) has changed.
+    """
+
+    def __init__(self, manager: SafetyPassManager):
+        self.manager = manager
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The columnar view of all passes"""
+        return self.manager._cached('analytics_frame', ('employees', 'safety_passes'), self._build_frame)
+
+    def _build_frame(self) -> pd.DataFrame:
+        with self.manager.read_locked():
+            passes = list(self.manager.safety_passes.values())
+            departments = {emp.employee_id: emp.department for emp in self.manager.employees.values()}
+
+        frame = pd.DataFrame({
+            'pass_id': [p.pass_id for p in passes],
+            'employee_id': _categorical([p.employee_id for p in passes]),
+            'pass_type_id': _categorical([p.pass_type_id for p in passes]),
+            'status': pd.Categorical([p.status for p in passes], categories=PASS_STATUSES),
+            'issue_day': _day_ordinals([p.issue_date for p in passes]),
+            'expiry_day': _day_ordinals([p.expiry_date for p in passes]),
+        })
+        # Passes of employees that no longer exist get no department
+        frame['department'] = frame['employee_id'].map(departments).astype('category')
+        return frame
+
+    @property
+    def headcount(self) -> pd.Series:
+        """Number of employees in each department"""
+        return self.manager._cached('analytics_headcount', ('employees',), lambda: pd.Series(
+            [emp.department for emp in self.manager.get_all_employees()], dtype=object).value_counts())
+
+    @staticmethod
+    def _today() -> int:
+        return date.today().toordinal()
+
+    def status_counts(self) -> pd.Series:
+        """Number of passes in each status"""
+        return self.frame['status'].value_counts().reindex(list(PASS_STATUSES), fill_value=0)
+
+    def expiry_histogram(self, bucket_days: int = 7, horizon_days: int = 91) -> pd.Series:
+        """Active passes by days until expiry, in buckets of bucket_days.
+
+        The index is the first day of each bucket. Days are counted as
+        SafetyPass.days_until_expiry() counts them.
+        """
+        frame = self.frame
+        days_left = frame['expiry_day'].to_numpy() - self._today() - 1
+        mask = (frame['status'] == 'active').to_numpy() & (days_left >= 0) & (days_left < horizon_days)
+        buckets = -(-horizon_days // bucket_days)
+        counts = np.bincount(days_left[mask] // bucket_days, minlength=buckets)
+        return pd.Series(counts, index=np.arange(buckets) * bucket_days, name='passes')
+
+    def department_compliance(self) -> pd.DataFrame:
+        """Per department: employees, employees holding at least one valid pass today, and the rate.
+
+        A pass is valid as for SafetyPassManager.is_cleared: not revoked, and
+        today falls between its issue and expiry dates.
+        """
+        frame = self.frame
+        today = self._today()
+        valid = (frame['status'] != 'revoked') & (frame['issue_day'] <= today) & (frame['expiry_day'] >= today)
+        cleared = frame.loc[valid].groupby('department', observed=True)['employee_id'].nunique()
+        cleared.index = cleared.index.astype(object)
+
+        headcount = self.headcount
+        result = pd.DataFrame({'employees': headcount,
+                               'cleared': cleared.reindex(headcount.index, fill_value=0)})
+        result['compliance_rate'] = result['cleared'] / result['employees']
+        return result.sort_index()
+
+    def renewal_forecast(self, freq: str = 'W', horizon_days: int = 182) -> pd.Series:
+        """Active passes falling due for renewal in each week ('W') or month ('M') of the horizon.
+
+        The index is the first day of each period, as YYYY-MM-DD.
+        """
+        frame = self.frame
+        today = self._today()
+        expiry_day = frame['expiry_day'].to_numpy()
+        active = (frame['status'] == 'active').to_numpy()
+        mask = active & (expiry_day >= today) & (expiry_day <= today + horizon_days)
+        expiry = pd.Series((expiry_day[mask].astype(np.int64) - EPOCH_ORDINAL).astype('datetime64[D]'))
+        counts = expiry.dt.to_period(freq).value_counts().sort_index()
+        counts.index = counts.index.start_time.strftime('%Y-%m-%d')
+        return counts.rename('passes')
+
+    def pass_type_usage(self) -> pd.DataFrame:
+        """Per pass type: its name, passes issued, and passes in each status"""
+        frame = self.frame
+        usage = (frame.groupby(['pass_type_id', 'status'], observed=True).size()
+                 .unstack(fill_value=0).reindex(columns=list(PASS_STATUSES), fill_value=0))
+        usage.columns = list(PASS_STATUSES)
+        usage.index = usage.index.astype(object)
+        names = {pt.pass_type_id: pt.name for pt in self.manager.get_all_pass_types()}
+        # Pass types nobody holds yet are listed too, with zero counts
+        usage = usage.reindex(sorted(set(names) | set(usage.index)), fill_value=0)
+        usage.index.name = 'pass_type_id'
+        usage['issued'] = usage.sum(axis=1)
+        usage.insert(0, 'name', [names.get(pass_type_id, 'Unknown') for pass_type_id in usage.index])
+        return usage
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Safety Pass Management System - Non-interactive Command Line
+For cron jobs and HR sync scripts: every operation is a subcommand, input
+records are streamed from CSV files or stdin ('-'), and each invocation is
+one transaction with a single load and a single save.
+
+Examples:
+  python safety_pass_cli.py issue new_passes.csv
+  python safety_pass_cli.py revoke --ids PASS001 PASS002
+  python safety_pass_cli.py renew --ids PASS001 PASS002
+  python safety_pass_cli.py bulk-issue HEIGHTS --department Operations --renew-only
+  python safety_pass_cli.py offboard leavers.csv
+  python safety_pass_cli.py import employees hr_export.csv
+  python safety_pass_cli.py export passes --status active -o active.csv
+  python safety_pass_cli.py sweep
+  python safety_pass_cli.py notify
+  python safety_pass_cli.py report expiring --format html -o expiring.html
+  python safety_pass_cli.py forecast --period month --horizon 365 --format csv
+  python safety_pass_cli.py require Operations SAFETY_INDUCTION HEIGHTS
+  python safety_pass_cli.py compliance --department Operations --format csv
+  python safety_pass_cli.py as-of 2025-03-14 --pass-type CONFINED_SPACE
+  python safety_pass_cli.py history --pass PASS000123
+  python safety_pass_cli.py search "jane ops"
+  python safety_pass_cli.py teams --by manager
+  python safety_pass_cli.py team --manager "Jane Manager" --expiring 30
+  python safety_pass_cli.py check
+  python safety_pass_cli.py stats --json
+"""
+
+import argparse
+import contextlib
+import csv
+import sys
+from datetime import date
+
+# Only the standard library is imported up front; each subcommand imports
+# the parts of the system it needs so the CLI starts quickly.
+
+EXPORT_TABLES = ('employees', 'pass_types', 'passes')
+
+
+def open_input(path):
+    """Open a CSV input file, or stdin for '-'"""
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, 'r', newline='')
+
+
+def load_manager(args):
+    from safety_pass_system import SafetyPassManager
+    # Outcomes are summarised by each subcommand, not printed per operation
+    manager = SafetyPassManager(args.data_folder, quiet=True)
+    # Rows quarantined at load must not go unnoticed in unattended runs
+    if not manager.validation_report.is_empty():
+        print(manager.validation_report, file=sys.stderr)
+    return manager
+
+
+def report(action, succeeded, failures):
+    """Print a one-line summary, and each failure on stderr; returns the exit code"""
+    print(f"{action}: {succeeded} succeeded, {len(failures)} failed")
+    for failure in failures:
+        print(f"  {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def write_output(report, args):
+    """Write a report in the chosen format to the --output file, or to stdout"""
+    from safety_pass_system import write_report
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as out:
+            write_report(report, out, args.format)
+    else:
+        write_report(report, sys.stdout, args.format)
+
+
+# Subcommands
+def cmd_issue(args):
+    from safety_pass_system import is_iso_date
+
+    manager = load_manager(args)
+    issued, failures = 0, []
+    with open_input(args.file) as f, manager.write_locked():
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            employee_id, pass_type_id = row.get('employee_id'), row.get('pass_type_id')
+            if not (employee_id and pass_type_id):
+                failures.append(f"line {line_number}: employee_id and pass_type_id are required")
+                continue
+            issue_date = row.get('issue_date') or None
+            if issue_date and not is_iso_date(issue_date):
+                failures.append(f"line {line_number}: issue_date '{issue_date}' is not a YYYY-MM-DD date")
+                continue
+            pass_id = row.get('pass_id') or None
+            if pass_id in manager.safety_passes:
+                failures.append(f"line {line_number}: pass ID '{pass_id}' is already in use")
+                continue
+            if manager.issue_safety_pass(pass_id, employee_id, pass_type_id, issue_date):
+                issued += 1
+            else:
+                failures.append(f"line {line_number}: unknown employee '{employee_id}' "
+                                f"or pass type '{pass_type_id}'")
+    return report("issue", issued, failures)
+
+
+def cmd_bulk_issue(args):
+    from safety_pass_system import is_iso_date
+
+    if args.issue_date and not is_iso_date(args.issue_date):
+        print(f"bulk-issue: issue date '{args.issue_date}' is not a YYYY-MM-DD date", file=sys.stderr)
+        return 2
+    employee_ids = args.ids
+    if args.file:
+        with open_input(args.file) as f:
+            employee_ids = [row['employee_id'] for row in csv.DictReader(f) if row.get('employee_id')]
+    if employee_ids is None and args.department is None and args.manager is None:
+        print("bulk-issue: select employees with --department, --manager, --ids or --file", file=sys.stderr)
+        return 2
+
+    manager = load_manager(args)
+    if args.pass_type_id not in manager.pass_types:
+        print(f"bulk-issue: unknown pass type '{args.pass_type_id}'", file=sys.stderr)
+        return 1
+    selected = manager.find_employees(args.department, args.manager, employee_ids)
+    issued = manager.bulk_issue_passes(args.pass_type_id, selected, args.issue_date, args.renew_only)
+
+    issued_to = {safety_pass.employee_id for safety_pass in issued}
+    failures = [f"{emp_id}: unknown employee" for emp_id in (employee_ids or []) if emp_id not in manager.employees]
+    skipped = len(selected) - len(issued_to)
+    if skipped:
+        print(f"bulk-issue: {skipped} selected employees skipped (no existing pass to renew)")
+    return report(f"bulk-issue {args.pass_type_id}", len(issued), failures)
+
+
+def iter_pass_ids(args):
+    if args.ids:
+        yield from args.ids
+        return
+    with open_input(args.file) as f:
+        for row in csv.DictReader(f):
+            if row.get('pass_id'):
+                yield row['pass_id']
+
+
+def cmd_revoke(args):
+    if not args.ids and not args.file:
+        print("revoke: give a CSV file with a pass_id column, '-' for stdin, or --ids", file=sys.stderr)
+        return 2
+    manager = load_manager(args)
+    revoked, failures = 0, []
+    with manager.write_locked():
+        for pass_id in iter_pass_ids(args):
+            if manager.revoke_safety_pass(pass_id):
+                revoked += 1
+            else:
+                failures.append(f"{pass_id}: safety pass not found")
+    return report("revoke", revoked, failures)
+
+
+def cmd_renew(args):
+    from safety_pass_system import is_iso_date
+
+    if not args.ids and not args.file:
+        print("renew: give a CSV file with a pass_id column, '-' for stdin, or --ids", file=sys.stderr)
+        return 2
+    if args.issue_date and not is_iso_date(args.issue_date):
+        print(f"renew: issue date '{args.issue_date}' is not a YYYY-MM-DD date", file=sys.stderr)
+        return 2
+    manager = load_manager(args)
+    pass_ids = list(iter_pass_ids(args))
+    renewed = manager.renew_passes(pass_ids, args.issue_date)
+    failures = [f"{pass_id}: safety pass not found" for pass_id in pass_ids if pass_id not in manager.safety_passes]
+    return report("renew", len(renewed), failures)
+
+
+def cmd_offboard(args):
+    employee_ids = args.ids
+    if args.file:
+        with open_input(args.file) as f:
+            employee_ids = [row['employee_id'] for row in csv.DictReader(f) if row.get('employee_id')]
+    if not employee_ids:
+        print("offboard: give a CSV file with an employee_id column, '-' for stdin, or --ids", file=sys.stderr)
+        return 2
+
+    manager = load_manager(args)
+    summary = manager.offboard_employees(employee_ids, archive_passes=not args.keep_passes)
+    print(f"offboard: {summary}")
+    for employee_id in summary.not_found:
+        print(f"  {employee_id}: employee not found", file=sys.stderr)
+    return 1 if summary.not_found else 0
+
+
+def cmd_import(args):
+    manager = load_manager(args)
+    with open_input(args.file) as f:
+        summary = manager.bulk_import(args.table, csv.DictReader(f), delete_missing=args.sync)
+    print(f"import {args.table}: {summary}")
+    for error in summary.errors:
+        print(f"  {error}", file=sys.stderr)
+    return 1 if summary.errors else 0
+
+
+def cmd_export(args):
+    from safety_pass_system import EMPLOYEE_FIELDS, PASS_TYPE_FIELDS, SAFETY_PASS_FIELDS
+
+    manager = load_manager(args)
+    fieldnames, records = {
+        'employees': (EMPLOYEE_FIELDS, manager.get_all_employees),
+        'pass_types': (PASS_TYPE_FIELDS, manager.get_all_pass_types),
+        'passes': (SAFETY_PASS_FIELDS, manager.get_all_passes),
+    }[args.table]
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=fieldnames)
+        writer.writeheader()
+        for record in records():
+            if args.status and getattr(record, 'status', None) != args.status:
+                continue
+            writer.writerow(record.to_dict())
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def cmd_sweep(args):
+    manager = load_manager(args)
+    before = manager.get_statistics()['expired_passes']
+    manager.update_expired_passes()
+    print(f"sweep: {manager.get_statistics()['expired_passes'] - before} passes marked expired")
+    return 0
+
+
+def cmd_notify(args):
+    from safety_pass_system import SafetyPassApp, EmailNotificationSystem
+    try:
+        from config import EMAIL_CONFIG
+    except ImportError:
+        print("Warning: config.py not found; copy config_example.py to config.py to send email.",
+              file=sys.stderr)
+        from config_example import EMAIL_CONFIG
+
+    app = SafetyPassApp(args.data_folder)
+    app.email_system = EmailNotificationSystem(**EMAIL_CONFIG)
+    app.run_daily_notifications()
+    return 0
+
+
+def cmd_report(args):
+    from safety_pass_system import ReportEngine
+
+    manager = load_manager(args)
+    report = ReportEngine(manager).build(args.name)
+    write_output(report, args)
+    return 0
+
+
+def cmd_forecast(args):
+    from safety_pass_system import ReportEngine
+
+    manager = load_manager(args)
+    report = ReportEngine(manager).renewal_forecast(args.horizon, args.period)
+    write_output(report, args)
+    return 0
+
+
+def cmd_require(args):
+    manager = load_manager(args)
+    ok = manager.set_requirements(args.department, args.pass_type_ids)
+    if not ok:
+        unknown = [pass_type_id for pass_type_id in args.pass_type_ids if pass_type_id not in manager.pass_types]
+        print(f"require: unknown pass type(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    print(f"require: {args.department}: {', '.join(args.pass_type_ids) or 'no requirements'}")
+    return 0
+
+
+def cmd_compliance(args):
+    from safety_pass_system import ReportEngine
+
+    manager = load_manager(args)
+    report = ReportEngine(manager).compliance_gaps(args.days, args.department)
+    write_output(report, args)
+    return 0
+
+
+def cmd_as_of(args):
+    from safety_pass_system import ReportEngine
+
+    try:
+        date.fromisoformat(args.date)
+    except ValueError:
+        print(f"as-of: '{args.date}' is not a YYYY-MM-DD date", file=sys.stderr)
+        return 2
+    manager = load_manager(args)
+    if args.pass_type and args.pass_type not in manager.pass_types:
+        print(f"as-of: unknown pass type '{args.pass_type}'", file=sys.stderr)
+        return 2
+    report = ReportEngine(manager).passes_as_of(args.date, args.pass_type)
+    write_output(report, args)
+    return 0
+
+
+def cmd_history(args):
+    manager = load_manager(args)
+    if args.pass_id:
+        events = manager.get_pass_history(args.pass_id)
+    else:
+        events = manager.get_employee_history(args.employee_id)
+    if args.json:
+        import json
+        for event in events:
+            print(json.dumps(event))
+        return 0
+    if not events:
+        print(f"history: no events for {args.pass_id or args.employee_id}")
+    for event in events:
+        details = ", ".join(f"{key}={value}" for key, value in event.items() if key not in ('at', 'event'))
+        print(f"{event['at']}  {event['event']:<16} {details}")
+    return 0
+
+
+def cmd_search(args):
+    manager = load_manager(args)
+    if args.passes:
+        passes = manager.search_passes(args.query, args.limit, holders=True)
+        for safety_pass in passes:
+            employee = manager.employees.get(safety_pass.employee_id)
+            print(f"{safety_pass.pass_id}  {safety_pass.status:<8} {safety_pass.expiry_date}  "
+                  f"{employee.name if employee else safety_pass.employee_id}")
+        found = len(passes)
+    else:
+        employees = manager.search_employees(args.query, args.limit)
+        for employee in employees:
+            print(f"{employee.employee_id}  {employee.name}  <{employee.email}>  {employee.department}")
+        found = len(employees)
+    if not found:
+        print(f"search: nothing matches '{args.query}'", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_teams(args):
+    from safety_pass_system import ReportEngine
+
+    manager = load_manager(args)
+    report = ReportEngine(manager).team_summary(args.by, args.days)
+    write_output(report, args)
+    return 0
+
+
+def cmd_team(args):
+    from safety_pass_system import ReportEngine
+
+    manager = load_manager(args)
+    by, name = ('department', args.department) if args.department else ('manager', args.manager)
+    if name not in manager.get_team_names(by):
+        print(f"team: no employees with {by} '{name}'", file=sys.stderr)
+        return 1
+    report = ReportEngine(manager).team_passes(by, name, args.expiring)
+    write_output(report, args)
+    return 0
+
+
+def cmd_check(args):
+    manager = load_manager(args)
+    if manager.validation_report.is_empty():
+        print("check: all data rows are valid")
+        return 0
+    return 1
+
+
+def cmd_stats(args):
+    manager = load_manager(args)
+    stats = manager.get_statistics()
+    if args.json:
+        import json
+        print(json.dumps(stats))
+    else:
+        for key, value in stats.items():
+            print(f"{key.replace('_', ' ').title()}: {value}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Safety Pass Management System command line")
+    parser.add_argument('--data-folder', default='safety_pass_data', help="Folder holding the CSV data files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    issue = subparsers.add_parser('issue', help="Issue passes from a CSV (employee_id, pass_type_id, and "
+                                                "optionally pass_id and issue_date)")
+    issue.add_argument('file', help="CSV file, or '-' for stdin")
+    issue.set_defaults(func=cmd_issue)
+
+    revoke = subparsers.add_parser('revoke', help="Revoke passes listed in a CSV with a pass_id column")
+    revoke.add_argument('file', nargs='?', help="CSV file, or '-' for stdin")
+    revoke.add_argument('--ids', nargs='+', help="Pass IDs given directly instead of a file")
+    revoke.set_defaults(func=cmd_revoke)
+
+    renew = subparsers.add_parser('renew', help="Issue a fresh pass of the same type for each listed pass")
+    renew.add_argument('file', nargs='?', help="CSV file with a pass_id column, or '-' for stdin")
+    renew.add_argument('--ids', nargs='+', help="Pass IDs given directly instead of a file")
+    renew.add_argument('--issue-date', help="YYYY-MM-DD (default: today)")
+    renew.set_defaults(func=cmd_renew)
+
+    bulk_issue = subparsers.add_parser('bulk-issue', help="Issue or renew one pass type for a department, "
+                                                          "a manager's team or a list of employees")
+    bulk_issue.add_argument('pass_type_id')
+    bulk_issue.add_argument('--department', help="Only employees in this department")
+    bulk_issue.add_argument('--manager', help="Only employees reporting to this manager")
+    bulk_issue.add_argument('--ids', nargs='+', help="Only these employee IDs")
+    bulk_issue.add_argument('--file', help="Only employees listed in a CSV with an employee_id column ('-' for stdin)")
+    bulk_issue.add_argument('--issue-date', help="YYYY-MM-DD (default: today)")
+    bulk_issue.add_argument('--renew-only', action='store_true',
+                            help="Only employees who already hold a pass of this type")
+    bulk_issue.set_defaults(func=cmd_bulk_issue)
+
+    offboard = subparsers.add_parser('offboard', help="Remove leavers and revoke (and archive) their passes")
+    offboard.add_argument('file', nargs='?', help="CSV file with an employee_id column, or '-' for stdin")
+    offboard.add_argument('--ids', nargs='+', help="Employee IDs given directly instead of a file")
+    offboard.add_argument('--keep-passes', action='store_true',
+                          help="Leave the revoked passes in the passes file instead of archiving them")
+    offboard.set_defaults(func=cmd_offboard)
+
+    import_ = subparsers.add_parser('import', help="Apply only the inserts, updates (and deletes) in a CSV export; "
+                                                   "pass files may omit expiry_date and status")
+    import_.add_argument('table', choices=EXPORT_TABLES)
+    import_.add_argument('file', help="CSV file, or '-' for stdin")
+    import_.add_argument('--sync', action='store_true',
+                         help="The file is a full export: delete records that are not in it "
+                              "(employees are offboarded)")
+    import_.set_defaults(func=cmd_import)
+
+    export = subparsers.add_parser('export', help="Write records as CSV")
+    export.add_argument('table', choices=EXPORT_TABLES)
+    export.add_argument('-o', '--output', help="Output file (default: stdout)")
+    export.add_argument('--status', choices=['active', 'expired', 'revoked'], help="Only passes with this status")
+    export.set_defaults(func=cmd_export)
+
+    sweep = subparsers.add_parser('sweep', help="Mark passes past their expiry date as expired")
+    sweep.set_defaults(func=cmd_sweep)
+
+    notify = subparsers.add_parser('notify', help="Run the daily expiry check and send reminder emails")
+    notify.set_defaults(func=cmd_notify)
+
+    report = subparsers.add_parser('report', help="Write one of the standard reports")
+    report.add_argument('name', choices=['expiring', 'expired', 'active', 'employees', 'stats', 'forecast',
+                                        'compliance', 'departments'])
+    report.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    report.add_argument('-o', '--output', help="Output file (default: stdout)")
+    report.set_defaults(func=cmd_report)
+
+    forecast = subparsers.add_parser('forecast', help="Renewals due per week or month, by pass type and department")
+    forecast.add_argument('--period', choices=['week', 'month'], default='week')
+    forecast.add_argument('--horizon', type=int, default=91, help="Days ahead to cover (default: 91)")
+    forecast.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    forecast.add_argument('-o', '--output', help="Output file (default: stdout)")
+    forecast.set_defaults(func=cmd_forecast)
+
+    require = subparsers.add_parser('require', help="Set the pass types a department ('*': everyone) must hold; "
+                                                    "no pass types clears them")
+    require.add_argument('department')
+    require.add_argument('pass_type_ids', nargs='*', metavar='pass_type_id')
+    require.set_defaults(func=cmd_require)
+
+    compliance = subparsers.add_parser('compliance', help="Required passes each employee is missing, or that have "
+                                                          "expired or are expiring")
+    compliance.add_argument('--department', help="Only employees in this department")
+    compliance.add_argument('--days', type=int, default=30, help="Warn of passes expiring within this many days "
+                                                                  "(default: 30)")
+    compliance.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    compliance.add_argument('-o', '--output', help="Output file (default: stdout)")
+    compliance.set_defaults(func=cmd_compliance)
+
+    as_of = subparsers.add_parser('as-of', help="Passes that were valid on a date, e.g. for an audit")
+    as_of.add_argument('date', help="YYYY-MM-DD")
+    as_of.add_argument('--pass-type', help="Only passes of this type")
+    as_of.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    as_of.add_argument('-o', '--output', help="Output file (default: stdout)")
+    as_of.set_defaults(func=cmd_as_of)
+
+    history = subparsers.add_parser('history', help="Audit events for one pass or one employee, oldest first")
+    history_key = history.add_mutually_exclusive_group(required=True)
+    history_key.add_argument('--pass', dest='pass_id', help="Pass ID")
+    history_key.add_argument('--employee', dest='employee_id', help="Employee ID")
+    history.add_argument('--json', action='store_true', help="One JSON object per line")
+    history.set_defaults(func=cmd_history)
+
+    search = subparsers.add_parser('search', help="Find employees by name, ID, email or department as you would "
+                                                  "in the GUI (tolerates one typo per word)")
+    search.add_argument('query')
+    search.add_argument('--passes', action='store_true', help="Find passes by pass ID or holder instead")
+    search.add_argument('--limit', type=int, default=50, help="Most results to show (default: 50)")
+    search.set_defaults(func=cmd_search)
+
+    teams = subparsers.add_parser('teams', help="Members, active and expiring passes per department or manager")
+    teams.add_argument('--by', choices=['department', 'manager'], default='department')
+    teams.add_argument('--days', type=int, default=30, help="Count passes expiring within this many days "
+                                                             "(default: 30)")
+    teams.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    teams.add_argument('-o', '--output', help="Output file (default: stdout)")
+    teams.set_defaults(func=cmd_teams)
+
+    team = subparsers.add_parser('team', help="Active passes of one department or manager's team")
+    team_key = team.add_mutually_exclusive_group(required=True)
+    team_key.add_argument('--department')
+    team_key.add_argument('--manager')
+    team.add_argument('--expiring', type=int, metavar='DAYS', help="Only passes expiring within DAYS days")
+    team.add_argument('--format', choices=['text', 'csv', 'html'], default='text')
+    team.add_argument('-o', '--output', help="Output file (default: stdout)")
+    team.set_defaults(func=cmd_team)
+
+    check = subparsers.add_parser('check', help="Validate the data files, quarantining invalid rows")
+    check.set_defaults(func=cmd_check)
+
+    stats = subparsers.add_parser('stats', help="Print system statistics")
+    stats.add_argument('--json', action='store_true', help="Print as JSON")
+    stats.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
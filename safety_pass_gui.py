@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
+import itertools
+import queue
 import threading
 import os
-from safety_pass_system import SafetyPassApp, EmailNotificationSystem
+from safety_pass_system import (METRICS, SafetyPassApp, EmailNotificationSystem, ReportEngine, iter_report_text,
+                                 write_report)
 
 # Try to import configuration
 try:
@@ -16,32 +19,143 @@ except ImportError:
         'email_password': 'your_app_password'
     }
 
+# How often to check the CSV files for edits made outside the application
+DATA_WATCH_INTERVAL_MS = 2000
+# Report rows inserted into the Reports tab per event-loop tick
+REPORT_CHUNK_ROWS = 500
+# Search boxes filter once typing pauses for this long, rather than on every keystroke
+SEARCH_DELAY_MS = 250
+# Employees offered at a time by the search-as-you-type employee pickers
+EMPLOYEE_PICKER_RESULTS = 50
+# How often the window checks on the background data load
+LOAD_POLL_INTERVAL_MS = 50
+# Rows read into a sorted table at a time; more are read when it is scrolled to the bottom
+SORTED_PAGE_ROWS = 200
+
 
 class SafetyPassGUI:
-    def __init__(self, root):
+    # (name, title, method creating the tab's widgets, methods filling them); a tab's
+    # widgets are created the first time it is shown, and only created tabs are refreshed
+    TABS = [
+        ('dashboard', "🏠 Dashboard", 'create_dashboard_tab', ('refresh_dashboard_stats',)),
+        ('employees', "👥 Employees", 'create_employees_tab', ('refresh_employees_data',)),
+        ('pass_types', "🏷️ Pass Types", 'create_pass_types_tab', ('refresh_pass_types_data',)),
+        ('passes', "🎫 Safety Passes", 'create_passes_tab', ('refresh_passes_data', 'update_filter_combos')),
+        ('reports', "📊 Reports", 'create_reports_tab', ()),
+    ]
+    # Tables sorted by the manager's sorted indexes when a column heading is clicked: the table,
+    # the field rows are keyed by, the method giving a row's values, and the SORT_COLUMNS column
+    # behind each tree column. Pass types are few, and are sorted in the tree itself.
+    SORTABLE_TABLES = {
+        'employees': ('employees', 'employee_id', 'employee_row_values', {
+            'ID': 'employee_id', 'Name': 'name', 'Email': 'email', 'Department': 'department',
+            'Manager': 'manager', 'Active Passes': 'active_passes'}),
+        'passes': ('safety_passes', 'pass_id', 'pass_row_values', {
+            'Pass ID': 'pass_id', 'Employee': 'employee_name', 'Pass Type': 'pass_type_name',
+            'Issue Date': 'issue_date', 'Expiry Date': 'expiry_date', 'Days Left': 'days_left',
+            'Status': 'status'}),
+    }
+
+    def __init__(self, root, data_folder="safety_pass_data"):
         self.root = root
         self.root.title("Safety Pass Management System")
         self.root.geometry("1200x800")
         self.root.minsize(1000, 600)
 
-        # Initialize the backend system
-        self.app = SafetyPassApp()
-        self.app.email_system = EmailNotificationSystem(**EMAIL_CONFIG)
+        # The backend is loaded on a background thread; until then the window shows progress
+        self.app = None
+        self.report_engine = None
+        self.change_queue = None
+        self.load_queue = queue.Queue()
+        self.built_tabs = set()
+        self.current_report = None
+        self.report_render_job = None
+        self.refreshed_date = None
+        # Pending search-as-you-type refreshes, by search box
+        self.search_jobs = {}
+        # Tables sorted by a column heading: table -> (column, descending), their heading texts,
+        # and how many rows of each sorted table have been read and whether more remain
+        self.sort_orders = {}
+        self.heading_texts = {}
+        self.sorted_rows = {}
+        # Passes issued per pass type, and the type each counted pass has; counted when the
+        # pass types tab is filled, then kept up to date from change events
+        self.issued_counts = {}
+        self.issued_types = {}
 
         # Configure styles
         self.setup_styles()
 
         # Create main interface
-        self.create_menu()
         self.create_main_interface()
         self.create_status_bar()
 
-        # Load initial data
-        self.refresh_all_data()
+        # Load the data files without holding up the first paint
+        threading.Thread(target=self.load_data, args=(data_folder,), daemon=True).start()
+        self.root.after(LOAD_POLL_INTERVAL_MS, self.poll_load)
+
+    def load_data(self, data_folder):
+        """Load the data files; runs on a background thread and reports through load_queue"""
+        def progress(step, fraction):
+            self.load_queue.put(('progress', step, fraction))
+
+        try:
+            self.load_queue.put(('loaded', SafetyPassApp(data_folder, progress)))
+        except Exception as e:
+            self.load_queue.put(('failed', e))
+
+    def poll_load(self):
+        """Show the background load's progress, and finish starting up once it is done"""
+        while True:
+            try:
+                message = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                _, step, fraction = message
+                self.load_progress['value'] = fraction * 100
+                self.status_label.config(text=f"{step}...")
+            elif message[0] == 'loaded':
+                self.finish_loading(message[1])
+                return
+            else:
+                self.load_progress.pack_forget()
+                self.status_label.config(text="Could not load the data")
+                messagebox.showerror("Load Failed", f"Could not load the safety pass data:\n{message[1]}")
+                return
+        self.root.after(LOAD_POLL_INTERVAL_MS, self.poll_load)
+
+    def finish_loading(self, app):
+        """Connect the loaded backend, then show the open tab"""
+        self.app = app
+        self.app.email_system = EmailNotificationSystem(**EMAIL_CONFIG)
+        self.report_engine = ReportEngine(self.app.manager)
+        # Every committed change, from this window, other threads or reloaded files, arrives here
+        self.change_queue = self.app.manager.change_feed.subscribe_queue()
+
+        self.create_menu()
+        self.load_progress.pack_forget()
+        # Fill the open tab; the others are filled when first shown
+        self.refreshed_date = datetime.now().date()
+        self.build_tab(self.notebook.index('current'))
+        self.update_status("Data loaded")
+
+        # Build the search indexes in the background, so the first keystroke doesn't wait for them
+        threading.Thread(target=self.app.manager.build_search_indexes, daemon=True).start()
+
+        # Keep the metrics file in the data folder up to date (see Tools -> Diagnostics)
+        self.app.manager.start_metrics_export()
 
         # Setup auto-refresh
         self.setup_auto_refresh()
 
+        # Watch the CSV files for edits made in Excel or by other processes
+        self.root.after(DATA_WATCH_INTERVAL_MS, self.watch_data_files)
+
+        # Report rows quarantined while loading, once the window is up
+        self.reported_problems = 0
+        self.root.after_idle(self.check_validation_report)
+
     def setup_styles(self):
         """Configure the application theme and styles"""
         style = ttk.Style()
@@ -77,6 +191,8 @@ class SafetyPassGUI:
         tools_menu.add_command(label="Send Test Email", command=self.send_test_email)
         tools_menu.add_command(label="Check Expiring Passes", command=self.check_expiring_passes)
         tools_menu.add_command(label="Email Settings", command=self.show_email_settings)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="Diagnostics", command=self.show_diagnostics)
 
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -89,17 +205,31 @@ class SafetyPassGUI:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=5)
 
-        # Create tabs
-        self.create_dashboard_tab()
-        self.create_employees_tab()
-        self.create_pass_types_tab()
-        self.create_passes_tab()
-        self.create_reports_tab()
-
-    def create_dashboard_tab(self):
+        # Create empty tabs; each is filled in when first shown, once the data has loaded
+        self.tab_frames = []
+        for _, title, _, _ in self.TABS:
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            ttk.Label(frame, text="Loading safety pass data...", style='Heading.TLabel').pack(pady=40)
+            self.tab_frames.append(frame)
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.build_tab(self.notebook.index('current')))
+
+    @METRICS.timed('gui_build_tab')
+    def build_tab(self, index):
+        """Create a tab's widgets and fill them, the first time it is shown"""
+        name, _, create, refreshes = self.TABS[index]
+        if self.app is None or name in self.built_tabs:
+            return
+        frame = self.tab_frames[index]
+        for placeholder in frame.winfo_children():
+            placeholder.destroy()
+        getattr(self, create)(frame)
+        self.built_tabs.add(name)
+        for refresh in refreshes:
+            getattr(self, refresh)()
+
+    def create_dashboard_tab(self, dashboard_frame):
         """Create the dashboard overview tab"""
-        dashboard_frame = ttk.Frame(self.notebook)
-        self.notebook.add(dashboard_frame, text="🏠 Dashboard")
 
         # Title
         title_label = ttk.Label(dashboard_frame, text="Safety Pass Management Dashboard", style='Title.TLabel')
@@ -155,10 +285,8 @@ class SafetyPassGUI:
         ttk.Button(actions_grid, text="📂 Open Data Folder",
                    command=self.open_data_folder, width=20).grid(row=1, column=2, padx=5, pady=5)
 
-    def create_employees_tab(self):
+    def create_employees_tab(self, employees_frame):
         """Create the employees management tab"""
-        employees_frame = ttk.Frame(self.notebook)
-        self.notebook.add(employees_frame, text="👥 Employees")
 
         # Title and controls
         title_frame = ttk.Frame(employees_frame)
@@ -166,6 +294,12 @@ class SafetyPassGUI:
 
         ttk.Label(title_frame, text="Employee Management", style='Title.TLabel').pack(side='left')
 
+        ttk.Label(title_frame, text="🔍 Search:").pack(side='left', padx=(20, 5))
+        self.employee_search_var = tk.StringVar()
+        ttk.Entry(title_frame, textvariable=self.employee_search_var, width=25).pack(side='left')
+        self.employee_search_var.trace_add('write', lambda *args: self.schedule_search(
+            'employees', self.refresh_employees_data))
+
         controls_frame = ttk.Frame(title_frame)
         controls_frame.pack(side='right')
 
@@ -175,6 +309,8 @@ class SafetyPassGUI:
                    command=self.edit_selected_employee).pack(side='right', padx=5)
         ttk.Button(controls_frame, text="🗑️ Remove Selected",
                    command=self.remove_selected_employee).pack(side='right', padx=5)
+        ttk.Button(controls_frame, text="📜 History",
+                   command=self.show_selected_employee_history).pack(side='right', padx=5)
 
         # Employee list
         list_frame = ttk.LabelFrame(employees_frame, text="Employee List", padding=10)
@@ -201,7 +337,7 @@ class SafetyPassGUI:
 
         # Add scrollbar
         emp_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.employees_tree.yview)
-        self.employees_tree.configure(yscrollcommand=emp_scrollbar.set)
+        self.make_sortable('employees', emp_scrollbar)
 
         self.employees_tree.pack(side='left', fill='both', expand=True)
         emp_scrollbar.pack(side='right', fill='y')
@@ -209,10 +345,8 @@ class SafetyPassGUI:
         # Bind double-click to edit
         self.employees_tree.bind('<Double-1>', lambda e: self.edit_selected_employee())
 
-    def create_pass_types_tab(self):
+    def create_pass_types_tab(self, pass_types_frame):
         """Create the safety pass types management tab"""
-        pass_types_frame = ttk.Frame(self.notebook)
-        self.notebook.add(pass_types_frame, text="🏷️ Pass Types")
 
         # Title and controls
         title_frame = ttk.Frame(pass_types_frame)
@@ -229,6 +363,8 @@ class SafetyPassGUI:
                    command=self.edit_selected_pass_type).pack(side='right', padx=5)
         ttk.Button(controls_frame, text="🗑️ Remove Selected",
                    command=self.remove_selected_pass_type).pack(side='right', padx=5)
+        ttk.Button(controls_frame, text="🧩 Department Requirements",
+                   command=self.show_requirements_dialog).pack(side='right', padx=5)
 
         # Pass types list
         list_frame = ttk.LabelFrame(pass_types_frame, text="Available Pass Types", padding=10)
@@ -251,7 +387,7 @@ class SafetyPassGUI:
 
         # Add scrollbar
         pt_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.pass_types_tree.yview)
-        self.pass_types_tree.configure(yscrollcommand=pt_scrollbar.set)
+        self.make_sortable('pass_types', pt_scrollbar)
 
         self.pass_types_tree.pack(side='left', fill='both', expand=True)
         pt_scrollbar.pack(side='right', fill='y')
@@ -259,10 +395,8 @@ class SafetyPassGUI:
         # Bind double-click to edit
         self.pass_types_tree.bind('<Double-1>', lambda e: self.edit_selected_pass_type())
 
-    def create_passes_tab(self):
+    def create_passes_tab(self, passes_frame):
         """Create the safety passes management tab"""
-        passes_frame = ttk.Frame(self.notebook)
-        self.notebook.add(passes_frame, text="🎫 Safety Passes")
 
         # Title and controls
         title_frame = ttk.Frame(passes_frame)
@@ -275,8 +409,14 @@ class SafetyPassGUI:
 
         ttk.Button(controls_frame, text="🎫 Issue New Pass",
                    command=self.show_issue_pass_dialog).pack(side='right', padx=5)
+        ttk.Button(controls_frame, text="👥 Bulk Issue",
+                   command=self.show_bulk_issue_dialog).pack(side='right', padx=5)
+        ttk.Button(controls_frame, text="🔁 Renew Selected",
+                   command=self.renew_selected_passes).pack(side='right', padx=5)
         ttk.Button(controls_frame, text="❌ Revoke Selected",
                    command=self.revoke_selected_pass).pack(side='right', padx=5)
+        ttk.Button(controls_frame, text="📜 History",
+                   command=self.show_selected_pass_history).pack(side='right', padx=5)
 
         # Filter frame
         filter_frame = ttk.LabelFrame(passes_frame, text="Filter Passes", padding=10)
@@ -286,16 +426,28 @@ class SafetyPassGUI:
         filter_controls.pack(fill='x')
 
         ttk.Label(filter_controls, text="Status:").grid(row=0, column=0, padx=5, sticky='w')
-        self.pass_status_filter = ttk.Combobox(filter_controls, values=['All', 'Active', 'Expired', 'Revoked'],
-                                               state='readonly', width=10)
+        self.pass_status_filter = ttk.Combobox(filter_controls, values=['All', 'Active', 'Expiring (30 Days)',
+                                                                        'Expired', 'Revoked'],
+                                               state='readonly', width=16)
         self.pass_status_filter.set('All')
         self.pass_status_filter.grid(row=0, column=1, padx=5)
         self.pass_status_filter.bind('<<ComboboxSelected>>', lambda e: self.refresh_passes_data())
 
-        ttk.Label(filter_controls, text="Employee:").grid(row=0, column=2, padx=5, sticky='w')
-        self.employee_filter = ttk.Combobox(filter_controls, state='readonly', width=20)
-        self.employee_filter.grid(row=0, column=3, padx=5)
-        self.employee_filter.bind('<<ComboboxSelected>>', lambda e: self.refresh_passes_data())
+        ttk.Label(filter_controls, text="Search:").grid(row=0, column=2, padx=5, sticky='w')
+        self.pass_search_var = tk.StringVar()
+        ttk.Entry(filter_controls, textvariable=self.pass_search_var, width=22).grid(row=0, column=3, padx=5)
+        self.pass_search_var.trace_add('write', lambda *args: self.schedule_search(
+            'passes', self.refresh_passes_data))
+
+        ttk.Label(filter_controls, text="Department:").grid(row=1, column=0, padx=5, pady=(5, 0), sticky='w')
+        self.department_filter = ttk.Combobox(filter_controls, state='readonly', width=16)
+        self.department_filter.grid(row=1, column=1, padx=5, pady=(5, 0))
+        self.department_filter.bind('<<ComboboxSelected>>', lambda e: self.refresh_passes_data())
+
+        ttk.Label(filter_controls, text="Manager:").grid(row=1, column=2, padx=5, pady=(5, 0), sticky='w')
+        self.manager_filter = ttk.Combobox(filter_controls, state='readonly', width=20)
+        self.manager_filter.grid(row=1, column=3, padx=5, pady=(5, 0))
+        self.manager_filter.bind('<<ComboboxSelected>>', lambda e: self.refresh_passes_data())
 
         ttk.Button(filter_controls, text="Clear Filters",
                    command=self.clear_pass_filters).grid(row=0, column=4, padx=20)
@@ -306,7 +458,8 @@ class SafetyPassGUI:
 
         # Create treeview for passes
         columns = ('Pass ID', 'Employee', 'Pass Type', 'Issue Date', 'Expiry Date', 'Days Left', 'Status')
-        self.passes_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12)
+        self.passes_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12,
+                                        selectmode='extended')
 
         # Configure columns
         for col in columns:
@@ -322,15 +475,13 @@ class SafetyPassGUI:
 
         # Add scrollbar
         passes_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.passes_tree.yview)
-        self.passes_tree.configure(yscrollcommand=passes_scrollbar.set)
+        self.make_sortable('passes', passes_scrollbar)
 
         self.passes_tree.pack(side='left', fill='both', expand=True)
         passes_scrollbar.pack(side='right', fill='y')
 
-    def create_reports_tab(self):
+    def create_reports_tab(self, reports_frame):
         """Create the reports and analytics tab"""
-        reports_frame = ttk.Frame(self.notebook)
-        self.notebook.add(reports_frame, text="📊 Reports")
 
         # Title
         ttk.Label(reports_frame, text="Reports and Analytics", style='Title.TLabel').pack(pady=10)
@@ -348,7 +499,11 @@ class SafetyPassGUI:
             ("✅ All Active Passes", self.show_active_passes_report),
             ("👤 Employee Pass Summary", self.show_employee_summary_report),
             ("📈 System Statistics", self.show_system_stats_report),
-            ("📧 Email Notification Log", self.show_notification_log)
+            ("📅 Renewal Forecast (13 Weeks)", self.show_renewal_forecast_report),
+            ("🧩 Compliance Gaps", self.show_compliance_gaps_report),
+            ("🏢 Department Summary", self.show_department_summary_report),
+            ("📧 Email Notification Log", self.show_notification_log),
+            ("💾 Export Current Report", self.export_current_report)
         ]
 
         for i, (text, command) in enumerate(report_buttons):
@@ -374,9 +529,13 @@ class SafetyPassGUI:
         self.status_bar = ttk.Frame(self.root)
         self.status_bar.pack(side='bottom', fill='x')
 
-        self.status_label = ttk.Label(self.status_bar, text="Ready", relief='sunken')
+        self.status_label = ttk.Label(self.status_bar, text="Loading safety pass data...", relief='sunken')
         self.status_label.pack(side='left', fill='x', expand=True, padx=5, pady=2)
 
+        # Progress of the initial data load; hidden once it is done
+        self.load_progress = ttk.Progressbar(self.status_bar, length=200, maximum=100)
+        self.load_progress.pack(side='left', padx=5, pady=2)
+
         # Add current time
         self.time_label = ttk.Label(self.status_bar, text="", relief='sunken')
         self.time_label.pack(side='right', padx=5, pady=2)
@@ -391,7 +550,12 @@ class SafetyPassGUI:
 
     def setup_auto_refresh(self):
         """Setup automatic data refresh"""
-        self.refresh_all_data()
+        # The date moves every expiry count, so a new day redraws everything; otherwise only
+        # changes made by other threads (the HTTP service, the scheduler) need applying
+        if datetime.now().date() != self.refreshed_date:
+            self.refresh_all_data()
+        else:
+            self.apply_pending_changes()
         # Refresh every 30 seconds
         self.root.after(30000, self.setup_auto_refresh)
 
@@ -403,23 +567,29 @@ class SafetyPassGUI:
         self.root.after(5000, lambda: self.status_label.config(text="Ready"))
 
     # Data refresh methods
+    @METRICS.timed('gui_refresh_all')
     def refresh_all_data(self):
         """Refresh all data displays"""
-        self.refresh_dashboard_stats()
-        self.refresh_employees_data()
-        self.refresh_pass_types_data()
-        self.refresh_passes_data()
-        self.update_filter_combos()
+        # A full redraw covers every change queued so far
+        self.take_pending_changes()
+        self.refreshed_date = datetime.now().date()
+        # Tabs not shown yet are filled in when they are
+        for name, _, _, refreshes in self.TABS:
+            if name in self.built_tabs:
+                for refresh in refreshes:
+                    getattr(self, refresh)()
         self.update_status("Data refreshed")
 
+    @METRICS.timed('gui_refresh_dashboard')
     def refresh_dashboard_stats(self):
         """Update dashboard statistics"""
-        # Calculate statistics
-        total_employees = len(self.app.manager.employees)
-        total_pass_types = len(self.app.manager.pass_types)
-        active_passes = len([p for p in self.app.manager.safety_passes.values() if p.status == 'active'])
-        expired_passes = len([p for p in self.app.manager.safety_passes.values() if p.status == 'expired'])
-        expiring_soon = len(self.app.manager.get_expiring_passes(15))
+        # Calculate statistics (cached by the manager until the data changes)
+        stats = self.app.manager.get_statistics()
+        total_employees = stats['employees']
+        total_pass_types = stats['pass_types']
+        active_passes = stats['active_passes']
+        expired_passes = stats['expired_passes']
+        expiring_soon = stats['expiring_soon']
 
         # Update labels
         self.stats_labels['employees_count'].config(text=str(total_employees))
@@ -434,95 +604,409 @@ class SafetyPassGUI:
         else:
             self.stats_labels['expiring_soon_count'].config(foreground='green')
 
+    @METRICS.timed('gui_refresh_employees')
     def refresh_employees_data(self):
         """Refresh the employees treeview"""
         # Clear existing data
         for item in self.employees_tree.get_children():
             self.employees_tree.delete(item)
+        if 'employees' in self.sort_orders:
+            self.read_sorted_rows('employees')
+            return
 
-        # Add employee data
-        for emp in self.app.manager.employees.values():
-            active_passes = len(self.app.manager.get_employee_passes(emp.employee_id))
-            self.employees_tree.insert('', 'end', values=(
-                emp.employee_id, emp.name, emp.email,
-                emp.department, emp.manager, active_passes
-            ))
-
-    def refresh_pass_types_data(self):
-        """Refresh the pass types treeview"""
+        # Add employee data, best search matches first
+        query = self.employee_search_var.get()
+        if query.strip():
+            employees = self.app.manager.search_employees(query, limit=None, fuzzy=False)
+        else:
+            employees = self.app.manager.get_all_employees()
+        for emp in employees:
+            self.employees_tree.insert('', 'end', iid=emp.employee_id, values=self.employee_row_values(emp))
+
+    def employee_matches_filters(self, emp):
+        """Whether an employee matches the search box of the employees tab"""
+        query = self.employee_search_var.get()
+        return not query.strip() or self.app.manager.employee_matches_search(emp.employee_id, query)
+
+    def schedule_search(self, name, refresh):
+        """Run refresh once typing in a search box pauses"""
+        job = self.search_jobs.pop(name, None)
+        if job is not None:
+            self.root.after_cancel(job)
+        self.search_jobs[name] = self.root.after(SEARCH_DELAY_MS, lambda: (self.search_jobs.pop(name), refresh()))
+
+    def employee_row_values(self, emp):
+        """Column values for one employee row"""
+        active_passes = len(self.app.manager.get_employee_passes(emp.employee_id))
+        return (emp.employee_id, emp.name, emp.email,
+                emp.department, emp.manager, active_passes)
+
+    @METRICS.timed('gui_refresh_pass_types')
+    def refresh_pass_types_data(self, recount=True):
+        """Refresh the pass types treeview; without recount, the issued counts kept from change events are shown"""
         # Clear existing data
         for item in self.pass_types_tree.get_children():
             self.pass_types_tree.delete(item)
 
-        # Add pass type data
-        for pt in self.app.manager.pass_types.values():
-            issued_count = len([p for p in self.app.manager.safety_passes.values()
-                                if p.pass_type_id == pt.pass_type_id])
-            self.pass_types_tree.insert('', 'end', values=(
-                pt.pass_type_id, pt.name, pt.category,
-                pt.description, pt.validity_period_days, issued_count
-            ))
+        if recount:
+            self.issued_types = {p.pass_id: p.pass_type_id for p in self.app.manager.get_all_passes()}
+            self.issued_counts = {}
+            for pass_type_id in self.issued_types.values():
+                self.issued_counts[pass_type_id] = self.issued_counts.get(pass_type_id, 0) + 1
 
+        # Add pass type data
+        rows = []
+        for pt in self.app.manager.get_all_pass_types():
+            rows.append((pt.pass_type_id, pt.name, pt.category,
+                         pt.description, pt.validity_period_days, self.issued_counts.get(pt.pass_type_id, 0)))
+
+        # Pass types are few, so a sorted order is a plain sort of the rows
+        if 'pass_types' in self.sort_orders:
+            column, descending = self.sort_orders['pass_types']
+            index = self.pass_types_tree['columns'].index(column)
+            rows.sort(key=lambda row: row[index].casefold() if isinstance(row[index], str) else row[index],
+                      reverse=descending)
+        for row in rows:
+            self.pass_types_tree.insert('', 'end', iid=row[0], values=row)
+
+    @METRICS.timed('gui_refresh_passes')
     def refresh_passes_data(self):
         """Refresh the passes treeview with filters"""
         # Clear existing data
         for item in self.passes_tree.get_children():
             self.passes_tree.delete(item)
+        if 'passes' in self.sort_orders:
+            self.read_sorted_rows('passes')
+            return
 
-        # Get filter values
+        # Add pass data with filters; a team filter reads only that team's passes from its view
+        for safety_pass in self.filtered_pass_candidates():
+            if self.pass_matches_filters(safety_pass):
+                self.passes_tree.insert('', 'end', iid=safety_pass.pass_id,
+                                        values=self.pass_row_values(safety_pass))
+
+    def team_filter(self):
+        """(by, name) of the department or manager filter in effect, or None"""
+        department = self.department_filter.get()
+        if department and department != 'All Departments':
+            return 'department', department
+        manager = self.manager_filter.get()
+        if manager and manager != 'All Managers':
+            return 'manager', manager
+        return None
+
+    def filtered_pass_candidates(self):
+        """All passes, or only those the search box finds, or the filtered team's passes"""
+        query = self.pass_search_var.get()
+        if query.strip():
+            return self.app.manager.search_passes(query, limit=None, fuzzy=False, holders=True)
+        team = self.team_filter()
+        if team is None:
+            return self.app.manager.get_all_passes()
         status_filter = self.pass_status_filter.get()
-        employee_filter = self.employee_filter.get()
-
-        # Add pass data with filters
-        for safety_pass in self.app.manager.safety_passes.values():
-            # Apply status filter
-            if status_filter != 'All' and safety_pass.status.title() != status_filter:
-                continue
+        if status_filter == 'Expiring (30 Days)':
+            return self.app.manager.get_team_passes(*team, expiring_within=30)
+        status = None if status_filter == 'All' else status_filter.lower()
+        return self.app.manager.get_team_passes(*team, status=status)
 
-            # Apply employee filter
-            if employee_filter and employee_filter != 'All Employees':
-                emp_name = self.app.manager.employees.get(safety_pass.employee_id, {}).name
-                if emp_name != employee_filter:
-                    continue
-
-            # Get employee and pass type names
+    def pass_matches_filters(self, safety_pass):
+        """Whether a pass passes the status, search and team filters of the passes tab"""
+        status_filter = self.pass_status_filter.get()
+        query = self.pass_search_var.get()
+        department_filter = self.department_filter.get()
+        manager_filter = self.manager_filter.get()
+
+        # Apply status filter
+        if status_filter == 'Expiring (30 Days)':
+            if safety_pass.status != 'active' or not 1 <= safety_pass.days_until_expiry() <= 30:
+                return False
+        elif status_filter != 'All' and safety_pass.status.title() != status_filter:
+            return False
+
+        # Apply search: the pass ID, or the holder's name, ID, email or department
+        if query.strip() and not self.app.manager.pass_matches_search(safety_pass, query):
+            return False
+
+        # Apply department and manager filters
+        by_department = department_filter and department_filter != 'All Departments'
+        by_manager = manager_filter and manager_filter != 'All Managers'
+        if by_department or by_manager:
             employee = self.app.manager.employees.get(safety_pass.employee_id)
-            pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
-
-            employee_name = employee.name if employee else "Unknown"
-            pass_type_name = pass_type.name if pass_type else "Unknown"
-
-            # Calculate days left
-            days_left = safety_pass.days_until_expiry() if safety_pass.status == 'active' else 'N/A'
-
-            # Color code based on status and days left
-            item = self.passes_tree.insert('', 'end', values=(
-                safety_pass.pass_id, employee_name, pass_type_name,
+            if employee is None:
+                return False
+            if by_department and employee.department != department_filter:
+                return False
+            if by_manager and employee.manager != manager_filter:
+                return False
+
+        return True
+
+    def pass_row_values(self, safety_pass):
+        """Column values for one pass row, color coded by status and days left"""
+        # Get employee and pass type names
+        employee = self.app.manager.employees.get(safety_pass.employee_id)
+        pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
+
+        employee_name = employee.name if employee else "Unknown"
+        pass_type_name = pass_type.name if pass_type else "Unknown"
+
+        # Calculate days left
+        days_left = safety_pass.days_until_expiry() if safety_pass.status == 'active' else 'N/A'
+        status = safety_pass.status.title()
+
+        # Color coding
+        if safety_pass.status == 'expired':
+            status = '❌ Expired'
+        elif safety_pass.status == 'revoked':
+            status = '🚫 Revoked'
+        elif isinstance(days_left, int) and days_left <= 7:
+            days_left = f'⚠️ {days_left}'
+
+        return (safety_pass.pass_id, employee_name, pass_type_name,
                 safety_pass.issue_date, safety_pass.expiry_date,
-                days_left, safety_pass.status.title()
-            ))
-
-            # Color coding
-            if safety_pass.status == 'expired':
-                self.passes_tree.set(item, 'Status', '❌ Expired')
-            elif safety_pass.status == 'revoked':
-                self.passes_tree.set(item, 'Status', '🚫 Revoked')
-            elif isinstance(days_left, int) and days_left <= 7:
-                self.passes_tree.set(item, 'Days Left', f'⚠️ {days_left}')
+                days_left, status)
+
+    # Sorting
+    def make_sortable(self, name, scrollbar):
+        """Sort a table by a column when its heading is clicked, reading more rows as it is scrolled"""
+        tree = getattr(self, f'{name}_tree')
+        self.heading_texts[name] = {}
+        for column in tree['columns']:
+            self.heading_texts[name][column] = tree.heading(column, 'text')
+            tree.heading(column, command=lambda column=column: self.sort_table(name, column))
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # At the bottom of a sorted table with more rows to read
+            if float(last) >= 1.0 and self.sorted_rows.get(name, (0, False))[1]:
+                self.root.after_idle(self.read_more_sorted_rows, name)
+
+        tree.configure(yscrollcommand=on_scroll)
+
+    def sort_table(self, name, column):
+        """Sort a table by a column: ascending, then descending, then back to its own order"""
+        order = self.sort_orders.get(name)
+        if order is None or order[0] != column:
+            order = (column, False)
+        elif not order[1]:
+            order = (column, True)
+        else:
+            order = None
+
+        tree = getattr(self, f'{name}_tree')
+        for heading, text in self.heading_texts[name].items():
+            if order is not None and order[0] == heading:
+                text += ' ▼' if order[1] else ' ▲'
+            tree.heading(heading, text=text)
+        if order is None:
+            self.sort_orders.pop(name, None)
+        else:
+            self.sort_orders[name] = order
+        # A new order starts again from its first page
+        self.sorted_rows.pop(name, None)
+        getattr(self, f'refresh_{name}_data')()
+
+    def sorted_row_filter(self, name):
+        """(matches, keys) limiting a sorted table to the rows its search box and filters show"""
+        if name == 'employees':
+            query = self.employee_search_var.get()
+            if not query.strip():
+                return None, None
+            return None, [emp.employee_id for emp in self.app.manager.search_employees(query, None, False)]
+        # Searches and team filters pick out few passes; sorting those beats walking every pass
+        if self.pass_search_var.get().strip() or self.team_filter() is not None:
+            return self.pass_matches_filters, [p.pass_id for p in self.filtered_pass_candidates()]
+        return self.pass_matches_filters, None
+
+    def read_sorted_rows(self, name, start=0):
+        """Read the rows of a sorted table from its sorted index, up to as many as were read before.
+
+        Rows from position start on are appended to the tree; later rows are
+        read a page at a time as the table is scrolled to the bottom.
+        """
+        entity, key_field, row_values, columns = self.SORTABLE_TABLES[name]
+        column, descending = self.sort_orders[name]
+        count = max(self.sorted_rows.get(name, (SORTED_PAGE_ROWS, True))[0] - start, SORTED_PAGE_ROWS)
+        matches, keys = self.sorted_row_filter(name)
+        records = self.app.manager.get_sorted_page(entity, columns[column], descending, start, count, matches, keys)
+
+        tree = getattr(self, f'{name}_tree')
+        for record in records:
+            tree.insert('', 'end', iid=getattr(record, key_field), values=getattr(self, row_values)(record))
+        self.sorted_rows[name] = (start + count, len(records) == count)
+
+    def read_more_sorted_rows(self, name):
+        """Append the next page of a sorted table scrolled to its bottom"""
+        rows, more = self.sorted_rows.get(name, (0, False))
+        # Several scroll events may have asked; only read while still at the bottom
+        if name in self.sort_orders and more and getattr(self, f'{name}_tree').yview()[1] >= 1.0:
+            self.read_sorted_rows(name, rows)
+
+    # External edit handling
+    def watch_data_files(self):
+        """Poll the CSV files for edits made in Excel or by other processes"""
+        try:
+            changes = self.app.manager.reload_if_changed()
+        except Exception as e:
+            changes = []
+            self.update_status(f"Could not reload data files: {e}")
+
+        if changes:
+            self.apply_pending_changes()
+            self.update_status("Reloaded changes made outside the application")
+            self.warn_edit_conflicts(changes)
+        self.check_validation_report()
+
+        self.root.after(DATA_WATCH_INTERVAL_MS, self.watch_data_files)
+
+    def check_validation_report(self):
+        """Warn about data rows quarantined since the last check"""
+        report = self.app.manager.validation_report
+        problems = report.problems[self.reported_problems:]
+        if not problems:
+            return
+        self.reported_problems += len(problems)
+        self.update_status(f"{len(problems)} invalid data rows quarantined")
+        messagebox.showwarning("Invalid Data Rows",
+                               f"{len(problems)} invalid rows were moved out of the data files into "
+                               f"{', '.join(report.quarantine_files)} in the data folder. "
+                               "Fix them there and import them again.\n\n"
+                               + "\n".join(problems[:20]))
+
+    def warn_edit_conflicts(self, changes):
+        """Warn about rows edited outside the application that also had unsaved changes here"""
+        conflicts = [f"{change.file_name}: {key}" for change in changes for key in change.conflicts]
+        if conflicts:
+            messagebox.showwarning("Edit Conflict",
+                                   "These rows were edited outside the application while they had "
+                                   "unsaved changes here. The edited file version was kept:\n\n"
+                                   + "\n".join(conflicts[:20]))
+
+    # Change feed handling
+    def take_pending_changes(self):
+        """All change events queued since the last call"""
+        events = []
+        while True:
+            try:
+                events.extend(self.change_queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def apply_pending_changes(self):
+        """Update only the rows touched by the changes queued since the last refresh"""
+        events = self.take_pending_changes()
+        if events:
+            self.apply_changes(events)
+
+    @METRICS.timed('gui_apply_changes')
+    def apply_changes(self, events):
+        """Update the rows, counts and filters affected by a list of change events.
+
+        Tabs not shown yet are skipped; they are filled in from the data when they are.
+        """
+        manager = self.app.manager
+        built = self.built_tabs
+        affected_employees = set()
+        refresh_passes = False
+        refresh_filters = False
+        refresh_pass_types = False
+        # Re-read the pass rows without rebuilding the filter lists
+        reread_passes = False
+
+        for event in events:
+            if event.entity == 'employees':
+                affected_employees.add(event.key)
+                # Pass rows show employee names
+                if event.old is None or event.new is None or event.old.name != event.new.name:
+                    refresh_passes = True
+                elif event.old != event.new:
+                    # Their other fields only matter to the search and team filters
+                    refresh_filters = True
+
+            elif event.entity == 'pass_types':
+                # Pass types are few; their names are shown on pass rows
+                refresh_pass_types = refresh_passes = True
+
+            elif event.entity == 'safety_passes':
+                if 'passes' in self.sort_orders:
+                    # A sorted table re-reads the rows it shows, so changed rows move into place
+                    reread_passes = True
+                elif 'passes' in built and not refresh_passes:
+                    self.update_tree_row(self.passes_tree, event.key, manager.safety_passes.get(event.key),
+                                         self.pass_row_values, self.pass_matches_filters)
+                for record in (event.old, event.new):
+                    if record is not None:
+                        affected_employees.add(record.employee_id)
+                if 'pass_types' in built and self.update_issued_count(event.key):
+                    refresh_pass_types = True
+
+        if 'employees' in self.sort_orders and affected_employees:
+            self.refresh_employees_data()
+        elif 'employees' in built:
+            for emp_id in affected_employees:
+                self.update_tree_row(self.employees_tree, emp_id, manager.employees.get(emp_id),
+                                     self.employee_row_values, self.employee_matches_filters)
+        if refresh_pass_types and 'pass_types' in built:
+            self.refresh_pass_types_data(recount=False)
+        if 'passes' in built:
+            if refresh_passes:
+                self.refresh_passes_data()
+                self.update_filter_combos()
+            else:
+                if refresh_filters:
+                    self.update_filter_combos()
+                    if self.pass_search_var.get().strip() or self.team_filter() is not None:
+                        reread_passes = True
+                if reread_passes:
+                    self.refresh_passes_data()
+        if 'dashboard' in built:
+            self.refresh_dashboard_stats()
+
+    def update_issued_count(self, pass_id):
+        """Count a pass under the type it has now; returns whether any per-type count changed.
+
+        Counts follow each pass's current record, so an event applied twice changes nothing.
+        """
+        safety_pass = self.app.manager.safety_passes.get(pass_id)
+        new_type = safety_pass.pass_type_id if safety_pass is not None else None
+        old_type = self.issued_types.get(pass_id)
+        if new_type == old_type:
+            return False
+        if old_type is not None:
+            self.issued_counts[old_type] -= 1
+            del self.issued_types[pass_id]
+        if new_type is not None:
+            self.issued_counts[new_type] = self.issued_counts.get(new_type, 0) + 1
+            self.issued_types[pass_id] = new_type
+        return True
+
+    def update_tree_row(self, tree, iid, record, row_values, matches=None):
+        """Insert, update or delete a single treeview row keyed by record ID"""
+        if record is None or (matches is not None and not matches(record)):
+            if tree.exists(iid):
+                tree.delete(iid)
+        elif tree.exists(iid):
+            tree.item(iid, values=row_values(record))
+        else:
+            tree.insert('', 'end', iid=iid, values=row_values(record))
 
     def update_filter_combos(self):
         """Update the filter combo boxes"""
-        # Update employee filter
-        employee_names = ['All Employees'] + [emp.name for emp in self.app.manager.employees.values()]
-        self.employee_filter['values'] = employee_names
-        if not self.employee_filter.get():
-            self.employee_filter.set('All Employees')
+        # Update team filters from the department and manager views
+        self.department_filter['values'] = ['All Departments'] + self.app.manager.get_team_names('department')
+        if not self.department_filter.get():
+            self.department_filter.set('All Departments')
+        self.manager_filter['values'] = ['All Managers'] + self.app.manager.get_team_names('manager')
+        if not self.manager_filter.get():
+            self.manager_filter.set('All Managers')
 
     def clear_pass_filters(self):
         """Clear all pass filters"""
         self.pass_status_filter.set('All')
-        self.employee_filter.set('All Employees')
-        self.refresh_passes_data()
+        self.department_filter.set('All Departments')
+        self.manager_filter.set('All Managers')
+        # Clearing the search box refreshes the list
+        self.pass_search_var.set('')
 
     # Dialog methods
     def show_add_employee_dialog(self):
@@ -534,7 +1018,7 @@ class SafetyPassGUI:
                 emp_data['employee_id'], emp_data['name'],
                 emp_data['email'], emp_data['department'], emp_data['manager']
             )
-            self.refresh_all_data()
+            self.apply_pending_changes()
             self.update_status(f"Employee '{emp_data['name']}' added successfully")
 
     def edit_selected_employee(self):
@@ -552,7 +1036,7 @@ class SafetyPassGUI:
             if dialog.result:
                 emp_data = dialog.result
                 self.app.manager.update_employee(emp_id, **emp_data)
-                self.refresh_all_data()
+                self.apply_pending_changes()
                 self.update_status(f"Employee '{emp_data['name']}' updated successfully")
 
     def remove_selected_employee(self):
@@ -562,15 +1046,19 @@ class SafetyPassGUI:
             messagebox.showwarning("No Selection", "Please select an employee to remove.")
             return
 
-        emp_id = self.employees_tree.item(selected[0])['values'][0]
+        # Row iids are the employee IDs
+        emp_id = selected[0]
         emp_name = self.employees_tree.item(selected[0])['values'][1]
 
+        pass_count = len(self.app.manager.get_employee_passes(emp_id))
         if messagebox.askyesno("Confirm Removal",
                                f"Are you sure you want to remove employee '{emp_name}'?\n\n"
+                               f"Their {pass_count} active passes will be revoked, and all their passes "
+                               "moved to archived_passes.csv.\n"
                                "This action cannot be undone."):
             self.app.manager.remove_employee(emp_id)
-            self.refresh_all_data()
-            self.update_status(f"Employee '{emp_name}' removed successfully")
+            self.apply_pending_changes()
+            self.update_status(f"Employee '{emp_name}' removed and {pass_count} active passes revoked")
 
     def show_add_pass_type_dialog(self):
         """Show dialog to add new pass type"""
@@ -582,7 +1070,7 @@ class SafetyPassGUI:
                 pt_data['description'], pt_data['category'],
                 pt_data['validity_period_days']
             )
-            self.refresh_all_data()
+            self.apply_pending_changes()
             self.update_status(f"Pass type '{pt_data['name']}' added successfully")
 
     def edit_selected_pass_type(self):
@@ -615,9 +1103,22 @@ class SafetyPassGUI:
                                f"Are you sure you want to remove pass type '{pt_name}'?\n\n"
                                "This action cannot be undone."):
             self.app.manager.remove_pass_type(pt_id)
-            self.refresh_all_data()
+            self.apply_pending_changes()
             self.update_status(f"Pass type '{pt_name}' removed successfully")
 
+    def show_requirements_dialog(self):
+        """Choose the pass types everyone in a department must hold"""
+        if not self.app.manager.pass_types:
+            messagebox.showwarning("No Pass Types", "Please add pass types before setting requirements.")
+            return
+
+        dialog = RequirementsDialog(self.root, self.app.manager)
+        if dialog.result:
+            department, pass_type_ids = dialog.result
+            self.app.manager.set_requirements(department, pass_type_ids)
+            self.update_status(f"{len(pass_type_ids)} pass types required for "
+                               f"{'all employees' if department == '*' else department}")
+
     def show_issue_pass_dialog(self):
         """Show dialog to issue new pass"""
         if not self.app.manager.employees:
@@ -631,19 +1132,56 @@ class SafetyPassGUI:
         dialog = IssuePassDialog(self.root, self.app.manager)
         if dialog.result:
             pass_data = dialog.result
-            # Generate unique pass ID
-            pass_id = f"PASS_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
+            # The manager allocates a unique pass ID
             self.app.manager.issue_safety_pass(
-                pass_id, pass_data['employee_id'],
+                None, pass_data['employee_id'],
                 pass_data['pass_type_id'], pass_data['issue_date']
             )
-            self.refresh_all_data()
+            self.apply_pending_changes()
 
             emp_name = self.app.manager.employees[pass_data['employee_id']].name
             pass_name = self.app.manager.pass_types[pass_data['pass_type_id']].name
             self.update_status(f"Pass '{pass_name}' issued to {emp_name}")
 
+    def renew_selected_passes(self):
+        """Issue a fresh pass of the same type for every selected pass, in one save"""
+        selected = self.passes_tree.selection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select one or more passes to renew.")
+            return
+
+        if messagebox.askyesno("Confirm Renewal",
+                               f"Issue a new pass, starting today, for each of the {len(selected)} "
+                               "selected passes?"):
+            # Row iids are the pass IDs
+            renewed = self.app.manager.renew_passes(list(selected))
+            self.apply_pending_changes()
+            self.update_status(f"Renewed {len(renewed)} passes")
+
+    def show_bulk_issue_dialog(self):
+        """Issue or renew one pass type for a whole department or a manager's team"""
+        if not self.app.manager.employees or not self.app.manager.pass_types:
+            messagebox.showwarning("Missing Data", "Please add employees and pass types before issuing passes.")
+            return
+
+        dialog = BulkIssueDialog(self.root, self.app.manager)
+        if dialog.result:
+            data = dialog.result
+            employee_ids = self.app.manager.find_employees(department=data['department'], manager=data['manager'])
+            pass_name = self.app.manager.pass_types[data['pass_type_id']].name
+            if not employee_ids:
+                messagebox.showinfo("Bulk Issue", "No employees match the selection.")
+                return
+            if not messagebox.askyesno("Confirm Bulk Issue",
+                                       f"{'Renew' if data['renew_only'] else 'Issue'} '{pass_name}' for up to "
+                                       f"{len(employee_ids)} employees?"):
+                return
+
+            issued = self.app.manager.bulk_issue_passes(data['pass_type_id'], employee_ids,
+                                                        data['issue_date'], data['renew_only'])
+            self.apply_pending_changes()
+            self.update_status(f"Issued '{pass_name}' to {len(issued)} employees")
+
     def revoke_selected_pass(self):
         """Revoke the selected pass"""
         selected = self.passes_tree.selection()
@@ -661,144 +1199,85 @@ class SafetyPassGUI:
                                f"Pass Type: {pass_type_name}\n\n"
                                "This action cannot be undone."):
             self.app.manager.revoke_safety_pass(pass_id)
-            self.refresh_all_data()
+            self.apply_pending_changes()
             self.update_status(f"Pass revoked for {employee_name}")
 
+    def show_selected_employee_history(self):
+        """Show the audit log entries for the selected employee"""
+        selected = self.employees_tree.selection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select an employee.")
+            return
+        # Row iids are the employee IDs
+        self.show_history(f"Employee {selected[0]}", self.app.manager.get_employee_history(selected[0]))
+
+    def show_selected_pass_history(self):
+        """Show the audit log entries for the selected pass"""
+        selected = self.passes_tree.selection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select a pass.")
+            return
+        # Row iids are the pass IDs
+        self.show_history(f"Pass {selected[0]}", self.app.manager.get_pass_history(selected[0]))
+
+    def show_history(self, subject, events):
+        """Show audit events in a read-only window"""
+        window = tk.Toplevel(self.root)
+        window.title(f"History - {subject}")
+        window.geometry("760x400")
+        window.transient(self.root)
+
+        text = tk.Text(window, wrap=tk.WORD, font=('Courier', 10))
+        scrollbar = ttk.Scrollbar(window, orient='vertical', command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        text.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        if not events:
+            text.insert('end', f"No recorded events for {subject}.\n")
+        for event in events:
+            details = ", ".join(f"{key}: {value}" for key, value in event.items() if key not in ('at', 'event'))
+            text.insert('end', f"{event['at']}  {event['event'].replace('_', ' ').upper()}\n   {details}\n\n")
+        text.configure(state='disabled')
+        window.bind('<Escape>', lambda e: window.destroy())
+
     # Report methods
     def show_expiring_passes_report(self):
         """Show report of expiring passes"""
-        expiring_passes = self.app.manager.get_expiring_passes(15)
-
-        report = "PASSES EXPIRING IN NEXT 15 DAYS\n"
-        report += "=" * 50 + "\n\n"
-
-        if not expiring_passes:
-            report += "✅ No passes expiring in the next 15 days.\n"
-        else:
-            for safety_pass in sorted(expiring_passes, key=lambda p: p.days_until_expiry()):
-                employee = self.app.manager.employees.get(safety_pass.employee_id)
-                pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
-                days_left = safety_pass.days_until_expiry()
-
-                urgency = "🔴 URGENT" if days_left <= 3 else "🟡 WARNING" if days_left <= 7 else "🟢 NOTICE"
-
-                report += f"{urgency} - {employee.name if employee else 'Unknown'}\n"
-                report += f"   Pass: {pass_type.name if pass_type else 'Unknown'}\n"
-                report += f"   Expires: {safety_pass.expiry_date} ({days_left} days)\n"
-                report += f"   Email: {employee.email if employee else 'Unknown'}\n\n"
-
-        self.display_report(report)
+        self.show_report('expiring')
 
     def show_expired_passes_report(self):
         """Show report of expired passes"""
-        expired_passes = [p for p in self.app.manager.safety_passes.values() if p.status == 'expired']
-
-        report = "EXPIRED PASSES REPORT\n"
-        report += "=" * 30 + "\n\n"
-
-        if not expired_passes:
-            report += "✅ No expired passes found.\n"
-        else:
-            for safety_pass in expired_passes:
-                employee = self.app.manager.employees.get(safety_pass.employee_id)
-                pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
-
-                report += f"❌ {employee.name if employee else 'Unknown'}\n"
-                report += f"   Pass: {pass_type.name if pass_type else 'Unknown'}\n"
-                report += f"   Expired: {safety_pass.expiry_date}\n"
-                report += f"   Email: {employee.email if employee else 'Unknown'}\n\n"
-
-        self.display_report(report)
+        self.show_report('expired')
 
     def show_active_passes_report(self):
         """Show report of active passes"""
-        active_passes = [p for p in self.app.manager.safety_passes.values() if p.status == 'active']
-
-        report = "ACTIVE PASSES REPORT\n"
-        report += "=" * 25 + "\n\n"
-
-        if not active_passes:
-            report += "No active passes found.\n"
-        else:
-            for safety_pass in active_passes:
-                employee = self.app.manager.employees.get(safety_pass.employee_id)
-                pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
-                days_left = safety_pass.days_until_expiry()
-
-                status_icon = "🔴" if days_left <= 7 else "🟢"
-
-                report += f"{status_icon} {employee.name if employee else 'Unknown'}\n"
-                report += f"   Pass: {pass_type.name if pass_type else 'Unknown'}\n"
-                report += f"   Expires: {safety_pass.expiry_date} ({days_left} days)\n\n"
-
-        self.display_report(report)
+        self.show_report('active')
 
     def show_employee_summary_report(self):
         """Show employee summary report"""
-        report = "EMPLOYEE SUMMARY REPORT\n"
-        report += "=" * 30 + "\n\n"
-
-        for employee in self.app.manager.employees.values():
-            passes = self.app.manager.get_employee_passes(employee.employee_id)
-
-            report += f"👤 {employee.name} ({employee.employee_id})\n"
-            report += f"   Department: {employee.department}\n"
-            report += f"   Manager: {employee.manager}\n"
-            report += f"   Email: {employee.email}\n"
-            report += f"   Active Passes: {len(passes)}\n"
-
-            if passes:
-                for safety_pass in passes:
-                    pass_type = self.app.manager.pass_types.get(safety_pass.pass_type_id)
-                    days_left = safety_pass.days_until_expiry()
-                    report += f"     • {pass_type.name if pass_type else 'Unknown'} (expires in {days_left} days)\n"
-            else:
-                report += "     • No active passes\n"
-
-            report += "\n"
-
-        self.display_report(report)
+        self.show_report('employees')
 
     def show_system_stats_report(self):
         """Show system statistics report"""
-        total_employees = len(self.app.manager.employees)
-        total_pass_types = len(self.app.manager.pass_types)
-        total_passes = len(self.app.manager.safety_passes)
-        active_passes = len([p for p in self.app.manager.safety_passes.values() if p.status == 'active'])
-        expired_passes = len([p for p in self.app.manager.safety_passes.values() if p.status == 'expired'])
-        revoked_passes = len([p for p in self.app.manager.safety_passes.values() if p.status == 'revoked'])
-        expiring_soon = len(self.app.manager.get_expiring_passes(15))
-
-        report = "SYSTEM STATISTICS REPORT\n"
-        report += "=" * 30 + "\n\n"
-
-        report += f"📊 OVERVIEW\n"
-        report += f"   Total Employees: {total_employees}\n"
-        report += f"   Total Pass Types: {total_pass_types}\n"
-        report += f"   Total Passes Issued: {total_passes}\n\n"
-
-        report += f"🎫 PASS STATUS\n"
-        report += f"   Active Passes: {active_passes}\n"
-        report += f"   Expired Passes: {expired_passes}\n"
-        report += f"   Revoked Passes: {revoked_passes}\n"
-        report += f"   Expiring Soon (15 days): {expiring_soon}\n\n"
-
-        if total_passes > 0:
-            active_percent = (active_passes / total_passes) * 100
-            expired_percent = (expired_passes / total_passes) * 100
-
-            report += f"📈 PERCENTAGES\n"
-            report += f"   Active: {active_percent:.1f}%\n"
-            report += f"   Expired: {expired_percent:.1f}%\n\n"
-
-        # Pass type usage
-        report += f"🏷️ PASS TYPE USAGE\n"
-        for pass_type in self.app.manager.pass_types.values():
-            count = len([p for p in self.app.manager.safety_passes.values()
-                         if p.pass_type_id == pass_type.pass_type_id])
-            report += f"   {pass_type.name}: {count} issued\n"
+        self.show_report('stats')
 
-        self.display_report(report)
+    def show_renewal_forecast_report(self):
+        """Show renewals due per week, by pass type and department"""
+        self.show_report('forecast')
+
+    def show_compliance_gaps_report(self):
+        """Show required passes that are missing, expired or expiring within 30 days"""
+        self.show_report('compliance')
+
+    def show_department_summary_report(self):
+        """Show members, active and expiring passes for every department"""
+        self.show_report('departments')
+
+    def show_report(self, name):
+        """Build a report from the engine and render it incrementally"""
+        self.display_report(self.report_engine.build(name))
+        self.current_report = name
 
     def show_notification_log(self):
         """Show notification log (placeholder)"""
@@ -813,14 +1292,59 @@ class SafetyPassGUI:
 
         self.display_report(report)
 
-    def display_report(self, report_text):
-        """Display report in the text widget"""
+    def display_report(self, report):
+        """Display a report (or plain text) in the text widget.
+
+        Reports are inserted REPORT_CHUNK_ROWS rows at a time from the event
+        loop, so large reports appear straight away and the window stays
+        responsive while the rest is rendered.
+        """
+        if self.report_render_job is not None:
+            self.root.after_cancel(self.report_render_job)
+            self.report_render_job = None
         self.report_text.delete(1.0, tk.END)
-        self.report_text.insert(1.0, report_text)
+        self.current_report = None
+
+        if isinstance(report, str):
+            self.report_text.insert(1.0, report)
+        else:
+            self.render_report_chunk(iter_report_text(report))
 
         # Scroll to top
         self.report_text.see(1.0)
 
+    def render_report_chunk(self, blocks):
+        """Insert the next chunk of report text, then schedule the one after it"""
+        chunk = list(itertools.islice(blocks, REPORT_CHUNK_ROWS))
+        if chunk:
+            self.report_text.insert(tk.END, "".join(chunk))
+        if len(chunk) == REPORT_CHUNK_ROWS:
+            self.report_render_job = self.root.after(1, self.render_report_chunk, blocks)
+        else:
+            self.report_render_job = None
+
+    def export_current_report(self):
+        """Write the report shown in the Reports tab to a text, CSV or HTML file"""
+        if self.current_report is None:
+            messagebox.showwarning("No Report", "Please generate a report to export first.")
+            return
+
+        path = filedialog.asksaveasfilename(
+            title="Export Report", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("HTML files", "*.html"), ("Text files", "*.txt")])
+        if not path:
+            return
+
+        fmt = {'.csv': 'csv', '.html': 'html', '.htm': 'html'}.get(os.path.splitext(path)[1].lower(), 'text')
+        try:
+            # Rebuilt rather than reused: a report's rows can only be streamed once
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                write_report(self.report_engine.build(self.current_report), f, fmt)
+        except OSError as e:
+            messagebox.showerror("Export Failed", f"Could not write the report:\n{e}")
+            return
+        self.update_status(f"Report exported to {path}")
+
     # Menu action methods
     def setup_sample_data(self):
         """Setup sample data for testing"""
@@ -851,7 +1375,7 @@ class SafetyPassGUI:
             self.app.manager.issue_safety_pass("PASS003", "EMP002", "HOT_WORK")
             self.app.manager.issue_safety_pass("PASS004", "EMP003", "ELECTRICAL")
 
-            self.refresh_all_data()
+            self.apply_pending_changes()
             self.update_status("Sample data created successfully!")
             messagebox.showinfo("Success", "Sample data has been created successfully!")
 
@@ -905,10 +1429,10 @@ class SafetyPassGUI:
 
     def show_email_settings(self):
         """Show email configuration dialog"""
+        global EMAIL_CONFIG
         dialog = EmailSettingsDialog(self.root, EMAIL_CONFIG)
         if dialog.result:
             # Update email configuration
-            global EMAIL_CONFIG
             EMAIL_CONFIG = dialog.result
             self.app.email_system = EmailNotificationSystem(**EMAIL_CONFIG)
             self.update_status("Email settings updated")
@@ -933,6 +1457,60 @@ Features:
 
         messagebox.showinfo("About", about_text)
 
+    def show_diagnostics(self):
+        """Show how long each operation has taken and how often, as written to the metrics file"""
+        window = tk.Toplevel(self.root)
+        window.title("Diagnostics")
+        window.geometry("760x520")
+        window.transient(self.root)
+
+        ttk.Label(window, text="Operation Timings", style='Heading.TLabel').pack(anchor='w', padx=10, pady=(10, 0))
+        columns = ('Operation', 'Count', 'Mean (ms)', 'p95 (ms)', 'Max (ms)', 'Errors')
+        operations_tree = ttk.Treeview(window, columns=columns, show='headings', height=12)
+        for col in columns:
+            operations_tree.heading(col, text=col)
+            if col == 'Operation':
+                operations_tree.column(col, width=220)
+            else:
+                operations_tree.column(col, width=90, anchor='e')
+        operations_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        ttk.Label(window, text="Events", style='Heading.TLabel').pack(anchor='w', padx=10)
+        events_tree = ttk.Treeview(window, columns=('Event', 'Count'), show='headings', height=6)
+        events_tree.heading('Event', text='Event')
+        events_tree.heading('Count', text='Count')
+        events_tree.column('Count', anchor='e')
+        events_tree.pack(fill='x', padx=10, pady=5)
+
+        def fill():
+            counters, operations = METRICS.snapshot()
+            operations_tree.delete(*operations_tree.get_children())
+            for stats in operations:
+                operations_tree.insert('', 'end', values=(
+                    stats.operation, stats.count, f"{stats.mean_seconds * 1000:.1f}",
+                    f"{stats.quantile(0.95) * 1000:.1f}", f"{stats.max_seconds * 1000:.1f}", stats.errors))
+            events_tree.delete(*events_tree.get_children())
+            for name, value in counters.items():
+                events_tree.insert('', 'end', values=(name.replace('_', ' '), value))
+
+        def export():
+            try:
+                self.app.manager.export_metrics()
+            except OSError as e:
+                messagebox.showerror("Export Failed", f"Could not write the metrics file:\n{e}", parent=window)
+                return
+            messagebox.showinfo("Metrics Exported", f"Metrics written to:\n{self.app.manager.metrics_file}",
+                                parent=window)
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill='x', padx=10, pady=10)
+        ttk.Button(button_frame, text="Close", command=window.destroy).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="Export Now", command=export).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="Refresh", command=fill).pack(side='right', padx=5)
+
+        fill()
+        window.bind('<Escape>', lambda e: window.destroy())
+
 
 # Dialog classes
 class EmployeeDialog:
@@ -1138,7 +1716,7 @@ class IssuePassDialog:
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Issue New Safety Pass")
-        self.dialog.geometry("400x250")
+        self.dialog.geometry("400x270")
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -1152,16 +1730,17 @@ class IssuePassDialog:
 
         row = 0
 
-        # Employee selection
+        # Employee selection: type to search, then pick from the matches
         ttk.Label(main_frame, text="Employee:").grid(row=row, column=0, sticky='w', pady=5)
-        employee_options = [f"{emp.name} ({emp.employee_id})" for emp in manager.employees.values()]
-        self.employee_combo = ttk.Combobox(main_frame, width=35, values=employee_options, state='readonly')
+        self.employee_combo = ttk.Combobox(main_frame, width=35, values=self.employee_options(
+            manager.get_all_employees()[:EMPLOYEE_PICKER_RESULTS]))
         self.employee_combo.grid(row=row, column=1, pady=5, padx=(10, 0))
+        self.employee_combo.bind('<KeyRelease>', self.search_employees)
         row += 1
 
         # Pass type selection
         ttk.Label(main_frame, text="Pass Type:").grid(row=row, column=0, sticky='w', pady=5)
-        pass_type_options = [f"{pt.name} ({pt.category})" for pt in manager.pass_types.values()]
+        pass_type_options = [f"{pt.name} ({pt.category})" for pt in manager.get_all_pass_types()]
         self.pass_type_combo = ttk.Combobox(main_frame, width=35, values=pass_type_options, state='readonly')
         self.pass_type_combo.grid(row=row, column=1, pady=5, padx=(10, 0))
         row += 1
@@ -1174,7 +1753,8 @@ class IssuePassDialog:
         row += 1
 
         # Help text
-        help_label = ttk.Label(main_frame, text="Issue date format: YYYY-MM-DD", font=('Arial', 8))
+        help_label = ttk.Label(main_frame, text="Type a name, ID or email to find an employee\n"
+                                                "Issue date format: YYYY-MM-DD", font=('Arial', 8))
         help_label.grid(row=row, column=1, sticky='w', padx=(10, 0))
         row += 1
 
@@ -1194,6 +1774,21 @@ class IssuePassDialog:
         # Wait for dialog to close
         self.dialog.wait_window()
 
+    @staticmethod
+    def employee_options(employees):
+        return [f"{emp.name} ({emp.employee_id})" for emp in employees]
+
+    def search_employees(self, event):
+        """Offer the employees matching what has been typed so far"""
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        query = self.employee_combo.get()
+        if query.strip():
+            employees = self.manager.search_employees(query, EMPLOYEE_PICKER_RESULTS)
+        else:
+            employees = self.manager.get_all_employees()[:EMPLOYEE_PICKER_RESULTS]
+        self.employee_combo['values'] = self.employee_options(employees)
+
     def issue_pass(self):
         # Validate selections
         employee_selection = self.employee_combo.get()
@@ -1209,11 +1804,15 @@ class IssuePassDialog:
             return
 
         # Extract IDs from selections
-        employee_id = employee_selection.split('(')[-1].rstrip(')')
+        employee_id = employee_selection.split('(')[-1].rstrip(')').strip()
+        if employee_id not in self.manager.employees:
+            messagebox.showerror("Validation Error", "Please select an employee from the search results")
+            self.employee_combo.focus()
+            return
         pass_type_id = None
 
         # Find pass type ID
-        for pt in self.manager.pass_types.values():
+        for pt in self.manager.get_all_pass_types():
             if f"{pt.name} ({pt.category})" == pass_type_selection:
                 pass_type_id = pt.pass_type_id
                 break
@@ -1237,6 +1836,186 @@ class IssuePassDialog:
         self.dialog.destroy()
 
 
+class BulkIssueDialog:
+    def __init__(self, parent, manager):
+        self.result = None
+        self.manager = manager
+
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Bulk Issue / Renew Passes")
+        self.dialog.geometry("420x300")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 100, parent.winfo_rooty() + 100))
+
+        # Create form
+        main_frame = ttk.Frame(self.dialog, padding=20)
+        main_frame.pack(fill='both', expand=True)
+
+        row = 0
+
+        # Pass type selection
+        ttk.Label(main_frame, text="Pass Type:").grid(row=row, column=0, sticky='w', pady=5)
+        self.pass_types = {f"{pt.name} ({pt.category})": pt.pass_type_id for pt in manager.get_all_pass_types()}
+        self.pass_type_combo = ttk.Combobox(main_frame, width=35, values=list(self.pass_types), state='readonly')
+        self.pass_type_combo.grid(row=row, column=1, pady=5, padx=(10, 0))
+        row += 1
+
+        # Employee selection
+        employees = manager.get_all_employees()
+        ttk.Label(main_frame, text="Department:").grid(row=row, column=0, sticky='w', pady=5)
+        self.department_combo = ttk.Combobox(main_frame, width=35, state='readonly',
+                                             values=['Any'] + sorted({emp.department for emp in employees}))
+        self.department_combo.set('Any')
+        self.department_combo.grid(row=row, column=1, pady=5, padx=(10, 0))
+        row += 1
+
+        ttk.Label(main_frame, text="Manager:").grid(row=row, column=0, sticky='w', pady=5)
+        self.manager_combo = ttk.Combobox(main_frame, width=35, state='readonly',
+                                          values=['Any'] + sorted({emp.manager for emp in employees}))
+        self.manager_combo.set('Any')
+        self.manager_combo.grid(row=row, column=1, pady=5, padx=(10, 0))
+        row += 1
+
+        # Issue date
+        ttk.Label(main_frame, text="Issue Date:").grid(row=row, column=0, sticky='w', pady=5)
+        self.date_entry = ttk.Entry(main_frame, width=30)
+        self.date_entry.insert(0, datetime.now().strftime('%Y-%m-%d'))
+        self.date_entry.grid(row=row, column=1, pady=5, padx=(10, 0))
+        row += 1
+
+        # Renewal only
+        self.renew_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Only renew for employees who already hold this pass type",
+                        variable=self.renew_only).grid(row=row, column=0, columnspan=2, sticky='w', pady=5)
+        row += 1
+
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=row, column=0, columnspan=2, pady=20)
+
+        ttk.Button(button_frame, text="Issue Passes", command=self.issue_passes).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side='right')
+
+        self.pass_type_combo.focus()
+        self.dialog.bind('<Escape>', lambda e: self.cancel())
+
+        self.dialog.wait_window()
+
+    def issue_passes(self):
+        pass_type_selection = self.pass_type_combo.get()
+        issue_date = self.date_entry.get().strip()
+
+        if not pass_type_selection:
+            messagebox.showerror("Validation Error", "Please select a pass type")
+            return
+
+        # Validate date format
+        try:
+            datetime.strptime(issue_date, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Validation Error", "Please enter date in YYYY-MM-DD format")
+            self.date_entry.focus()
+            return
+
+        department = self.department_combo.get()
+        manager = self.manager_combo.get()
+        self.result = {
+            'pass_type_id': self.pass_types[pass_type_selection],
+            'department': None if department == 'Any' else department,
+            'manager': None if manager == 'Any' else manager,
+            'issue_date': issue_date,
+            'renew_only': self.renew_only.get()
+        }
+        self.dialog.destroy()
+
+    def cancel(self):
+        self.dialog.destroy()
+
+
+class RequirementsDialog:
+    EVERYONE = 'Everyone (*)'
+
+    def __init__(self, parent, manager):
+        self.result = None
+        self.manager = manager
+
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Department Requirements")
+        self.dialog.geometry("420x380")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 100, parent.winfo_rooty() + 100))
+
+        # Create form
+        main_frame = ttk.Frame(self.dialog, padding=20)
+        main_frame.pack(fill='both', expand=True)
+
+        # Department selection
+        ttk.Label(main_frame, text="Department:").grid(row=0, column=0, sticky='w', pady=5)
+        departments = {emp.department for emp in manager.get_all_employees()} | set(manager.requirements) - {'*'}
+        self.department_combo = ttk.Combobox(main_frame, width=35, values=[self.EVERYONE] + sorted(departments))
+        self.department_combo.set(self.EVERYONE)
+        self.department_combo.grid(row=0, column=1, pady=5, padx=(10, 0))
+        self.department_combo.bind('<<ComboboxSelected>>', lambda e: self.show_current())
+
+        # Required pass types
+        ttk.Label(main_frame, text="Required passes:").grid(row=1, column=0, sticky='nw', pady=5)
+        self.pass_type_ids = [pt.pass_type_id for pt in manager.get_all_pass_types()]
+        self.pass_type_list = tk.Listbox(main_frame, selectmode='multiple', height=12, width=38,
+                                         exportselection=False)
+        for pass_type_id in self.pass_type_ids:
+            pass_type = manager.pass_types[pass_type_id]
+            self.pass_type_list.insert('end', f"{pass_type.name} ({pass_type.category})")
+        self.pass_type_list.grid(row=1, column=1, pady=5, padx=(10, 0))
+
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, columnspan=2, pady=20)
+
+        ttk.Button(button_frame, text="Save", command=self.save).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side='right')
+
+        self.show_current()
+        self.department_combo.focus()
+        self.dialog.bind('<Escape>', lambda e: self.cancel())
+
+        self.dialog.wait_window()
+
+    def department(self):
+        department = self.department_combo.get().strip()
+        return '*' if department == self.EVERYONE else department
+
+    def show_current(self):
+        """Select the pass types the chosen department already requires"""
+        requirement = self.manager.requirements.get(self.department())
+        required = set(requirement.pass_type_ids) if requirement else set()
+        self.pass_type_list.selection_clear(0, 'end')
+        for index, pass_type_id in enumerate(self.pass_type_ids):
+            if pass_type_id in required:
+                self.pass_type_list.selection_set(index)
+
+    def save(self):
+        department = self.department()
+        if not department:
+            messagebox.showerror("Validation Error", "Please enter a department")
+            return
+
+        self.result = (department, [self.pass_type_ids[index] for index in self.pass_type_list.curselection()])
+        self.dialog.destroy()
+
+    def cancel(self):
+        self.dialog.destroy()
+
+
 class TestEmailDialog:
     def __init__(self, parent):
         self.result = None
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Safety Pass Management System - HTTP/JSON Service
+Run this file to expose the system to turnstiles, kiosks and HR integrations
+
+Endpoints (all JSON):
+  GET  /clearance?employee_id=..&pass_type_id=..[&date=YYYY-MM-DD]
+  POST /clearance            {"checks": [{"employee_id", "pass_type_id", "date"?}, ...]}
+  GET  /cleared?pass_type_id=..&date=YYYY-MM-DD   (who held a valid pass of the type on that date)
+  GET  /passes/<pass_id>
+  GET  /employees/<employee_id>/passes
+  POST /passes               {"passes": [{"employee_id", "pass_type_id", "pass_id"?, "issue_date"?}, ...]}
+  POST /passes/revoke        {"pass_ids": [...]}
+  GET  /stats
+
+POST bodies may also be a single object instead of a batch. Batches are
+applied in one transaction and saved once. GET responses carry an ETag
+derived from the data version, so clients can revalidate with If-None-Match.
+Request timings are written to metrics.prom in the data folder every minute.
+"""
+
+import argparse
+import json
+import re
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from safety_pass_system import METRICS, SafetyPassManager
+
+
+class RequestError(Exception):
+    """A client error reported back as a JSON error response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SafetyPassRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests from the same client
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SafetyPassService/1.0'
+    # Headers and body are written separately; without this, Nagle's algorithm
+    # delays every keep-alive response by the peer's delayed-ACK timeout
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        ('GET', re.compile(r'^/clearance$'), 'get_clearance'),
+        ('POST', re.compile(r'^/clearance$'), 'post_clearance'),
+        ('GET', re.compile(r'^/cleared$'), 'get_cleared'),
+        ('GET', re.compile(r'^/passes/(?P<pass_id>[^/]+)$'), 'get_pass'),
+        ('GET', re.compile(r'^/employees/(?P<employee_id>[^/]+)/passes$'), 'get_employee_passes'),
+        ('POST', re.compile(r'^/passes/revoke$'), 'post_revoke'),
+        ('POST', re.compile(r'^/passes$'), 'post_passes'),
+        ('GET', re.compile(r'^/stats$'), 'get_stats'),
+    ]
+
+    @property
+    def manager(self) -> SafetyPassManager:
+        return self.server.manager
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        """Route the request and write the JSON response"""
+        url = urlsplit(self.path)
+        try:
+            for route_method, pattern, handler_name in self.ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    break
+            else:
+                raise RequestError(404, f"No route for {method} {url.path}")
+
+            # Clearance checks are too quick to time one by one; each request is timed instead
+            with METRICS.timed(f'http_{handler_name}'):
+                # Writes by other processes or editors are picked up first, moving the data version on
+                self.manager.reload_if_changed()
+                if method == 'GET':
+                    # The data version also changes at midnight, when clearance answers do
+                    etag = f'"{self.manager.data_version}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        self.send_json(304, None, etag)
+                        return
+                    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    result = getattr(self, handler_name)(query, **match.groupdict())
+                    self.send_json(200, result, etag)
+                else:
+                    result = getattr(self, handler_name)(self.read_json_body(), **match.groupdict())
+                    self.send_json(200, result)
+
+        except RequestError as e:
+            self.send_json(e.status, {'error': e.message})
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+
+    def read_json_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise RequestError(400, "Request body is not valid JSON")
+
+    def send_json(self, status, payload, etag=None):
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if payload is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @staticmethod
+    def batch_items(body, key):
+        """The list of items in a batch body, or a single-item list for a plain object"""
+        items = body.get(key, [body]) if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            raise RequestError(400, f"Expected a list in '{key}'")
+        return items
+
+    @staticmethod
+    def require(item, *fields):
+        if not isinstance(item, dict):
+            raise RequestError(400, "Expected an object")
+        missing = [name for name in fields if not item.get(name)]
+        if missing:
+            raise RequestError(400, f"Missing field(s): {', '.join(missing)}")
+
+    @staticmethod
+    def require_date(value):
+        """A YYYY-MM-DD date parameter, defaulting to today"""
+        on_date = value or date.today().isoformat()
+        try:
+            if len(on_date) != 10:
+                raise ValueError
+            date.fromisoformat(on_date)
+        except (TypeError, ValueError):
+            raise RequestError(400, f"'{on_date}' is not a YYYY-MM-DD date")
+        return on_date
+
+    # Handlers
+    def check_clearance(self, item):
+        self.require(item, 'employee_id', 'pass_type_id')
+        on_date = self.require_date(item.get('date'))
+        return {
+            'employee_id': item['employee_id'],
+            'pass_type_id': item['pass_type_id'],
+            'date': on_date,
+            'cleared': self.manager.is_cleared(item['employee_id'], item['pass_type_id'], on_date),
+        }
+
+    def get_clearance(self, query):
+        return self.check_clearance(query)
+
+    def post_clearance(self, body):
+        return {'results': [self.check_clearance(item) for item in self.batch_items(body, 'checks')]}
+
+    def get_cleared(self, query):
+        self.require(query, 'pass_type_id')
+        on_date = self.require_date(query.get('date'))
+        if query['pass_type_id'] not in self.manager.pass_types:
+            raise RequestError(404, f"Pass type '{query['pass_type_id']}' not found")
+        employee_ids = self.manager.get_cleared_employees(query['pass_type_id'], on_date)
+        return {'pass_type_id': query['pass_type_id'], 'date': on_date, 'employee_ids': employee_ids}
+
+    def get_pass(self, query, pass_id):
+        safety_pass = self.manager.safety_passes.get(pass_id)
+        if safety_pass is None:
+            raise RequestError(404, f"Safety pass '{pass_id}' not found")
+        return safety_pass.to_dict()
+
+    def get_employee_passes(self, query, employee_id):
+        if employee_id not in self.manager.employees:
+            raise RequestError(404, f"Employee '{employee_id}' not found")
+        return {'passes': [p.to_dict() for p in self.manager.get_employee_passes(employee_id)]}
+
+    def post_passes(self, body):
+        items = self.batch_items(body, 'passes')
+        # The whole batch is checked before anything is issued, so a bad item fails it cleanly
+        for number, item in enumerate(items, 1):
+            try:
+                self.require(item, 'employee_id', 'pass_type_id')
+                if item.get('pass_id') is not None and not isinstance(item['pass_id'], str):
+                    raise RequestError(400, "pass_id must be a string")
+                if item.get('issue_date'):
+                    self.require_date(item['issue_date'])
+            except RequestError as e:
+                raise RequestError(400, f"Item {number}: {e.message}")
+
+        results = []
+        # One transaction: the passes file is written once for the whole batch
+        with self.manager.write_locked():
+            for item in items:
+                if item.get('pass_id') in self.manager.safety_passes:
+                    # Also catches an ID repeated within the batch
+                    results.append({'pass_id': item['pass_id'], 'issued': False,
+                                    'error': f"Pass ID '{item['pass_id']}' is already in use"})
+                    continue
+                safety_pass = self.manager.issue_safety_pass(item.get('pass_id'), item['employee_id'],
+                                                             item['pass_type_id'], item.get('issue_date'))
+                if safety_pass is None:
+                    results.append({'pass_id': item.get('pass_id'), 'issued': False,
+                                    'error': "Unknown employee or pass type"})
+                else:
+                    results.append(dict(safety_pass.to_dict(), issued=True))
+        return {'results': results}
+
+    def post_revoke(self, body):
+        pass_ids = body.get('pass_ids') if isinstance(body, dict) and 'pass_ids' in body else None
+        if pass_ids is None:
+            items = self.batch_items(body, 'passes')
+            for item in items:
+                self.require(item, 'pass_id')
+            pass_ids = [item['pass_id'] for item in items]
+        if not isinstance(pass_ids, list) or not all(pass_id and isinstance(pass_id, str) for pass_id in pass_ids):
+            raise RequestError(400, "Expected 'pass_ids' as a list of pass IDs")
+
+        with self.manager.write_locked():
+            results = [{'pass_id': pass_id, 'revoked': self.manager.revoke_safety_pass(pass_id)}
+                       for pass_id in pass_ids]
+        return {'results': results}
+
+    def get_stats(self, query):
+        return dict(self.manager.get_statistics(), data_version=self.manager.data_version)
+
+
+class SafetyPassServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, manager: SafetyPassManager, verbose: bool = False):
+        super().__init__(address, SafetyPassRequestHandler)
+        # Results go back in the responses, not as messages on the service's console
+        manager.quiet = True
+        self.manager = manager
+        self.verbose = verbose
+
+
+def main():
+    """Start the service in the foreground"""
+    parser = argparse.ArgumentParser(description="Safety Pass Management System HTTP/JSON service")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-folder', default='safety_pass_data')
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    manager = SafetyPassManager(args.data_folder)
+    server = SafetyPassServer((args.host, args.port), manager, args.verbose)
+    print(f"Safety Pass service listening on http://{args.host}:{server.server_port}")
+    print(f"Metrics are written to {manager.metrics_file}")
+    print("Press Ctrl+C to stop.")
+    manager.start_metrics_export()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nService stopped.")
+    finally:
+        server.server_close()
+        manager.stop_metrics_export()
+
+
+if __name__ == "__main__":
+    main()
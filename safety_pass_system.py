@@ -1,13 +1,24 @@
+import bisect
 import csv
+import html
+import json
 import os
-import smtplib
-import schedule
+import queue
+import re
+import tempfile
+import threading
 import time
-from datetime import datetime, timedelta
-import email.mime.text
-import email.mime.multipart
-from typing import List, Dict
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from dataclasses import dataclass, asdict, field, replace
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 # Data Classes
@@ -22,6 +33,10 @@ class Employee:
     def to_dict(self):
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, row: Dict[str, str]) -> 'Employee':
+        return cls(**row)
+
 
 @dataclass
 class SafetyPassType:
@@ -34,6 +49,10 @@ class SafetyPassType:
     def to_dict(self):
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, row: Dict[str, str]) -> 'SafetyPassType':
+        return cls(**dict(row, validity_period_days=int(row['validity_period_days'])))
+
 
 @dataclass
 class SafetyPass:
@@ -43,35 +62,1645 @@ class SafetyPass:
     issue_date: str
     expiry_date: str
     status: str  # 'active', 'expired', 'revoked'
+    revoked_at: str = ''  # 'YYYY-MM-DD HH:MM:SS' when revoked; empty for passes revoked before this was kept
 
     def to_dict(self):
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, row: Dict[str, str]) -> 'SafetyPass':
+        return cls(**row)
+
+    def validity_span(self):
+        """(first, last) day the pass was valid, as YYYY-MM-DD, or None if it never was.
+
+        A revoked pass stops being valid the day it was revoked. One revoked
+        without a recorded time is treated as never valid, as is_cleared does.
+        """
+        last = self.expiry_date
+        if self.status == 'revoked':
+            if not self.revoked_at:
+                return None
+            last = min(last, (date.fromisoformat(self.revoked_at[:10]) - timedelta(days=1)).isoformat())
+        if last < self.issue_date:
+            return None
+        return self.issue_date, last
+
     def days_until_expiry(self) -> int:
         """Calculate days until expiry"""
-        expiry = datetime.strptime(self.expiry_date, '%Y-%m-%d')
+        expiry = datetime.fromisoformat(self.expiry_date)
         today = datetime.now()
         return (expiry - today).days
 
 
+@dataclass
+class PassRequirement:
+    department: str  # a department name, or '*' for every employee
+    pass_type_ids: List[str]
+
+    def to_dict(self):
+        return {'department': self.department, 'pass_type_ids': ';'.join(self.pass_type_ids)}
+
+    @classmethod
+    def from_dict(cls, row: Dict[str, str]) -> 'PassRequirement':
+        pass_type_ids = [pass_type_id.strip() for pass_type_id in row['pass_type_ids'].split(';')]
+        return cls(row['department'], [pass_type_id for pass_type_id in pass_type_ids if pass_type_id])
+
+
+@dataclass
+class ComplianceGap:
+    """A required pass type an employee does not hold a current pass for"""
+    employee_id: str
+    pass_type_id: str
+    status: str  # 'missing', 'expired' or 'expiring'
+    expiry_date: str = ''  # of the latest pass held, if any
+
+
+@dataclass
+class DataFileChanges:
+    """Rows of one data file that changed on disk since the manager last synced it"""
+    file_name: str
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # Keys that were also changed in memory and not yet saved; the on-disk row wins
+    conflicts: List[str] = field(default_factory=list)
+    # In-memory record as it was before the change, for updated and removed keys
+    previous: Dict[str, object] = field(default_factory=dict)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.updated or self.removed)
+
+
+@dataclass
+class TeamSummary:
+    """Headline figures for one department or one manager's team"""
+    name: str
+    members: int
+    active_passes: int
+    expiring_passes: int  # active passes expiring within the requested number of days
+
+
+@dataclass
+class ChangeEvent:
+    """One record added, changed or removed, as published by SafetyPassManager.change_feed"""
+    entity: str  # 'employees', 'pass_types', 'safety_passes' or 'requirements'
+    key: str
+    old: Optional[object]  # the record before the change; None if it was added
+    new: Optional[object]  # the record after the change; None if it was removed
+
+    @property
+    def kind(self) -> str:
+        if self.old is None:
+            return 'added'
+        return 'removed' if self.new is None else 'updated'
+
+
+@dataclass
+class ImportSummary:
+    """Outcome of a bulk import"""
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def __str__(self):
+        return (f"{self.inserted} inserted, {self.updated} updated, {self.deleted} deleted, "
+                f"{self.unchanged} unchanged, {len(self.errors)} errors")
+
+
+@dataclass
+class OffboardingSummary:
+    """Outcome of offboarding one or more employees"""
+    employees_removed: int = 0
+    passes_revoked: int = 0
+    passes_archived: int = 0
+    not_found: List[str] = field(default_factory=list)
+
+    def __str__(self):
+        return (f"{self.employees_removed} employees removed, {self.passes_revoked} passes revoked, "
+                f"{self.passes_archived} passes archived, {len(self.not_found)} not found")
+
+
+@dataclass
+class ValidationReport:
+    """Rows set aside by the referential-integrity check run when data files are read"""
+    # One line per quarantined row: file, line number and reason
+    problems: List[str] = field(default_factory=list)
+    # Side files the rows were moved to
+    quarantine_files: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.problems
+
+    def __str__(self):
+        if not self.problems:
+            return "All data rows are valid"
+        return (f"{len(self.problems)} invalid rows quarantined to {', '.join(self.quarantine_files)}:\n"
+                + "\n".join(f"  {problem}" for problem in self.problems))
+
+
+# CSV column layouts
+EMPLOYEE_FIELDS = ['employee_id', 'name', 'email', 'department', 'manager']
+PASS_TYPE_FIELDS = ['pass_type_id', 'name', 'description', 'category', 'validity_period_days']
+SAFETY_PASS_FIELDS = ['pass_id', 'employee_id', 'pass_type_id', 'issue_date', 'expiry_date', 'status',
+                      'revoked_at']
+# Columns added after the first release: files written before may lack them, and read them as empty
+OPTIONAL_FIELDS = {'revoked_at'}
+# One row per department, listing the pass types everyone in it must hold, separated by ';'
+REQUIREMENT_FIELDS = ['department', 'pass_type_ids']
+# Passes of offboarded employees keep the holder's name, since the employee record is gone
+ARCHIVED_PASS_FIELDS = SAFETY_PASS_FIELDS + ['employee_name', 'archived_date']
+# Quarantined rows keep their original columns, plus where they came from and why
+QUARANTINE_FIELDS = ['line', 'reason', 'quarantined_at']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+PASS_STATUSES = ('active', 'expired', 'revoked')
+
+# Audit log segments are sealed and indexed once they reach this size
+AUDIT_SEGMENT_BYTES = 4 * 1024 * 1024
+# Event fields the per-segment audit index is keyed by
+AUDIT_INDEX_FIELDS = ('pass_id', 'employee_id')
+
+# Generated pass IDs, and how many are reserved from the shared counter at a time
+PASS_ID_FORMAT = "PASS{:06d}"
+PASS_ID_BLOCK_SIZE = 100
+
+
+def is_iso_date(value) -> bool:
+    """Whether value is a date written exactly as YYYY-MM-DD; dates are compared as strings"""
+    try:
+        date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return False
+    return len(value) == 10
+
+
+# Concurrency
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer.
+
+    Writers are preferred so a background sweep is not starved by the GUI's
+    refresh loop. Both sides are re-entrant per thread, and a thread holding
+    the write lock may also take the read lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read_locked(self):
+        """Hold the lock for reading"""
+        me = threading.get_ident()
+        depth = getattr(self._local, 'read_depth', 0)
+        with self._cond:
+            # Re-entrant reads must not wait behind a queued writer or they would deadlock
+            if depth == 0 and self._writer != me:
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.read_depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.read_depth = depth
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_locked(self):
+        """Hold the lock exclusively"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if getattr(self._local, 'read_depth', 0):
+                    raise RuntimeError("Cannot upgrade a read lock to a write lock")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+class FileLock:
+    """Advisory cross-process lock held on a lock file in the data folder.
+
+    Uses flock on POSIX and msvcrt byte-range locking on Windows. Re-entrant
+    within a process so nested manager operations do not deadlock.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, poll_interval: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._handle = None
+        self.depth = 0
+
+    def acquire(self):
+        """Block until the lock is held or the timeout expires"""
+        self._thread_lock.acquire()
+        if self.depth == 0:
+            handle = open(self.path, 'a+')
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    self._lock_handle(handle)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        handle.close()
+                        self._thread_lock.release()
+                        raise TimeoutError(f"Timed out waiting for lock on {self.path}")
+                    time.sleep(self.poll_interval)
+            self._handle = handle
+        self.depth += 1
+
+    def release(self):
+        """Release one level of the lock"""
+        self.depth -= 1
+        if self.depth == 0:
+            self._unlock_handle(self._handle)
+            self._handle.close()
+            self._handle = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _lock_handle(handle):
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+
+    @staticmethod
+    def _unlock_handle(handle):
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+# Caching
+class ResultCache:
+    """Thread-safe LRU cache of query results.
+
+    Each entry is stored with the data versions it was computed from; a
+    lookup with different versions evicts the entry, so a change to one table
+    invalidates only the results that depend on it.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, versions):
+        """(True, value) for a current entry, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, versions, value):
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Metrics
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+# How often a running export rewrites the metrics file, in seconds
+METRICS_EXPORT_INTERVAL = 60
+
+
+@dataclass
+class OperationStats:
+    """Latency histogram of one timed operation, as reported by Metrics.snapshot"""
+    operation: str
+    count: int
+    total_seconds: float
+    max_seconds: float
+    errors: int
+    buckets: List[int]  # observations per LATENCY_BUCKETS bound, then above the last
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile: the upper bound of the bucket it falls in (at most the maximum)"""
+        seen = 0
+        for bound, observations in zip(LATENCY_BUCKETS, self.buckets):
+            seen += observations
+            if seen >= q * self.count:
+                return min(bound, self.max_seconds)
+        return self.max_seconds
+
+
+class Metrics:
+    """Process-wide counters and latency histograms, exported in Prometheus text format.
+
+    Operations (loading, saving, queries, sweeps, SMTP, GUI refreshes) are
+    timed with timed(), as a context manager or a decorator; counters count
+    events such as records added or emails that failed. Updates take a lock,
+    so badge-scan checks like is_cleared are timed per HTTP request instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        # operation -> [count, total seconds, max seconds, errors, bucket counts...]
+        self._operations = {}
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, operation: str, seconds: float, error: bool = False):
+        """Record one run of an operation that took seconds"""
+        with self._lock:
+            entry = self._operations.get(operation)
+            if entry is None:
+                entry = self._operations[operation] = [0, 0.0, 0.0, 0] + [0] * (len(LATENCY_BUCKETS) + 1)
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += error
+            entry[4 + bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Time the block (or each call of the decorated function) as one run of operation"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(operation, time.perf_counter() - start, error=True)
+            raise
+        self.observe(operation, time.perf_counter() - start)
+
+    def snapshot(self) -> tuple:
+        """({counter: value}, [OperationStats]), sorted by name"""
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+            operations = [OperationStats(operation, entry[0], entry[1], entry[2], entry[3], entry[4:])
+                          for operation, entry in sorted(self._operations.items())]
+        return counters, operations
+
+    def prometheus_text(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        counters, operations = self.snapshot()
+        lines = ["# HELP safety_pass_events_total Records changed, emails sent and other events.",
+                 "# TYPE safety_pass_events_total counter"]
+        lines += [f'safety_pass_events_total{{event="{name}"}} {value}' for name, value in counters.items()]
+        lines += ["# HELP safety_pass_operation_seconds Time taken by each operation.",
+                  "# TYPE safety_pass_operation_seconds histogram"]
+        for stats in operations:
+            label = f'operation="{stats.operation}"'
+            cumulative = 0
+            for bound, observations in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+                cumulative += observations
+                lines.append(f'safety_pass_operation_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'safety_pass_operation_seconds_sum{{{label}}} {stats.total_seconds:.6f}')
+            lines.append(f'safety_pass_operation_seconds_count{{{label}}} {stats.count}')
+        lines += ["# HELP safety_pass_operation_errors_total Operations that raised an exception.",
+                  "# TYPE safety_pass_operation_errors_total counter"]
+        lines += [f'safety_pass_operation_errors_total{{operation="{stats.operation}"}} {stats.errors}'
+                  for stats in operations]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the metrics to a temporary file and atomically swap it into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp_', suffix='.prom')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            _copy_mode(tmp_path, path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+# Shared by every manager, email system and window in the process
+METRICS = Metrics()
+
+
+# Point-in-time queries
+class ValidityTimeline:
+    """The validity spans of one pass type's passes, for "as of" queries.
+
+    starts and ends hold (day, pass_id) sorted by day, kept sorted with
+    bisect on every change. The number of passes valid on a day is then two
+    bisects: spans started by that day, less spans that ended before it.
+    Listing them only reads the spans started within the longest span's
+    length of the day.
+    """
+
+    # Sorts after every pass_id, so (day, _LAST) bisects past all entries for that day
+    _LAST = '\U0010ffff'
+
+    def __init__(self):
+        self.spans = {}  # pass_id -> (first, last)
+        self.starts = []
+        self.ends = []
+        self.longest_days = 0  # an upper bound: not lowered when the longest span is removed
+
+    @classmethod
+    def build(cls, spans: Dict[str, tuple]) -> 'ValidityTimeline':
+        timeline = cls()
+        timeline.spans = spans
+        timeline.starts = sorted((first, pass_id) for pass_id, (first, _) in spans.items())
+        timeline.ends = sorted((last, pass_id) for pass_id, (_, last) in spans.items())
+        for first, last in set(spans.values()):
+            timeline._note_length(first, last)
+        return timeline
+
+    def _note_length(self, first: str, last: str):
+        days = (date.fromisoformat(last) - date.fromisoformat(first)).days
+        if days > self.longest_days:
+            self.longest_days = days
+
+    def add(self, pass_id: str, span: tuple):
+        self.discard(pass_id)
+        first, last = span
+        self.spans[pass_id] = span
+        bisect.insort(self.starts, (first, pass_id))
+        bisect.insort(self.ends, (last, pass_id))
+        self._note_length(first, last)
+
+    def discard(self, pass_id: str):
+        span = self.spans.pop(pass_id, None)
+        if span is not None:
+            first, last = span
+            del self.starts[bisect.bisect_left(self.starts, (first, pass_id))]
+            del self.ends[bisect.bisect_left(self.ends, (last, pass_id))]
+
+    def count_valid(self, day: str) -> int:
+        started = bisect.bisect_right(self.starts, (day, self._LAST))
+        ended = bisect.bisect_left(self.ends, (day, ''))
+        return started - ended
+
+    def valid_pass_ids(self, day: str) -> List[str]:
+        earliest = (date.fromisoformat(day) - timedelta(days=self.longest_days)).isoformat()
+        lo = bisect.bisect_left(self.starts, (earliest, ''))
+        hi = bisect.bisect_right(self.starts, (day, self._LAST))
+        spans = self.spans
+        return [pass_id for _, pass_id in self.starts[lo:hi] if spans[pass_id][1] >= day]
+
+
+# Change Feed
+class ChangeFeed:
+    """Publishes the ChangeEvents of each committed transaction to subscribers.
+
+    A subscriber is either a callback, called with the list of events in the
+    thread that committed them, or a queue the event lists are put on, for
+    consumers such as the GUI that must handle them on their own thread.
+    Events are delivered after the transaction's files are saved and its
+    locks released, so subscribers may read from (or write to) the manager.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # token -> (entities or None, deliver)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None], entities: Iterable[str] = None):
+        """Call callback with each batch of events, optionally only for some entities; returns a token"""
+        token = object()
+        with self._lock:
+            self._subscribers[token] = (frozenset(entities) if entities else None, callback)
+        return token
+
+    def subscribe_queue(self, entities: Iterable[str] = None) -> queue.Queue:
+        """A queue each batch of events is put on; pass it to unsubscribe to stop"""
+        events = queue.Queue()
+        with self._lock:
+            self._subscribers[events] = (frozenset(entities) if entities else None, events.put)
+        return events
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, events: List[ChangeEvent]):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for entities, deliver in subscribers:
+            batch = events if entities is None else [event for event in events if event.entity in entities]
+            if not batch:
+                continue
+            try:
+                deliver(batch)
+            except Exception as e:
+                # One failing subscriber must not undo or block a committed change
+                print(f"Change subscriber failed: {e}")
+
+
+# Audit Log
+class AuditLog:
+    """Append-only log of pass and employee events, in rotated segment files.
+
+    Events are JSON lines appended to the newest segment, events-NNNNNN.jsonl.
+    Once a segment reaches segment_bytes it is sealed: an index of the byte
+    offset of every event by pass_id and employee_id is written beside it
+    (events-NNNNNN.idx.json) and the next event starts a new segment. Sealed
+    indexes are read once and cached; the open segment is indexed in memory,
+    catching up from where it was last read. A history lookup reads only the
+    lines the indexes point to. Appends and sealing happen under the
+    manager's file lock; lookups need no lock.
+    """
+
+    def __init__(self, folder: str, segment_bytes: int = AUDIT_SEGMENT_BYTES):
+        self.folder = folder
+        self.segment_bytes = segment_bytes
+        os.makedirs(folder, exist_ok=True)
+        self._sealed = {}  # segment number -> index
+        self._open_index = (0, 0, None)  # (segment number, bytes indexed, index) of the newest segment
+        self._lock = threading.Lock()
+
+    def _path(self, number: int, suffix: str = '.jsonl') -> str:
+        return os.path.join(self.folder, f"events-{number:06d}{suffix}")
+
+    def _segment_numbers(self) -> List[int]:
+        return sorted(int(name[7:13]) for name in os.listdir(self.folder)
+                      if name.startswith('events-') and name.endswith('.jsonl'))
+
+    @staticmethod
+    def _index_lines(path: str, start: int = 0, index: Dict[str, Dict[str, List[int]]] = None):
+        """Add the offsets of the events from byte start on to an index; returns (index, end offset)"""
+        index = index if index is not None else {name: {} for name in AUDIT_INDEX_FIELDS}
+        offset = start
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # an append still being written
+                event = json.loads(line)
+                for name in AUDIT_INDEX_FIELDS:
+                    key = event.get(name)
+                    if key:
+                        index[name].setdefault(key, []).append(offset)
+                offset += len(line)
+        return index, offset
+
+    def append(self, events: List[Dict[str, str]]):
+        """Write events to the newest segment, sealing it first if full; caller holds the file lock"""
+        numbers = self._segment_numbers()
+        number = numbers[-1] if numbers else 1
+        path = self._path(number)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            self._seal(number)
+            number += 1
+            path = self._path(number)
+        data = b''.join(json.dumps(event, separators=(',', ':')).encode('utf-8') + b'\n' for event in events)
+        with open(path, 'ab') as f:
+            f.write(data)
+
+    def _seal(self, number: int):
+        index, _ = self._index_lines(self._path(number))
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix='.tmp_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            # dumps, unlike dump, runs entirely in the C encoder
+            f.write(json.dumps(index, separators=(',', ':')))
+        _copy_mode(tmp_path, self._path(number, '.idx.json'))
+        os.replace(tmp_path, self._path(number, '.idx.json'))
+
+    def _segment_index(self, number: int) -> Dict[str, Dict[str, List[int]]]:
+        """The index of a segment; caller holds self._lock"""
+        index = self._sealed.get(number)
+        if index is not None:
+            return index
+        try:
+            with open(self._path(number, '.idx.json'), 'r') as f:
+                self._sealed[number] = index = json.load(f)
+            return index
+        except FileNotFoundError:
+            pass
+        # The open segment: carry on from where it was last indexed
+        open_number, indexed, index = self._open_index
+        if open_number != number:
+            indexed, index = 0, None
+        index, indexed = self._index_lines(self._path(number), indexed, index)
+        self._open_index = (number, indexed, index)
+        return index
+
+    def history(self, field: str, key: str) -> List[Dict[str, str]]:
+        """Every event with the given pass_id or employee_id, oldest first"""
+        events = []
+        with self._lock:
+            for number in self._segment_numbers():
+                offsets = self._segment_index(number)[field].get(key)
+                if not offsets:
+                    continue
+                with open(self._path(number), 'rb') as f:
+                    for offset in offsets:
+                        f.seek(offset)
+                        events.append(json.loads(f.readline()))
+        return events
+
+
+def _record_changes(previous, current, fieldnames: List[str]) -> Dict[str, List[str]]:
+    """{field: [old, new]} for the fields that differ between two versions of a record"""
+    old_row, new_row = _record_row(previous, fieldnames), _record_row(current, fieldnames)
+    return {name: [old, new] for name, old, new in zip(fieldnames, old_row, new_row) if old != new}
+
+
+# Team views
+# Employees are grouped into teams by these fields
+TEAM_FIELDS = ('department', 'manager')
+
+
+class TeamView:
+    """Materialized view of one department or manager's team.
+
+    Holds the member employee IDs and the (expiry_date, pass_id) of their
+    active passes, kept sorted, so a team's passes and its expiring counts
+    come straight from the view instead of a scan of every employee and pass.
+    """
+
+    def __init__(self):
+        self.members = set()
+        self.active = []
+
+    def add_pass(self, expiry_date: str, pass_id: str):
+        bisect.insort(self.active, (expiry_date, pass_id))
+
+    def remove_pass(self, expiry_date: str, pass_id: str):
+        index = bisect.bisect_left(self.active, (expiry_date, pass_id))
+        if index < len(self.active) and self.active[index] == (expiry_date, pass_id):
+            del self.active[index]
+
+    def pass_ids_expiring(self, earliest: str, latest: str) -> List[str]:
+        """Active pass IDs with an expiry date from earliest through latest"""
+        lo = bisect.bisect_left(self.active, (earliest, ''))
+        hi = bisect.bisect_right(self.active, (latest, ValidityTimeline._LAST))
+        return [pass_id for _, pass_id in self.active[lo:hi]]
+
+
+def _record_row(record, fieldnames: List[str]) -> tuple:
+    """A record's CSV row as the tuple of strings it is written as"""
+    values = record.to_dict()
+    return tuple(str(values[name]) for name in fieldnames)
+
+
+# Read once at import: os.umask can only be read by setting it, which would race with other threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _copy_mode(tmp_path: str, path: str):
+    """Give a temporary file the permissions of the file it will replace.
+
+    mkstemp creates files readable by their owner only; a new file gets the umask default instead.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.chmod(tmp_path, mode)
+
+
+def _file_signature(path: str):
+    """Identify the on-disk copy of a file by inode, size and modification time"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+# Search
+# Words are runs of letters and digits; anything else separates them
+SEARCH_WORD = re.compile(r'[^\W_]+')
+# The number a word ends with, without its leading zeros
+TRAILING_NUMBER = re.compile(r'0*(\d+)$')
+
+
+class SearchIndex:
+    """Prefix index for search-as-you-type over a few short text fields per record.
+
+    Records are split into lowercase words of letters and digits, kept in one
+    sorted list of (word, key) pairs, so the records with a word starting
+    with a query word are a single bisected slice of it. Numbers a word ends
+    with are also indexed without their leading zeros, so '123' finds
+    EMP000123. A record matches when every query word starts one of its
+    words; a query word that starts no word at all is retried with one typo
+    corrected (a character dropped, added, changed, or two swapped).
+
+    Results follow the slice of the query word with the fewest matches:
+    records with that exact word first, then the rest by word and key. A
+    search stops as soon as it has found limit records, so broad queries
+    typed one letter at a time stay fast.
+    """
+
+    # Characters tried when correcting a typo
+    ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+    def __init__(self, records: Iterable[tuple] = ()):
+        """records: (key, field, ...) tuples to index"""
+        self._words_by_key = {record[0]: self.words(*record[1:]) for record in records}
+        self._pairs = sorted((word, key) for key, words in self._words_by_key.items() for word in words)
+        # The keys of _pairs alone, so a slice's keys are read without unpacking tuples
+        self._keys = [key for _, key in self._pairs]
+
+    def __len__(self):
+        return len(self._words_by_key)
+
+    @staticmethod
+    def words(*fields: str) -> tuple:
+        """The indexed words of some fields"""
+        words = {}
+        for word in SEARCH_WORD.findall(' '.join(map(str, fields)).lower()):
+            words[word] = None
+            number = TRAILING_NUMBER.search(word)
+            if number:
+                words[number.group(1)] = None
+        return tuple(words)
+
+    @staticmethod
+    def query_words(query: str) -> List[str]:
+        """The words of a query; numbers match without their leading zeros"""
+        return list(dict.fromkeys(word.lstrip('0') or '0' if word.isdigit() else word
+                                  for word in SEARCH_WORD.findall(query.lower())))
+
+    def add(self, key: str, *fields: str):
+        """Index a record under key, replacing what was indexed under it before"""
+        words = self.words(*fields)
+        if self._words_by_key.get(key) == words:
+            return
+        self.remove(key)
+        self._words_by_key[key] = words
+        for word in words:
+            index = bisect.bisect_left(self._pairs, (word, key))
+            self._pairs.insert(index, (word, key))
+            self._keys.insert(index, key)
+
+    def remove(self, key: str):
+        for word in self._words_by_key.pop(key, ()):
+            index = bisect.bisect_left(self._pairs, (word, key))
+            del self._pairs[index]
+            del self._keys[index]
+
+    def matches(self, key: str, query: str) -> bool:
+        """Whether every word of the query starts a word of the record indexed under key (no typos)"""
+        words = self._words_by_key.get(key)
+        return words is not None and all(any(word.startswith(query_word) for word in words)
+                                         for query_word in self.query_words(query))
+
+    def _slice(self, prefix: str) -> tuple:
+        """(lo, hi) of the pairs whose word starts with prefix"""
+        return (bisect.bisect_left(self._pairs, (prefix,)),
+                bisect.bisect_left(self._pairs, (prefix + '\U0010ffff',)))
+
+    def _typo_corrections(self, word: str) -> set:
+        """Every string one dropped, added, changed or swapped character away from word"""
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        corrections = {left + right[1:] for left, right in splits if right}
+        corrections.update(left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1)
+        corrections.update(left + c + right[1:] for left, right in splits if right for c in self.ALPHABET)
+        corrections.update(left + c + right for left, right in splits for c in self.ALPHABET)
+        corrections.discard(word)
+        return corrections
+
+    def _matching_slices(self, query_word: str, fuzzy: bool) -> List[tuple]:
+        """The (lo, hi) slices of the pairs a query word matches, and whether they are typo corrections"""
+        lo, hi = self._slice(query_word)
+        if lo < hi:
+            return [(lo, hi)], False
+        # Short words are too ambiguous to correct
+        if not fuzzy or len(query_word) < 3:
+            return [], False
+        slices = sorted(filter(lambda s: s[0] < s[1], map(self._slice, self._typo_corrections(query_word))))
+        return slices, True
+
+    def search(self, query: str, limit: Optional[int] = 50, fuzzy: bool = True) -> List[str]:
+        """Keys of the records matching every word of the query, best first.
+
+        A blank query matches nothing; limit=None returns every match.
+        """
+        matches = []
+        for query_word in self.query_words(query):
+            slices, corrected = self._matching_slices(query_word, fuzzy)
+            if not slices:
+                return []
+            matches.append((sum(hi - lo for lo, hi in slices), query_word, slices, corrected))
+        if not matches:
+            return []
+
+        # Walk the narrowest word's slices; the other words are checked per record,
+        # or, if they needed a typo corrected, against the (few) keys they matched
+        matches.sort()
+        _, _, lead, _ = matches[0]
+        prefixes = [query_word for _, query_word, _, corrected in matches[1:] if not corrected]
+        corrected_keys = [set().union(*(self._keys[lo:hi] for lo, hi in slices))
+                          for _, _, slices, corrected in matches[1:] if corrected]
+        words_by_key = self._words_by_key
+
+        results = {}
+        for lo, hi in lead:
+            for key in self._keys[lo:hi]:
+                if key in results:
+                    continue
+                if all(key in keys for keys in corrected_keys) and all(
+                        any(word.startswith(prefix) for word in words_by_key[key]) for prefix in prefixes):
+                    results[key] = None
+                    if len(results) == limit:
+                        return list(results)
+        return list(results)
+
+
+# Sorting
+# Columns the employee and pass tables can be read in the order of
+SORT_COLUMNS = {
+    'employees': ('employee_id', 'name', 'email', 'department', 'manager', 'active_passes'),
+    'safety_passes': ('pass_id', 'employee_name', 'pass_type_name', 'issue_date', 'expiry_date', 'days_left',
+                      'status'),
+}
+
+
+class SortedIndex:
+    """Record keys kept in order of one sort value per record.
+
+    Holds a sorted list of (value, key) pairs and each key's current value,
+    so a changed record is moved with two bisections, and the first n keys
+    in either direction are read in n steps with no sort. Records with equal
+    values are in key order.
+    """
+
+    def __init__(self, values: Dict[str, object]):
+        """values: the sort value of each record key"""
+        self.values = dict(values)
+        self._pairs = sorted((value, key) for key, value in self.values.items())
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def add(self, key: str, value):
+        """Insert a record, or move it to its new sort value"""
+        if key in self.values:
+            if self.values[key] == value:
+                return
+            self.remove(key)
+        self.values[key] = value
+        bisect.insort(self._pairs, (value, key))
+
+    def remove(self, key: str):
+        if key in self.values:
+            index = bisect.bisect_left(self._pairs, (self.values.pop(key), key))
+            del self._pairs[index]
+
+    def keys(self, descending: bool = False) -> Iterator[str]:
+        """All keys in order; the index must not change while they are read"""
+        return (key for _, key in (reversed(self._pairs) if descending else self._pairs))
+
+
 # Core Management System
 class SafetyPassManager:
-    def __init__(self, data_folder: str = "safety_pass_data"):
+    def __init__(self, data_folder: str = "safety_pass_data", progress: Callable[[str, float], None] = None,
+                 quiet: bool = False):
+        """Load the data folder; progress, if given, is called with (step, fraction done) while loading.
+
+        A quiet manager prints no per-operation messages, for callers reporting results their own way.
+        """
         self.data_folder = data_folder
+        self.quiet = quiet
         self.employees_file = os.path.join(data_folder, "employees.csv")
         self.pass_types_file = os.path.join(data_folder, "pass_types.csv")
         self.passes_file = os.path.join(data_folder, "safety_passes.csv")
+        self.requirements_file = os.path.join(data_folder, "pass_requirements.csv")
+        # Pass and employee events, appended when each transaction's files are saved
+        self.audit_log = AuditLog(os.path.join(data_folder, "audit"))
+        self._pending_events = []
+        # Record-level changes, published to subscribers once each transaction commits
+        self.change_feed = ChangeFeed()
+        self._pending_changes = []
+        self.archive_file = os.path.join(data_folder, "archived_passes.csv")
+        self.versions_file = os.path.join(data_folder, ".versions.json")
+        self.pass_ids_file = os.path.join(data_folder, ".pass_ids.json")
+        # This process's metrics, in Prometheus text format, while an export is running
+        self.metrics_file = os.path.join(data_folder, "metrics.prom")
+        self._metrics_export = None
+
+        # Guards the in-memory dicts and the CSV writes; readers share, writers are exclusive
+        self._lock = ReadWriteLock()
 
         # Create data folder if it doesn't exist
         os.makedirs(data_folder, exist_ok=True)
 
-        # Initialize CSV files if they don't exist
-        self._initialize_csv_files()
-
-        # Load data
-        self.employees = self._load_employees()
-        self.pass_types = self._load_pass_types()
-        self.safety_passes = self._load_safety_passes()
+        # Serializes writers across processes sharing the data folder
+        self._file_lock = FileLock(os.path.join(data_folder, ".lock"))
+        self._transaction_depth = 0
+        # Files modified inside the current transaction, written once when it ends
+        self._dirty_files = set()
+
+        # Block of pass ID numbers reserved from the shared counter and not yet
+        # handed out: [_next_pass_number, _pass_number_limit)
+        self._pass_id_lock = threading.Lock()
+        self._next_pass_number = 0
+        self._pass_number_limit = 0
+
+        # Incremented whenever the in-memory data changes (local mutations or
+        # external edits picked up) and when the date changes, since expiry
+        # answers depend on it; lets clients and caches tell whether anything changed.
+        # Per-table counters let cached results depend on only the tables they read.
+        self._data_version = 0
+        self._table_versions = {'employees': 0, 'pass_types': 0, 'safety_passes': 0, 'requirements': 0}
+        self._version_date = date.today().isoformat()
+        self._cache = ResultCache()
+
+        # Per-file write counters and signatures of the copies held in memory,
+        # used to detect writes by other processes or external editors
+        self._known_versions = {}
+        self._known_signatures = {}
+        # Rows as last read from or written to each file, keyed by primary key,
+        # so external edits can be diffed against memory row by row
+        self._synced_rows = {}
+
+        # Invalid rows found while reading, per data file, waiting to be moved to
+        # their quarantine side file; and the report of everything quarantined
+        self._quarantined_rows = {}
+        self.validation_report = ValidationReport()
+
+        # Indexes over safety_passes, maintained on every mutation:
+        # employee_id -> {pass_id: None} (insertion ordered), and
+        # (employee_id, pass_type_id) -> ((expiry_date, issue_date), ...) for non-revoked
+        # passes, latest expiry first; and pass_type_id -> ValidityTimeline
+        self._passes_by_employee = {}
+        self._clearance = {}
+        self._timelines = {}
+        # Team views: field -> team name -> TeamView, and, for each active pass
+        # filed in them, pass_id -> (expiry_date, department, manager) it was filed under
+        self._team_views = {field_name: {} for field_name in TEAM_FIELDS}
+        self._filed_passes = {}
+        # Search indexes over employees and over pass IDs, keyed by table: each
+        # built on its first search, then maintained on every mutation
+        self._search_indexes = {}
+        # Sorted indexes, keyed by (table, column) from SORT_COLUMNS: each built
+        # the first time the table is read in that order, then maintained
+        self._sorted_indexes = {}
+        # Indexes are built under the shared read lock, so readers take this to build each only once
+        self._index_build_lock = threading.Lock()
+
+        with self._file_lock, METRICS.timed('load'):
+            # Initialize CSV files if they don't exist
+            self._initialize_csv_files()
+
+            # Load data, reporting progress in proportion to the size of each file;
+            # building the indexes takes about as long as reading the passes
+            steps = [("Loading employees", self.employees_file), ("Loading pass types", self.pass_types_file),
+                     ("Loading safety passes", self.passes_file),
+                     ("Loading pass requirements", self.requirements_file), ("Building indexes", self.passes_file)]
+            sizes = [os.path.getsize(path) for _, path in steps]
+
+            def report_progress(index):
+                if progress is not None:
+                    progress(steps[index][0], sum(sizes[:index]) / max(sum(sizes), 1))
+
+            self._known_versions = self._read_versions()
+            report_progress(0)
+            self.employees = self._load_employees()
+            report_progress(1)
+            self.pass_types = self._load_pass_types()
+            report_progress(2)
+            self.safety_passes = self._load_safety_passes()
+            report_progress(3)
+            self.requirements = self._load_requirements()
+            report_progress(4)
+            self._flush_quarantine()
+            self._rebuild_indexes()
+            if progress is not None:
+                progress("Loaded", 1.0)
+
+        if not self.validation_report.is_empty():
+            self._say(f"Warning: {self.validation_report}")
+
+    def _say(self, message: str):
+        """Print a per-operation message, unless the manager is quiet"""
+        if not self.quiet:
+            print(message)
+
+    @property
+    def data_version(self) -> int:
+        """Counter that changes whenever any data, or the date, changes"""
+        self._check_date()
+        return self._data_version
+
+    def _check_date(self):
+        """Bump the data version the first time it is read on a new day"""
+        today = date.today().isoformat()
+        if today != self._version_date:
+            self._version_date = today
+            self._data_version += 1
+
+    def _touch(self, *attributes: str):
+        """Record that the given tables ('employees', 'pass_types', 'safety_passes', 'requirements') changed"""
+        for attribute in attributes:
+            self._table_versions[attribute] += 1
+        self._data_version += 1
+
+    def _cache_versions(self, tables) -> tuple:
+        """The versions of the given tables, and the date, that a cached result is keyed on"""
+        self._check_date()
+        return tuple(self._table_versions[table] for table in tables) + (self._version_date,)
+
+    def _cached(self, key, tables, compute):
+        """Return compute()'s result, memoized against the versions of the tables it reads and the date"""
+        with self._lock.read_locked():
+            versions = self._cache_versions(tables)
+            hit, value = self._cache.get(key, versions)
+            if not hit:
+                value = compute()
+                self._cache.put(key, versions, value)
+            return value
+
+    def read_locked(self):
+        """Context manager for iterating the manager's dicts directly"""
+        return self._lock.read_locked()
+
+    def write_locked(self):
+        """Context manager for grouping several mutations into one exclusive section.
+
+        Each data file touched inside the section is written once, when the
+        outermost section ends.
+        """
+        return self._transaction()
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the write lock and the cross-process file lock.
+
+        On entry, any data file another process has rewritten since we last
+        read it is reloaded first, so the mutation applies on top of the
+        latest saved state instead of overwriting it. Saves requested inside
+        the transaction are deferred to its end. If it raises, nothing is
+        saved and the data is rolled back to the files as they were.
+        """
+        changes = None
+        try:
+            with self._lock.write_locked(), self._file_lock:
+                self._transaction_depth += 1
+                reloaded = 0, 0
+                try:
+                    if self._transaction_depth == 1:
+                        self._reload_changed_files()
+                        # Changes picked up from the files stand even if the transaction fails
+                        reloaded = len(self._pending_changes), len(self._pending_events)
+                    yield
+                except BaseException:
+                    if self._transaction_depth == 1:
+                        self._rollback(*reloaded)
+                        changes, self._pending_changes = self._pending_changes, []
+                    raise
+                else:
+                    if self._transaction_depth == 1:
+                        self._flush_dirty_files()
+                        changes, self._pending_changes = self._pending_changes, []
+                finally:
+                    self._transaction_depth -= 1
+        finally:
+            # Published outside the locks, so subscribers can use the manager
+            if changes:
+                self.change_feed.publish(changes)
+
+    def _flush_dirty_files(self):
+        """Write every data file modified in the transaction that just ended"""
+        records_by_file = {
+            self.employees_file: (EMPLOYEE_FIELDS, self.employees),
+            self.pass_types_file: (PASS_TYPE_FIELDS, self.pass_types),
+            self.passes_file: (SAFETY_PASS_FIELDS, self.safety_passes),
+            self.requirements_file: (REQUIREMENT_FIELDS, self.requirements),
+        }
+        while self._dirty_files:
+            path = self._dirty_files.pop()
+            fieldnames, records = records_by_file[path]
+            self._write_csv(path, fieldnames, records.values())
+        if self._pending_events:
+            events, self._pending_events = self._pending_events, []
+            self.audit_log.append(events)
+
+    def _rollback(self, changes_kept: int, events_kept: int):
+        """Discard a failed transaction; the data files still hold the state from before it.
+
+        The first changes_kept change events and events_kept audit events,
+        from files reloaded as it began, are kept.
+        """
+        self._dirty_files.clear()
+        del self._pending_changes[changes_kept:]
+        del self._pending_events[events_kept:]
+        if self._pending_events:
+            events, self._pending_events = self._pending_events, []
+            self.audit_log.append(events)
+        for path, attribute, fieldnames, record_type in self._data_files():
+            setattr(self, attribute, self._load_records(path, attribute, fieldnames, record_type))
+        self._flush_quarantine()
+        self._rebuild_indexes()
+
+    def _record_change(self, entity: str, key: str, old, new):
+        """Apply a change to the team, search and sorted views and queue it for the change feed.
+
+        The record must already be stored, and an added or removed pass
+        already indexed under its holder; old must not be modified afterwards.
+        """
+        self._update_team_views(entity, key, old, new)
+        self._update_search_indexes(entity, key, new)
+        self._update_sorted_indexes(entity, key, old, new)
+        METRICS.count(f"{entity}_{'added' if old is None else 'removed' if new is None else 'updated'}")
+        if self.change_feed.has_subscribers():
+            self._pending_changes.append(ChangeEvent(entity, key, old, replace(new) if new is not None else None))
+
+    def _audit(self, event: str, **fields):
+        """Record an event for the audit log; written when the transaction's files are"""
+        self._pending_events.append(dict(at=datetime.now().strftime(TIMESTAMP_FORMAT), event=event, **fields))
+
+    def get_pass_history(self, pass_id: str) -> List[Dict[str, str]]:
+        """Audit events for one pass, oldest first"""
+        return self.audit_log.history('pass_id', pass_id)
+
+    def get_employee_history(self, employee_id: str) -> List[Dict[str, str]]:
+        """Audit events for one employee and their passes, oldest first"""
+        return self.audit_log.history('employee_id', employee_id)
+
+    def export_metrics(self):
+        """Write the process's counters and latency histograms to metrics_file now"""
+        METRICS.write(self.metrics_file)
+
+    def start_metrics_export(self, interval: float = METRICS_EXPORT_INTERVAL):
+        """Rewrite metrics_file now and every interval seconds, on a background thread"""
+        if self._metrics_export is not None:
+            return
+        stop = self._metrics_export = threading.Event()
+
+        def export_loop():
+            while True:
+                try:
+                    self.export_metrics()
+                except OSError as e:
+                    print(f"Warning: could not write {self.metrics_file}: {e}")
+                if stop.wait(interval):
+                    return
+
+        threading.Thread(target=export_loop, daemon=True).start()
+
+    def stop_metrics_export(self):
+        """Stop a running export, writing the metrics one last time"""
+        if self._metrics_export is not None:
+            self._metrics_export.set()
+            self._metrics_export = None
+            self.export_metrics()
+
+    def _data_files(self):
+        """(path, attribute, fieldnames, record type) for every data file the manager owns"""
+        return [
+            (self.employees_file, 'employees', EMPLOYEE_FIELDS, Employee),
+            (self.pass_types_file, 'pass_types', PASS_TYPE_FIELDS, SafetyPassType),
+            (self.passes_file, 'safety_passes', SAFETY_PASS_FIELDS, SafetyPass),
+            (self.requirements_file, 'requirements', REQUIREMENT_FIELDS, PassRequirement),
+        ]
+
+    def _read_versions(self) -> Dict[str, int]:
+        """Read the shared per-file write counters"""
+        try:
+            with open(self.versions_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _bump_version(self, path: str):
+        """Increment the shared write counter for a data file we just saved"""
+        name = os.path.basename(path)
+        versions = self._read_versions()
+        versions[name] = versions.get(name, 0) + 1
+        fd, tmp_path = tempfile.mkstemp(dir=self.data_folder, prefix='.tmp_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(versions, f)
+        _copy_mode(tmp_path, self.versions_file)
+        os.replace(tmp_path, self.versions_file)
+        self._known_versions[name] = versions[name]
+        self._known_signatures[path] = _file_signature(path)
+
+    def reserve_pass_ids(self, count: int = 1) -> List[str]:
+        """Allocate new, unused pass IDs.
+
+        IDs come from a counter in the data folder shared by every process, so
+        they are unique across threads, processes and restarts. Each process
+        reserves a block of numbers at a time and hands them out from memory,
+        so IDs increase within a process but may interleave between processes.
+        """
+        with self._pass_id_lock:
+            if self._pass_number_limit - self._next_pass_number >= count:
+                return self._take_pass_ids(count)
+        # Reserving touches the counter file; always take the file lock before
+        # the ID lock, in the same order as a transaction that allocates IDs
+        with self._file_lock, self._pass_id_lock:
+            pass_ids = []
+            while len(pass_ids) < count:
+                if self._next_pass_number == self._pass_number_limit:
+                    size = max(count - len(pass_ids), PASS_ID_BLOCK_SIZE)
+                    self._next_pass_number = self._reserve_pass_id_block(size)
+                    self._pass_number_limit = self._next_pass_number + size
+                pass_ids.extend(self._take_pass_ids(min(count - len(pass_ids),
+                                                        self._pass_number_limit - self._next_pass_number)))
+            return pass_ids
+
+    def _take_pass_ids(self, count: int) -> List[str]:
+        """Hand out IDs from the reserved block; caller holds the ID lock"""
+        pass_ids = []
+        while len(pass_ids) < count and self._next_pass_number < self._pass_number_limit:
+            pass_id = PASS_ID_FORMAT.format(self._next_pass_number)
+            self._next_pass_number += 1
+            # Skip numbers already taken by imported or hand-entered pass IDs
+            if pass_id not in self.safety_passes:
+                pass_ids.append(pass_id)
+        return pass_ids
+
+    def _reserve_pass_id_block(self, size: int) -> int:
+        """Advance the shared pass ID counter by size; returns the first reserved number"""
+        with self._file_lock:
+            try:
+                with open(self.pass_ids_file, 'r') as f:
+                    start = int(json.load(f)['next'])
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                start = 1
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_folder, prefix='.tmp_', suffix='.json')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'next': start + size}, f)
+            _copy_mode(tmp_path, self.pass_ids_file)
+            os.replace(tmp_path, self.pass_ids_file)
+            return start
+
+    def _is_stale(self, path: str, versions: Dict[str, int]) -> bool:
+        """Whether the on-disk copy of a data file differs from the one in memory"""
+        name = os.path.basename(path)
+        if versions.get(name, 0) != self._known_versions.get(name, 0):
+            return True
+        return _file_signature(path) != self._known_signatures.get(path)
+
+    def has_external_changes(self) -> bool:
+        """Cheap stat-based check for writes by other processes or editors, without locking"""
+        versions = self._read_versions()
+        return any(self._is_stale(path, versions) for path, _, _, _ in self._data_files())
+
+    def _reload_changed_files(self) -> List[DataFileChanges]:
+        """Merge the rows of every data file whose on-disk copy changed"""
+        versions = self._read_versions()
+        changed = []
+        for path, attribute, fieldnames, record_type in self._data_files():
+            if self._is_stale(path, versions):
+                changes = self._merge_file(path, attribute, fieldnames, record_type)
+                if not changes.is_empty():
+                    changed.append(changes)
+                    self._touch(attribute)
+                    records = getattr(self, attribute)
+                    # Managers bump the write counter and audit their own changes; a file changed
+                    # without it was written by an editor or script, and is audited here
+                    name = os.path.basename(path)
+                    edited = versions.get(name, 0) == self._known_versions.get(name, 0)
+                    # Removed passes leave the indexes first: refreshing a holder's clearance reads all their passes
+                    for key in changes.removed + changes.added + changes.updated:
+                        if attribute == 'safety_passes':
+                            self._update_pass_index(key, changes.previous.get(key))
+                        self._record_change(attribute, key, changes.previous.get(key), records.get(key))
+                        if edited:
+                            self._audit_record_change(attribute, key, records.get(key),
+                                                      changes.previous.get(key), fieldnames, 'external')
+        self._known_versions = versions
+        self._flush_quarantine()
+        return changed
+
+    def _merge_file(self, path: str, attribute: str, fieldnames: List[str], record_type) -> DataFileChanges:
+        """Apply only the rows that differ between the file and its last-synced copy.
+
+        Rows edited on disk replace the in-memory record in place, so objects
+        held elsewhere stay valid. A row that was changed in memory as well is
+        reported as a conflict; the on-disk version is kept.
+        """
+        synced = self._synced_rows.get(path, {})
+        current = getattr(self, attribute)
+        changes = DataFileChanges(os.path.basename(path))
+
+        disk_records = {}
+        for line_number, row in self._read_rows(path, fieldnames):
+            disk_records[row[fieldnames[0]]] = (line_number, row)
+        on_disk = self._synced_rows[path]
+
+        for key, disk_row in on_disk.items():
+            synced_row = synced.get(key)
+            if disk_row == synced_row:
+                continue
+            record = current.get(key)
+            local_row = _record_row(record, fieldnames) if record is not None else None
+            if local_row == disk_row:
+                continue
+            line_number, disk_record = disk_records[key]
+            problem = self._row_problem(attribute, disk_record)
+            if problem:
+                self._quarantine(path, line_number, disk_record, problem)
+                continue
+            if local_row != synced_row:
+                changes.conflicts.append(key)
+
+            fresh = record_type.from_dict(disk_record)
+            if record is None:
+                current[key] = fresh
+                changes.added.append(key)
+            else:
+                changes.previous[key] = replace(record)
+                for name in fieldnames:
+                    setattr(record, name, getattr(fresh, name))
+                changes.updated.append(key)
+
+        for key, synced_row in synced.items():
+            if key in on_disk or key not in current:
+                continue
+            if _record_row(current[key], fieldnames) != synced_row:
+                changes.conflicts.append(key)
+            changes.previous[key] = current.pop(key)
+            changes.removed.append(key)
+
+        return changes
+
+    @METRICS.timed('reload')
+    def reload_if_changed(self) -> List[DataFileChanges]:
+        """Pick up rows changed by other processes or external editors since the last sync"""
+        if not self.has_external_changes():
+            return []
+        with self._lock.write_locked(), self._file_lock:
+            changed = self._reload_changed_files()
+            changes, self._pending_changes = self._pending_changes, []
+            events, self._pending_events = self._pending_events, []
+            if events:
+                self.audit_log.append(events)
+        if changes:
+            self.change_feed.publish(changes)
+        return changed
+
+    # Indexes
+    def _rebuild_indexes(self):
+        """Build the pass indexes from scratch"""
+        self._touch('employees', 'pass_types', 'safety_passes')
+        self._passes_by_employee = {}
+        keys = set()
+        for pass_id, safety_pass in self.safety_passes.items():
+            self._passes_by_employee.setdefault(safety_pass.employee_id, {})[pass_id] = None
+            keys.add((safety_pass.employee_id, safety_pass.pass_type_id))
+        self._clearance = {}
+        for employee_id, pass_type_id in keys:
+            self._refresh_clearance(employee_id, pass_type_id)
+        spans_by_type = {}
+        for pass_id, safety_pass in self.safety_passes.items():
+            span = safety_pass.validity_span()
+            if span is not None:
+                spans_by_type.setdefault(safety_pass.pass_type_id, {})[pass_id] = span
+        self._timelines = {pass_type_id: ValidityTimeline.build(spans)
+                           for pass_type_id, spans in spans_by_type.items()}
+        self._rebuild_team_views()
+        self._search_indexes = {}
+        self._sorted_indexes = {}
+
+    def _rebuild_team_views(self):
+        """Build the team views from scratch"""
+        self._team_views = {field_name: {} for field_name in TEAM_FIELDS}
+        self._filed_passes = {}
+        for employee in self.employees.values():
+            for field_name in TEAM_FIELDS:
+                self._team_view(field_name, getattr(employee, field_name)).members.add(employee.employee_id)
+        for pass_id, safety_pass in self.safety_passes.items():
+            employee = self.employees.get(safety_pass.employee_id)
+            if safety_pass.status == 'active' and employee is not None:
+                self._filed_passes[pass_id] = (safety_pass.expiry_date, employee.department, employee.manager)
+                for field_name in TEAM_FIELDS:
+                    self._team_view(field_name, getattr(employee, field_name)).active.append(
+                        (safety_pass.expiry_date, pass_id))
+        for views in self._team_views.values():
+            for view in views.values():
+                view.active.sort()
+
+    def _team_view(self, field_name: str, name: str) -> TeamView:
+        view = self._team_views[field_name].get(name)
+        if view is None:
+            view = self._team_views[field_name][name] = TeamView()
+        return view
+
+    def _file_pass(self, pass_id: str):
+        """Add a pass to its holder's team views if it is active"""
+        safety_pass = self.safety_passes.get(pass_id)
+        employee = self.employees.get(safety_pass.employee_id) if safety_pass is not None else None
+        if employee is None or safety_pass.status != 'active':
+            return
+        entry = (safety_pass.expiry_date, employee.department, employee.manager)
+        self._filed_passes[pass_id] = entry
+        for field_name, name in zip(TEAM_FIELDS, entry[1:]):
+            self._team_view(field_name, name).add_pass(entry[0], pass_id)
+
+    def _unfile_pass(self, pass_id: str):
+        """Remove a pass from the team views it was filed in, if any"""
+        entry = self._filed_passes.pop(pass_id, None)
+        if entry is not None:
+            for field_name, name in zip(TEAM_FIELDS, entry[1:]):
+                self._team_view(field_name, name).remove_pass(entry[0], pass_id)
+
+    def _update_team_views(self, entity: str, key: str, old, new):
+        """Bring the team views up to date after an employee or pass changed"""
+        if entity == 'safety_passes':
+            self._unfile_pass(key)
+            self._file_pass(key)
+        elif entity == 'employees':
+            for record, update in ((old, set.discard), (new, set.add)):
+                if record is not None:
+                    for field_name in TEAM_FIELDS:
+                        update(self._team_view(field_name, getattr(record, field_name)).members, key)
+            if (old is None or new is None or old.department != new.department
+                    or old.manager != new.manager):
+                # Their active passes move with them
+                for pass_id in self._passes_by_employee.get(key, ()):
+                    self._unfile_pass(pass_id)
+                    self._file_pass(pass_id)
+            for field_name in TEAM_FIELDS:
+                # Teams that no longer have members or passes are dropped
+                views = self._team_views[field_name]
+                name = getattr(old, field_name) if old is not None else None
+                if name in views and not views[name].members and not views[name].active:
+                    del views[name]
+
+    @staticmethod
+    def _employee_search_fields(employee: Employee) -> tuple:
+        return employee.name, employee.employee_id, employee.email, employee.department
+
+    def _search_index(self, entity: str) -> SearchIndex:
+        """The search index of employees or safety_passes, built on first use; caller holds the lock"""
+        index = self._search_indexes.get(entity)
+        if index is None:
+            with self._index_build_lock:
+                # Another reader may have built it while this one waited
+                index = self._search_indexes.get(entity)
+                if index is None:
+                    if entity == 'employees':
+                        index = SearchIndex((employee_id, *self._employee_search_fields(employee))
+                                            for employee_id, employee in self.employees.items())
+                    else:
+                        index = SearchIndex((pass_id, pass_id) for pass_id in self.safety_passes)
+                    self._search_indexes[entity] = index
+        return index
+
+    def _update_search_indexes(self, entity: str, key: str, new):
+        """Bring the search indexes, if built, up to date after an employee or pass changed"""
+        index = self._search_indexes.get(entity)
+        if index is None:
+            return
+        if new is None:
+            index.remove(key)
+        elif entity == 'employees':
+            index.add(key, *self._employee_search_fields(new))
+        else:
+            index.add(key, key)
+
+    def _sort_value(self, entity: str, column: str, record):
+        """A stored employee's or pass's value in a column of SORT_COLUMNS, as it sorts"""
+        if entity == 'employees':
+            if column == 'active_passes':
+                return sum(1 for pass_id in self._passes_by_employee.get(record.employee_id, ())
+                           if self.safety_passes[pass_id].status == 'active')
+            return getattr(record, column).casefold()
+        if column == 'employee_name':
+            employee = self.employees.get(record.employee_id)
+            return (employee.name if employee else "Unknown").casefold()
+        if column == 'pass_type_name':
+            pass_type = self.pass_types.get(record.pass_type_id)
+            return (pass_type.name if pass_type else "Unknown").casefold()
+        if column == 'days_left':
+            # Days left are shown for active passes only; the others follow them
+            return record.status != 'active', record.expiry_date
+        return getattr(record, column)
+
+    def _sorted_index(self, entity: str, column: str) -> SortedIndex:
+        """The sorted index of a table by a column, built on first use; caller holds the lock"""
+        if column not in SORT_COLUMNS.get(entity, ()):
+            raise ValueError(f"Cannot sort {entity} by {column}")
+        index = self._sorted_indexes.get((entity, column))
+        if index is None:
+            with self._index_build_lock:
+                index = self._sorted_indexes.get((entity, column))
+                if index is None:
+                    records = getattr(self, entity)
+                    index = self._sorted_indexes[entity, column] = SortedIndex(
+                        {key: self._sort_value(entity, column, record) for key, record in records.items()})
+        return index
+
+    def _resort(self, entity: str, column: str, keys: Iterable[str]):
+        """Move records whose sort value in a built index depends on another table's change"""
+        index = self._sorted_indexes.get((entity, column))
+        if index is not None:
+            records = getattr(self, entity)
+            for key in keys:
+                if key in records:
+                    index.add(key, self._sort_value(entity, column, records[key]))
+
+    def _update_sorted_indexes(self, entity: str, key: str, old, new):
+        """Bring the sorted indexes, if built, up to date after an employee, pass type or pass changed"""
+        if not self._sorted_indexes:
+            return
+        for (table, column), index in self._sorted_indexes.items():
+            if table == entity:
+                if new is None:
+                    index.remove(key)
+                else:
+                    index.add(key, self._sort_value(entity, column, new))
+        # Passes sort by their holder's and pass type's names, and employees by their active passes
+        renamed = old is None or new is None or getattr(old, 'name', None) != getattr(new, 'name', None)
+        if entity == 'employees' and renamed:
+            self._resort('safety_passes', 'employee_name', self._passes_by_employee.get(key, ()))
+        elif entity == 'pass_types' and renamed and ('safety_passes', 'pass_type_name') in self._sorted_indexes:
+            self._resort('safety_passes', 'pass_type_name',
+                         [pass_id for pass_id, safety_pass in self.safety_passes.items()
+                          if safety_pass.pass_type_id == key])
+        elif entity == 'safety_passes':
+            self._resort('employees', 'active_passes', {record.employee_id for record in (old, new) if record})
+
+    def _update_pass_index(self, pass_id: str, previous: SafetyPass = None):
+        """Bring the indexes up to date after a pass was added, changed or removed.
+
+        previous is the pass as it was before the change, if it existed.
+        """
+        current = self.safety_passes.get(pass_id)
+        keys = set()
+        if previous is not None:
+            pass_ids = self._passes_by_employee.get(previous.employee_id)
+            if pass_ids is not None:
+                pass_ids.pop(pass_id, None)
+                if not pass_ids:
+                    del self._passes_by_employee[previous.employee_id]
+            keys.add((previous.employee_id, previous.pass_type_id))
+            self._timelines.get(previous.pass_type_id, ValidityTimeline()).discard(pass_id)
+        if current is not None:
+            self._passes_by_employee.setdefault(current.employee_id, {})[pass_id] = None
+            keys.add((current.employee_id, current.pass_type_id))
+            timeline = self._timelines.setdefault(current.pass_type_id, ValidityTimeline())
+            span = current.validity_span()
+            if span is None:
+                timeline.discard(pass_id)
+            else:
+                timeline.add(pass_id, span)
+        for employee_id, pass_type_id in keys:
+            self._refresh_clearance(employee_id, pass_type_id)
+
+    def _refresh_clearance(self, employee_id: str, pass_type_id: str):
+        """Recompute the validity windows of one (employee, pass type) pair"""
+        windows = []
+        for pass_id in self._passes_by_employee.get(employee_id, ()):
+            safety_pass = self.safety_passes[pass_id]
+            if safety_pass.pass_type_id == pass_type_id and safety_pass.status != 'revoked':
+                windows.append((safety_pass.expiry_date, safety_pass.issue_date))
+        if windows:
+            # Replaced as a whole so lock-free readers never see a partial update
+            self._clearance[(employee_id, pass_type_id)] = tuple(sorted(windows, reverse=True))
+        else:
+            self._clearance.pop((employee_id, pass_type_id), None)
 
     def _initialize_csv_files(self):
         """Initialize CSV files with headers if they don't exist"""
@@ -79,216 +1708,1026 @@ class SafetyPassManager:
         if not os.path.exists(self.employees_file):
             with open(self.employees_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(['employee_id', 'name', 'email', 'department', 'manager'])
+                writer.writerow(EMPLOYEE_FIELDS)
 
         # Pass Types CSV
         if not os.path.exists(self.pass_types_file):
             with open(self.pass_types_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(['pass_type_id', 'name', 'description', 'category', 'validity_period_days'])
+                writer.writerow(PASS_TYPE_FIELDS)
 
         # Safety Passes CSV
         if not os.path.exists(self.passes_file):
             with open(self.passes_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(['pass_id', 'employee_id', 'pass_type_id', 'issue_date', 'expiry_date', 'status'])
+                writer.writerow(SAFETY_PASS_FIELDS)
 
-    def _load_employees(self) -> Dict[str, Employee]:
-        """Load employees from CSV"""
-        employees = {}
+        # Pass Requirements CSV
+        if not os.path.exists(self.requirements_file):
+            with open(self.requirements_file, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(REQUIREMENT_FIELDS)
+
+    def _read_rows(self, path: str, fieldnames: List[str]):
+        """Yield (line number, row) for a data file, remembering the rows as its last-synced copy"""
+        synced = {}
         try:
-            with open(self.employees_file, 'r') as f:
+            with open(path, 'r', newline='') as f:
+                self._known_signatures[path] = _file_signature(path)
                 reader = csv.DictReader(f)
                 for row in reader:
-                    emp = Employee(**row)
-                    employees[emp.employee_id] = emp
+                    for name in OPTIONAL_FIELDS.intersection(fieldnames):
+                        if row.get(name) is None:
+                            row[name] = ''
+                    synced[row[fieldnames[0]]] = tuple(row.get(name) for name in fieldnames)
+                    yield reader.line_num, {name: row.get(name) for name in fieldnames}
         except FileNotFoundError:
             pass
-        return employees
+        self._synced_rows[path] = synced
+
+    def _load_records(self, path: str, attribute: str, fieldnames: List[str], record_type) -> Dict[str, object]:
+        """Read a data file into records by primary key, quarantining invalid rows"""
+        records = {}
+        for line_number, row in self._read_rows(path, fieldnames):
+            problem = self._row_problem(attribute, row, records)
+            if problem:
+                self._quarantine(path, line_number, row, problem)
+                continue
+            records[row[fieldnames[0]]] = record_type.from_dict(row)
+        return records
+
+    def _load_employees(self) -> Dict[str, Employee]:
+        """Load employees from CSV"""
+        return self._load_records(self.employees_file, 'employees', EMPLOYEE_FIELDS, Employee)
 
     def _load_pass_types(self) -> Dict[str, SafetyPassType]:
         """Load safety pass types from CSV"""
-        pass_types = {}
-        try:
-            with open(self.pass_types_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    row['validity_period_days'] = int(row['validity_period_days'])
-                    pass_type = SafetyPassType(**row)
-                    pass_types[pass_type.pass_type_id] = pass_type
-        except FileNotFoundError:
-            pass
-        return pass_types
+        return self._load_records(self.pass_types_file, 'pass_types', PASS_TYPE_FIELDS, SafetyPassType)
 
     def _load_safety_passes(self) -> Dict[str, SafetyPass]:
-        """Load safety passes from CSV"""
-        passes = {}
+        """Load safety passes from CSV; employees and pass types must be loaded first"""
+        return self._load_records(self.passes_file, 'safety_passes', SAFETY_PASS_FIELDS, SafetyPass)
+
+    def _load_requirements(self) -> Dict[str, PassRequirement]:
+        """Load the required pass types per department from CSV; pass types must be loaded first"""
+        return self._load_records(self.requirements_file, 'requirements', REQUIREMENT_FIELDS, PassRequirement)
+
+    # Integrity checks
+    def _row_problem(self, attribute: str, row: Dict[str, str], records: Dict[str, object] = None) -> Optional[str]:
+        """Why a data file row is invalid, or None if it is fine.
+
+        records, when given, holds the rows of the same file accepted so far,
+        for the duplicate-ID check. References are checked against the
+        employee and pass type dicts, so the whole check is constant time per row.
+        """
+        fieldnames = {'employees': EMPLOYEE_FIELDS, 'pass_types': PASS_TYPE_FIELDS,
+                      'safety_passes': SAFETY_PASS_FIELDS, 'requirements': REQUIREMENT_FIELDS}[attribute]
+        missing = [name for name in fieldnames if row.get(name) is None]
+        if missing:
+            return f"missing column(s) {', '.join(missing)}"
+        key = row[fieldnames[0]]
+        if not key.strip():
+            return f"empty {fieldnames[0]}"
+        if records is not None and key in records:
+            return f"duplicate {fieldnames[0]} '{key}'"
+
+        if attribute == 'pass_types':
+            try:
+                if int(row['validity_period_days']) < 0:
+                    return "negative validity_period_days"
+            except ValueError:
+                return f"validity_period_days '{row['validity_period_days']}' is not a number"
+
+        elif attribute == 'safety_passes':
+            if row['employee_id'] not in self.employees:
+                return f"unknown employee '{row['employee_id']}'"
+            if row['pass_type_id'] not in self.pass_types:
+                return f"unknown pass type '{row['pass_type_id']}'"
+            for name in ('issue_date', 'expiry_date'):
+                if not is_iso_date(row[name]):
+                    return f"{name} '{row[name]}' is not a YYYY-MM-DD date"
+            if row['status'] not in PASS_STATUSES:
+                return f"unknown status '{row['status']}'"
+            if row['revoked_at']:
+                try:
+                    datetime.strptime(row['revoked_at'], TIMESTAMP_FORMAT)
+                except ValueError:
+                    return f"revoked_at '{row['revoked_at']}' is not a YYYY-MM-DD HH:MM:SS time"
+
+        elif attribute == 'requirements':
+            unknown = [pass_type_id for pass_type_id in PassRequirement.from_dict(row).pass_type_ids
+                       if pass_type_id not in self.pass_types]
+            if unknown:
+                return f"unknown pass type(s) {', '.join(unknown)}"
+        return None
+
+    def _quarantine(self, path: str, line_number: int, row: Dict[str, str], problem: str):
+        """Set an invalid row aside, to be moved to the file's quarantine side file"""
+        self._quarantined_rows.setdefault(path, []).append((line_number, row, problem))
+
+    def _quarantine_file(self, path: str) -> str:
+        """The side file holding rows quarantined from a data file"""
+        return os.path.splitext(path)[0] + ".quarantine.csv"
+
+    def _flush_quarantine(self):
+        """Append quarantined rows to their side files and rewrite the data files without them.
+
+        Caller holds the file lock. Moving the rows out means a bad row is
+        reported once, not on every load; fix it in the side file and
+        re-import it with bulk_import.
+        """
+        if not self._quarantined_rows:
+            return
+        fieldnames_by_file = {path: fieldnames for path, _, fieldnames, _ in self._data_files()}
+        quarantined_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+        for path, entries in self._quarantined_rows.items():
+            side_file = self._quarantine_file(path)
+            fieldnames = fieldnames_by_file[path] + QUARANTINE_FIELDS
+            write_header = not os.path.exists(side_file) or os.path.getsize(side_file) == 0
+            with open(side_file, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                if write_header:
+                    writer.writeheader()
+                for line_number, row, problem in entries:
+                    writer.writerow(dict(row, line=line_number, reason=problem, quarantined_at=quarantined_at))
+                    self.validation_report.problems.append(
+                        f"{os.path.basename(path)} line {line_number}: {problem}")
+            if os.path.basename(side_file) not in self.validation_report.quarantine_files:
+                self.validation_report.quarantine_files.append(os.path.basename(side_file))
+            self._dirty_files.add(path)
+        self._quarantined_rows = {}
+        self._flush_dirty_files()
+
+    @METRICS.timed('save')
+    def _write_csv(self, path: str, fieldnames: List[str], records):
+        """Write records to a temporary file and atomically swap it into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.data_folder, prefix='.tmp_', suffix='.csv')
+        synced = {}
         try:
-            with open(self.passes_file, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    safety_pass = SafetyPass(**row)
-                    passes[safety_pass.pass_id] = safety_pass
-        except FileNotFoundError:
-            pass
-        return passes
+            with os.fdopen(fd, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                for record in records:
+                    row = _record_row(record, fieldnames)
+                    synced[row[0]] = row
+                    writer.writerow(dict(zip(fieldnames, row)))
+            _copy_mode(tmp_path, path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._synced_rows[path] = synced
+        self._bump_version(path)
 
     def _save_employees(self):
         """Save employees to CSV"""
-        with open(self.employees_file, 'w', newline='') as f:
-            if self.employees:
-                fieldnames = ['employee_id', 'name', 'email', 'department', 'manager']
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                for emp in self.employees.values():
-                    writer.writerow(emp.to_dict())
+        with self._transaction():
+            self._touch('employees')
+            self._dirty_files.add(self.employees_file)
 
     def _save_pass_types(self):
         """Save pass types to CSV"""
-        with open(self.pass_types_file, 'w', newline='') as f:
-            if self.pass_types:
-                fieldnames = ['pass_type_id', 'name', 'description', 'category', 'validity_period_days']
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                for pass_type in self.pass_types.values():
-                    writer.writerow(pass_type.to_dict())
+        with self._transaction():
+            self._touch('pass_types')
+            self._dirty_files.add(self.pass_types_file)
 
     def _save_safety_passes(self):
         """Save safety passes to CSV"""
-        with open(self.passes_file, 'w', newline='') as f:
-            if self.safety_passes:
-                fieldnames = ['pass_id', 'employee_id', 'pass_type_id', 'issue_date', 'expiry_date', 'status']
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                for safety_pass in self.safety_passes.values():
-                    writer.writerow(safety_pass.to_dict())
+        with self._transaction():
+            self._touch('safety_passes')
+            self._dirty_files.add(self.passes_file)
+
+    def _save_requirements(self):
+        """Save pass requirements to CSV"""
+        with self._transaction():
+            self._touch('requirements')
+            self._dirty_files.add(self.requirements_file)
+
+    # Snapshots (safe to iterate while other threads mutate the manager)
+    def get_all_employees(self) -> List[Employee]:
+        """Get a snapshot list of all employees"""
+        with self._lock.read_locked():
+            return list(self.employees.values())
+
+    def get_all_pass_types(self) -> List[SafetyPassType]:
+        """Get a snapshot list of all safety pass types"""
+        with self._lock.read_locked():
+            return list(self.pass_types.values())
+
+    def get_all_passes(self) -> List[SafetyPass]:
+        """Get a snapshot list of all safety passes"""
+        with self._lock.read_locked():
+            return list(self.safety_passes.values())
 
     # Employee Management
     def add_employee(self, employee_id: str, name: str, email: str, department: str, manager: str):
         """Add a new employee"""
         employee = Employee(employee_id, name, email, department, manager)
-        self.employees[employee_id] = employee
-        self._save_employees()
-        print(f"Employee {name} added successfully!")
-
-    def remove_employee(self, employee_id: str):
-        """Remove an employee"""
-        if employee_id in self.employees:
-            name = self.employees[employee_id].name
-            del self.employees[employee_id]
+        with self._transaction():
+            previous = self.employees.get(employee_id)
+            self.employees[employee_id] = employee
+            self._record_change('employees', employee_id, previous, employee)
+            if previous is None:
+                self._audit('employee_added', employee_id=employee_id, name=name, department=department,
+                            manager=manager)
+            else:
+                self._audit('employee_updated', employee_id=employee_id,
+                            changes=_record_changes(previous, employee, EMPLOYEE_FIELDS))
             self._save_employees()
-            print(f"Employee {name} removed successfully!")
-        else:
-            print("Employee not found!")
+        self._say(f"Employee {name} added successfully!")
+
+    def remove_employee(self, employee_id: str, archive_passes: bool = True):
+        """Remove an employee, revoking their passes (see offboard_employees)"""
+        with self._transaction():
+            if employee_id in self.employees:
+                name = self.employees[employee_id].name
+                summary = self._offboard([employee_id], archive_passes)
+                self._say(f"Employee {name} removed successfully! "
+                           f"({summary.passes_revoked} passes revoked, {summary.passes_archived} archived)")
+            else:
+                self._say("Employee not found!")
+
+    @METRICS.timed('offboard_employees')
+    def offboard_employees(self, employee_ids, archive_passes: bool = True) -> OffboardingSummary:
+        """Remove leavers and revoke every pass they hold, in one transaction.
+
+        With archive_passes, their passes are also moved out of the passes
+        file into archived_passes.csv, so no pass is left pointing at a
+        missing employee. Each affected file is written once for the batch.
+        """
+        with self._transaction():
+            summary = self._offboard(employee_ids, archive_passes)
+        self._say(f"Offboarding: {summary}")
+        return summary
+
+    def _offboard(self, employee_ids, archive_passes: bool) -> OffboardingSummary:
+        """Offboard employees through the employee->passes index; caller holds the transaction"""
+        summary = OffboardingSummary()
+        archived_rows = []
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        for employee_id in employee_ids:
+            employee = self.employees.pop(employee_id, None)
+            if employee is None:
+                summary.not_found.append(employee_id)
+                continue
+            summary.employees_removed += 1
+            self._record_change('employees', employee_id, employee, None)
+            self._audit('employee_removed', employee_id=employee_id, name=employee.name)
+            for pass_id in list(self._passes_by_employee.get(employee_id, ())):
+                safety_pass = self.safety_passes[pass_id]
+                previous = replace(safety_pass)
+                if safety_pass.status != 'revoked':
+                    safety_pass.status = 'revoked'
+                    safety_pass.revoked_at = now.strftime(TIMESTAMP_FORMAT)
+                    self._audit('revoked', pass_id=pass_id, employee_id=employee_id, reason='offboarded')
+                    summary.passes_revoked += 1
+                if archive_passes:
+                    del self.safety_passes[pass_id]
+                    archived_rows.append(dict(safety_pass.to_dict(), employee_name=employee.name,
+                                              archived_date=today))
+                    summary.passes_archived += 1
+                self._update_pass_index(pass_id, previous)
+                if self.safety_passes.get(pass_id) != previous:
+                    self._record_change('safety_passes', pass_id, previous, self.safety_passes.get(pass_id))
+
+        if archived_rows:
+            self._append_archive(archived_rows)
+        if summary.employees_removed:
+            self._save_employees()
+        if summary.passes_revoked or summary.passes_archived:
+            self._save_safety_passes()
+        return summary
+
+    def _append_archive(self, rows: List[Dict[str, str]]):
+        """Append rows to the archived passes file; caller holds the file lock"""
+        write_header = not os.path.exists(self.archive_file) or os.path.getsize(self.archive_file) == 0
+        fieldnames = ARCHIVED_PASS_FIELDS
+        if not write_header:
+            # Keep to the existing file's columns, which may predate newer pass fields
+            with open(self.archive_file, 'r', newline='') as f:
+                fieldnames = next(csv.reader(f), None) or ARCHIVED_PASS_FIELDS
+        with open(self.archive_file, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
 
     def update_employee(self, employee_id: str, **kwargs):
         """Update employee information"""
-        if employee_id in self.employees:
-            for key, value in kwargs.items():
-                if hasattr(self.employees[employee_id], key):
-                    setattr(self.employees[employee_id], key, value)
-            self._save_employees()
-            print("Employee updated successfully!")
-        else:
-            print("Employee not found!")
+        with self._transaction():
+            if employee_id in self.employees:
+                previous = replace(self.employees[employee_id])
+                for key, value in kwargs.items():
+                    if hasattr(self.employees[employee_id], key):
+                        setattr(self.employees[employee_id], key, value)
+                changes = _record_changes(previous, self.employees[employee_id], EMPLOYEE_FIELDS)
+                if changes:
+                    self._record_change('employees', employee_id, previous, self.employees[employee_id])
+                    self._audit('employee_updated', employee_id=employee_id, changes=changes)
+                self._save_employees()
+                self._say("Employee updated successfully!")
+            else:
+                self._say("Employee not found!")
 
     # Safety Pass Type Management
     def add_pass_type(self, pass_type_id: str, name: str, description: str, category: str, validity_period_days: int):
         """Add a new safety pass type"""
         pass_type = SafetyPassType(pass_type_id, name, description, category, validity_period_days)
-        self.pass_types[pass_type_id] = pass_type
-        self._save_pass_types()
-        print(f"Safety pass type '{name}' added successfully!")
+        with self._transaction():
+            previous = self.pass_types.get(pass_type_id)
+            self.pass_types[pass_type_id] = pass_type
+            self._record_change('pass_types', pass_type_id, previous, pass_type)
+            self._save_pass_types()
+        self._say(f"Safety pass type '{name}' added successfully!")
 
     def remove_pass_type(self, pass_type_id: str):
         """Remove a safety pass type"""
-        if pass_type_id in self.pass_types:
-            name = self.pass_types[pass_type_id].name
-            del self.pass_types[pass_type_id]
-            self._save_pass_types()
-            print(f"Safety pass type '{name}' removed successfully!")
-        else:
-            print("Safety pass type not found!")
+        with self._transaction():
+            if pass_type_id in self.pass_types:
+                name = self.pass_types[pass_type_id].name
+                self._record_change('pass_types', pass_type_id, self.pass_types.pop(pass_type_id), None)
+                self._save_pass_types()
+                # No department can go on requiring a pass type that no longer exists
+                for department, requirement in list(self.requirements.items()):
+                    if pass_type_id in requirement.pass_type_ids:
+                        remaining = [type_id for type_id in requirement.pass_type_ids if type_id != pass_type_id]
+                        if remaining:
+                            self.requirements[department] = PassRequirement(department, remaining)
+                        else:
+                            del self.requirements[department]
+                        self._record_change('requirements', department, requirement,
+                                            self.requirements.get(department))
+                        self._save_requirements()
+                self._say(f"Safety pass type '{name}' removed successfully!")
+            else:
+                self._say("Safety pass type not found!")
 
     # Safety Pass Management
-    def issue_safety_pass(self, pass_id: str, employee_id: str, pass_type_id: str, issue_date: str = None):
-        """Issue a safety pass to an employee"""
-        if employee_id not in self.employees:
-            print("Employee not found!")
-            return
-
-        if pass_type_id not in self.pass_types:
-            print("Safety pass type not found!")
-            return
+    def issue_safety_pass(self, pass_id: Optional[str], employee_id: str, pass_type_id: str,
+                          issue_date: str = None) -> Optional[SafetyPass]:
+        """Issue a safety pass to an employee; returns the pass, or None if it could not be issued.
+
+        A pass_id of None allocates a new one; an existing pass is never replaced.
+        """
+        with self._transaction():
+            if pass_id and pass_id in self.safety_passes:
+                self._say(f"Safety pass ID '{pass_id}' is already in use!")
+                return None
+
+            if employee_id not in self.employees:
+                self._say("Employee not found!")
+                return None
+
+            if pass_type_id not in self.pass_types:
+                self._say("Safety pass type not found!")
+                return None
+
+            if issue_date is None:
+                issue_date = datetime.now().strftime('%Y-%m-%d')
+            elif not is_iso_date(issue_date):
+                self._say("Issue date must be YYYY-MM-DD!")
+                return None
+
+            expiry_date = self._calculate_expiry_date(pass_type_id, issue_date)
+            if not pass_id:
+                pass_id = self.reserve_pass_ids()[0]
+
+            safety_pass = SafetyPass(pass_id, employee_id, pass_type_id, issue_date, expiry_date, 'active')
+            self.safety_passes[pass_id] = safety_pass
+            self._update_pass_index(pass_id)
+            self._record_change('safety_passes', pass_id, None, safety_pass)
+            self._audit('issued', pass_id=pass_id, employee_id=employee_id, pass_type_id=pass_type_id,
+                        issue_date=issue_date, expiry_date=expiry_date)
+            self._save_safety_passes()
 
-        if issue_date is None:
-            issue_date = datetime.now().strftime('%Y-%m-%d')
+            employee_name = self.employees[employee_id].name
+            pass_name = self.pass_types[pass_type_id].name
+        self._say(f"Safety pass '{pass_name}' issued to {employee_name}, expires on {expiry_date}")
+        return safety_pass
 
-        # Calculate expiry date
+    def _calculate_expiry_date(self, pass_type_id: str, issue_date: str) -> str:
+        """Expiry date of a pass of the given type issued on issue_date"""
         issue_dt = datetime.strptime(issue_date, '%Y-%m-%d')
         validity_days = self.pass_types[pass_type_id].validity_period_days
         expiry_dt = issue_dt + timedelta(days=validity_days)
-        expiry_date = expiry_dt.strftime('%Y-%m-%d')
-
-        safety_pass = SafetyPass(pass_id, employee_id, pass_type_id, issue_date, expiry_date, 'active')
-        self.safety_passes[pass_id] = safety_pass
-        self._save_safety_passes()
-
-        employee_name = self.employees[employee_id].name
-        pass_name = self.pass_types[pass_type_id].name
-        print(f"Safety pass '{pass_name}' issued to {employee_name}, expires on {expiry_date}")
-
-    def revoke_safety_pass(self, pass_id: str):
-        """Revoke a safety pass"""
-        if pass_id in self.safety_passes:
-            self.safety_passes[pass_id].status = 'revoked'
+        return expiry_dt.strftime('%Y-%m-%d')
+
+    def find_employees(self, department: str = None, manager: str = None, employee_ids=None) -> List[str]:
+        """IDs of the employees matching every given criterion"""
+        with self._lock.read_locked():
+            if employee_ids is not None:
+                candidates = [emp_id for emp_id in employee_ids if emp_id in self.employees]
+            elif department is None and manager is None:
+                candidates = list(self.employees)
+            else:
+                # Straight from the team views
+                teams = [self._team_views[field_name].get(name, TeamView()).members
+                         for field_name, name in (('department', department), ('manager', manager))
+                         if name is not None]
+                return sorted(set.intersection(*teams))
+            return [emp_id for emp_id in candidates
+                    if (department is None or self.employees[emp_id].department == department)
+                    and (manager is None or self.employees[emp_id].manager == manager)]
+
+    def bulk_issue_passes(self, pass_type_id: str, employee_ids, issue_date: str = None,
+                          renew_only: bool = False) -> List[SafetyPass]:
+        """Issue one pass type to many employees, saving once.
+
+        With renew_only, only employees who already hold (or held) a
+        non-revoked pass of that type get a new one. Unknown employees are
+        skipped. Returns the passes issued.
+        """
+        with self._transaction():
+            if pass_type_id not in self.pass_types:
+                self._say("Safety pass type not found!")
+                return []
+            if issue_date is not None and not is_iso_date(issue_date):
+                self._say("Issue date must be YYYY-MM-DD!")
+                return []
+            employee_ids = [emp_id for emp_id in employee_ids if emp_id in self.employees]
+            if renew_only:
+                employee_ids = [emp_id for emp_id in employee_ids if (emp_id, pass_type_id) in self._clearance]
+            issued = self._issue_many([(emp_id, pass_type_id) for emp_id in employee_ids], issue_date,
+                                      'renewed' if renew_only else 'issued')
+        self._say(f"Issued {len(issued)} '{self.pass_types[pass_type_id].name}' passes")
+        return issued
+
+    def renew_passes(self, pass_ids, issue_date: str = None) -> List[SafetyPass]:
+        """Issue a fresh pass of the same type to the holder of each given pass, saving once"""
+        with self._transaction():
+            if issue_date is not None and not is_iso_date(issue_date):
+                self._say("Issue date must be YYYY-MM-DD!")
+                return []
+            renewing = [self.safety_passes[pass_id] for pass_id in pass_ids if pass_id in self.safety_passes]
+            renewing = [p for p in renewing if p.employee_id in self.employees and p.pass_type_id in self.pass_types]
+            issued = self._issue_many([(p.employee_id, p.pass_type_id) for p in renewing], issue_date,
+                                      'renewed', [p.pass_id for p in renewing])
+        self._say(f"Renewed {len(issued)} passes")
+        return issued
+
+    def _issue_many(self, pairs, issue_date: str = None, event: str = 'issued',
+                    renewed_from: List[str] = None) -> List[SafetyPass]:
+        """Issue passes for (employee_id, pass_type_id) pairs; caller holds the transaction.
+
+        event names them in the audit log; renewed_from, if given, holds the
+        pass each one replaces. issue_date must already have been checked,
+        since pass IDs are reserved for every pair.
+        """
+        if issue_date is None:
+            issue_date = datetime.now().strftime('%Y-%m-%d')
+        # Every pass of a type issued on the same day expires on the same day
+        expiry_dates = {}
+        issued = []
+        for i, ((employee_id, pass_type_id), pass_id) in enumerate(zip(pairs, self.reserve_pass_ids(len(pairs)))):
+            if pass_type_id not in expiry_dates:
+                expiry_dates[pass_type_id] = self._calculate_expiry_date(pass_type_id, issue_date)
+            safety_pass = SafetyPass(pass_id, employee_id, pass_type_id, issue_date,
+                                     expiry_dates[pass_type_id], 'active')
+            self.safety_passes[pass_id] = safety_pass
+            self._update_pass_index(pass_id)
+            self._record_change('safety_passes', pass_id, None, safety_pass)
+            details = {'renewed_from': renewed_from[i]} if renewed_from else {}
+            self._audit(event, pass_id=pass_id, employee_id=employee_id, pass_type_id=pass_type_id,
+                        issue_date=issue_date, expiry_date=safety_pass.expiry_date, **details)
+            issued.append(safety_pass)
+        if issued:
             self._save_safety_passes()
-            print("Safety pass revoked successfully!")
-        else:
-            print("Safety pass not found!")
+        return issued
+
+    def revoke_safety_pass(self, pass_id: str) -> bool:
+        """Revoke a safety pass; returns whether the pass was found"""
+        with self._transaction():
+            if pass_id in self.safety_passes:
+                safety_pass = self.safety_passes[pass_id]
+                previous = replace(safety_pass)
+                if safety_pass.status != 'revoked':
+                    safety_pass.status = 'revoked'
+                    safety_pass.revoked_at = datetime.now().strftime(TIMESTAMP_FORMAT)
+                    self._audit('revoked', pass_id=pass_id, employee_id=safety_pass.employee_id)
+                    self._record_change('safety_passes', pass_id, previous, safety_pass)
+                self._update_pass_index(pass_id, previous)
+                self._save_safety_passes()
+                self._say("Safety pass revoked successfully!")
+                return True
+            else:
+                self._say("Safety pass not found!")
+                return False
 
     def get_employee_passes(self, employee_id: str) -> List[SafetyPass]:
         """Get all passes for an employee"""
-        return [pass_obj for pass_obj in self.safety_passes.values()
-                if pass_obj.employee_id == employee_id and pass_obj.status == 'active']
-
+        with self._lock.read_locked():
+            passes = [self.safety_passes[pass_id] for pass_id in self._passes_by_employee.get(employee_id, ())]
+            return [pass_obj for pass_obj in passes if pass_obj.status == 'active']
+
+    def is_cleared(self, employee_id: str, pass_type_id: str, on_date=None) -> bool:
+        """Check whether an employee holds a valid pass of a type on a date (default today).
+
+        A pass is valid from its issue date through its expiry date unless it
+        has been revoked. This is a couple of dict lookups with no locking,
+        fast enough to run on every badge scan.
+        """
+        if on_date is None:
+            on_date = date.today().isoformat()
+        elif not isinstance(on_date, str):
+            on_date = on_date.strftime('%Y-%m-%d')
+
+        windows = self._clearance.get((employee_id, pass_type_id))
+        if windows is None or employee_id not in self.employees:
+            return False
+        for expiry_date, issue_date in windows:
+            if expiry_date < on_date:
+                # Windows are ordered by expiry, so no later one can cover on_date
+                return False
+            if issue_date <= on_date:
+                return True
+        return False
+
+    # Point-in-time Queries
+    def _as_of_day(self, on_date=None) -> str:
+        on_date = on_date or date.today()
+        return on_date if isinstance(on_date, str) else on_date.isoformat()
+
+    def count_valid_passes(self, pass_type_id: str, on_date=None) -> int:
+        """How many passes of a type were valid on a date (default today), in O(log N)"""
+        with self._lock.read_locked():
+            timeline = self._timelines.get(pass_type_id)
+            return timeline.count_valid(self._as_of_day(on_date)) if timeline else 0
+
+    def _valid_pass_ids(self, day: str, pass_type_id: str = None) -> List[str]:
+        if pass_type_id is None:
+            timelines = list(self._timelines.values())
+        else:
+            timelines = [self._timelines[pass_type_id]] if pass_type_id in self._timelines else []
+        return [pass_id for timeline in timelines for pass_id in timeline.valid_pass_ids(day)]
+
+    @METRICS.timed('get_passes_as_of')
+    def get_passes_as_of(self, on_date, pass_type_id: str = None) -> List[SafetyPass]:
+        """Passes that were valid on a date, of one type or all, by pass ID.
+
+        Validity is as for SafetyPass.validity_span: from issue through expiry,
+        ending the day a pass was revoked, whatever its status says today.
+        """
+        with self._lock.read_locked():
+            pass_ids = self._valid_pass_ids(self._as_of_day(on_date), pass_type_id)
+            return [self.safety_passes[pass_id] for pass_id in sorted(pass_ids)]
+
+    @METRICS.timed('get_cleared_employees')
+    def get_cleared_employees(self, pass_type_id: str, on_date=None) -> List[str]:
+        """IDs of the employees who held a valid pass of a type on a date (default today)"""
+        with self._lock.read_locked():
+            passes = self.safety_passes
+            return sorted({passes[pass_id].employee_id
+                           for pass_id in self._valid_pass_ids(self._as_of_day(on_date), pass_type_id)})
+
+    @METRICS.timed('get_expiring_passes')
     def get_expiring_passes(self, days_ahead: int = 15) -> List[SafetyPass]:
         """Get passes expiring within specified days"""
+        return list(self._cached(('expiring_passes', days_ahead), ('safety_passes',),
+                                 lambda: self._find_expiring_passes(days_ahead)))
+
+    @staticmethod
+    def _expiry_window(days_ahead: int) -> tuple:
+        """(earliest, latest) expiry dates that can be 1 to days_ahead days away.
+
+        Dates compare as strings; the window is widened by a day on each side
+        and the exact day count is only computed for passes inside it.
+        """
+        today = date.today()
+        return (today + timedelta(days=1)).isoformat(), (today + timedelta(days=days_ahead + 1)).isoformat()
+
+    def _find_expiring_passes(self, days_ahead: int) -> List[SafetyPass]:
         expiring_passes = []
-        for safety_pass in self.safety_passes.values():
-            if safety_pass.status == 'active':
-                days_until_expiry = safety_pass.days_until_expiry()
-                if 1 <= days_until_expiry <= days_ahead:
-                    expiring_passes.append(safety_pass)
+        earliest, latest = self._expiry_window(days_ahead)
+        with self._lock.read_locked():
+            for safety_pass in self.safety_passes.values():
+                if safety_pass.status == 'active' and earliest <= safety_pass.expiry_date <= latest:
+                    days_until_expiry = safety_pass.days_until_expiry()
+                    if 1 <= days_until_expiry <= days_ahead:
+                        expiring_passes.append(safety_pass)
         return expiring_passes
 
+    @METRICS.timed('get_renewal_forecast')
+    def get_renewal_forecast(self, horizon_days: int = 91, period: str = 'week') -> List[tuple]:
+        """Renewals falling due from today through the horizon, bucketed by week or month.
+
+        Returns (period start, pass_type_id, category, department, passes due)
+        tuples, sorted, for active passes. Weeks start on Monday.
+        """
+        return list(self._cached(('renewal_forecast', horizon_days, period),
+                                 ('employees', 'pass_types', 'safety_passes'),
+                                 lambda: self._compute_renewal_forecast(horizon_days, period)))
+
+    def _compute_renewal_forecast(self, horizon_days: int, period: str) -> List[tuple]:
+        if period not in ('week', 'month'):
+            raise ValueError(f"Unknown forecast period '{period}'")
+        today = date.today()
+        first, last = today.isoformat(), (today + timedelta(days=horizon_days)).isoformat()
+        # Passes share few expiry dates: each is mapped to its period start once
+        period_starts = {}
+        counts = {}
+        with self._lock.read_locked():
+            for safety_pass in self.safety_passes.values():
+                expiry_date = safety_pass.expiry_date
+                if safety_pass.status != 'active' or not first <= expiry_date <= last:
+                    continue
+                start = period_starts.get(expiry_date)
+                if start is None:
+                    expiry = date.fromisoformat(expiry_date)
+                    start = (expiry - timedelta(days=expiry.weekday()) if period == 'week'
+                             else expiry.replace(day=1)).isoformat()
+                    period_starts[expiry_date] = start
+                employee = self.employees.get(safety_pass.employee_id)
+                key = (start, safety_pass.pass_type_id, employee.department if employee else 'Unknown')
+                counts[key] = counts.get(key, 0) + 1
+
+            forecast = []
+            for (start, pass_type_id, department), count in sorted(counts.items()):
+                pass_type = self.pass_types.get(pass_type_id)
+                forecast.append((start, pass_type_id, pass_type.category if pass_type else 'Unknown',
+                                 department, count))
+        return forecast
+
+    # Search
+    @METRICS.timed('search_employees')
+    def search_employees(self, query: str, limit: Optional[int] = 50, fuzzy: bool = True) -> List[Employee]:
+        """Employees with a word of their name, ID, email or department starting with each query word.
+
+        Numbers match without leading zeros ('123' finds EMP000123). With
+        fuzzy, a query word that starts no word at all matches as if one typo
+        were corrected. Best matches first; limit=None returns every match.
+        """
+        with self._lock.read_locked():
+            return [self.employees[employee_id]
+                    for employee_id in self._search_index('employees').search(query, limit, fuzzy)]
+
+    @METRICS.timed('search_passes')
+    def search_passes(self, query: str, limit: Optional[int] = 50, fuzzy: bool = True,
+                      holders: bool = False) -> List[SafetyPass]:
+        """Safety passes whose pass ID starts with the query, or ends with it as a number.
+
+        With holders, these are followed by every pass of the employees
+        search_employees finds.
+        """
+        with self._lock.read_locked():
+            pass_ids = self._search_index('safety_passes').search(query, limit, fuzzy)
+            if holders and (limit is None or len(pass_ids) < limit):
+                found = dict.fromkeys(pass_ids)
+                for employee_id in self._search_index('employees').search(query, None, fuzzy):
+                    found.update(dict.fromkeys(self._passes_by_employee.get(employee_id, ())))
+                    if limit is not None and len(found) >= limit:
+                        break
+                pass_ids = list(found)[:limit]
+            return [self.safety_passes[pass_id] for pass_id in pass_ids]
+
+    def build_search_indexes(self):
+        """Build the search indexes now, rather than on the first search"""
+        with self._lock.read_locked():
+            for entity in ('employees', 'safety_passes'):
+                self._search_index(entity)
+
+    # Sorting
+    @METRICS.timed('get_sorted_page')
+    def get_sorted_page(self, entity: str, column: str, descending: bool = False, start: int = 0,
+                        count: Optional[int] = 50, matches: Callable[[object], bool] = None,
+                        keys: Iterable[str] = None) -> List:
+        """Employees or passes in order of a column of SORT_COLUMNS: count records from position start.
+
+        Only records that matches accepts, and, if keys is given, only those
+        records, are counted. The order comes from a sorted index maintained
+        on every change, so a page costs about start + count steps (or a sort
+        of keys), however large the table.
+        """
+        with self._lock.read_locked():
+            index = self._sorted_index(entity, column)
+            records = getattr(self, entity)
+            if keys is None:
+                ordered = index.keys(descending)
+            else:
+                ordered = sorted((key for key in keys if key in records),
+                                 key=lambda key: (index.values[key], key), reverse=descending)
+            page = []
+            for key in ordered:
+                record = records[key]
+                if matches is None or matches(record):
+                    if start:
+                        start -= 1
+                    else:
+                        page.append(record)
+                        if len(page) == count:
+                            break
+            return page
+
+    def employee_matches_search(self, employee_id: str, query: str) -> bool:
+        """Whether search_employees(query, fuzzy=False) would find the employee"""
+        with self._lock.read_locked():
+            return self._search_index('employees').matches(employee_id, query)
+
+    def pass_matches_search(self, safety_pass: SafetyPass, query: str) -> bool:
+        """Whether search_passes(query, fuzzy=False, holders=True) would find the pass"""
+        with self._lock.read_locked():
+            return (self._search_index('safety_passes').matches(safety_pass.pass_id, query)
+                    or self._search_index('employees').matches(safety_pass.employee_id, query))
+
+    # Team Views
+    def get_team_names(self, by: str) -> List[str]:
+        """Every department (by='department') or manager (by='manager') with team members"""
+        with self._lock.read_locked():
+            return sorted(name for name, view in self._team_views[by].items() if view.members)
+
+    def _team_expiring_passes(self, view: TeamView, days_ahead: int) -> List[SafetyPass]:
+        earliest, latest = self._expiry_window(days_ahead)
+        candidates = (self.safety_passes[pass_id] for pass_id in view.pass_ids_expiring(earliest, latest))
+        return [p for p in candidates if 1 <= p.days_until_expiry() <= days_ahead]
+
+    def get_team_summary(self, by: str, name: str, days_ahead: int = 30) -> TeamSummary:
+        """Members, active passes and passes expiring within days_ahead for one team"""
+        with self._lock.read_locked():
+            view = self._team_views[by].get(name, TeamView())
+            return TeamSummary(name, len(view.members), len(view.active),
+                               len(self._team_expiring_passes(view, days_ahead)))
+
+    @METRICS.timed('get_team_summaries')
+    def get_team_summaries(self, by: str, days_ahead: int = 30) -> List[TeamSummary]:
+        """A TeamSummary for every department or every manager, by name"""
+        with self._lock.read_locked():
+            return [self.get_team_summary(by, name, days_ahead) for name in self.get_team_names(by)]
+
+    @METRICS.timed('get_team_passes')
+    def get_team_passes(self, by: str, name: str, status: str = None, expiring_within: int = None) -> List[SafetyPass]:
+        """Passes held by a team's members, optionally of one status or expiring within some days.
+
+        Active and expiring passes come straight from the team view, soonest
+        expiry first; other statuses are gathered from the members' passes.
+        """
+        with self._lock.read_locked():
+            view = self._team_views[by].get(name, TeamView())
+            if expiring_within is not None:
+                return self._team_expiring_passes(view, expiring_within)
+            if status == 'active':
+                return [self.safety_passes[pass_id] for _, pass_id in view.active]
+            passes = [self.safety_passes[pass_id] for employee_id in sorted(view.members)
+                      for pass_id in self._passes_by_employee.get(employee_id, ())]
+            return [p for p in passes if status is None or p.status == status]
+
+    # Pass Requirements and Compliance
+    def set_requirements(self, department: str, pass_type_ids: List[str]) -> bool:
+        """Set the pass types everyone in a department ('*': everyone) must hold; an empty list clears them"""
+        with self._transaction():
+            unknown = [pass_type_id for pass_type_id in pass_type_ids if pass_type_id not in self.pass_types]
+            if unknown:
+                self._say(f"Safety pass type(s) not found: {', '.join(unknown)}")
+                return False
+            previous = self.requirements.get(department)
+            if pass_type_ids:
+                self.requirements[department] = PassRequirement(department, list(dict.fromkeys(pass_type_ids)))
+            elif self.requirements.pop(department, None) is None:
+                return True
+            self._record_change('requirements', department, previous, self.requirements.get(department))
+            self._save_requirements()
+        self._say(f"Requirements for '{department}' set to: {', '.join(pass_type_ids) or 'none'}")
+        return True
+
+    def get_required_pass_types(self, employee_id: str) -> set:
+        """Pass type IDs an employee must hold: their department's plus the site-wide ('*') ones"""
+        employee = self.employees.get(employee_id)
+        if employee is None:
+            return set()
+        required = set()
+        for department in (employee.department, '*'):
+            requirement = self.requirements.get(department)
+            if requirement is not None:
+                required.update(requirement.pass_type_ids)
+        return required
+
+    @METRICS.timed('get_compliance_gaps')
+    def get_compliance_gaps(self, warning_days: int = 30) -> List[ComplianceGap]:
+        """Every required pass that is missing, expired, or expiring within warning_days, per employee"""
+        return list(self._cached(('compliance_gaps', warning_days), tuple(self._table_versions),
+                                 lambda: self._compute_compliance_gaps(warning_days)))
+
+    def _compute_compliance_gaps(self, warning_days: int) -> List[ComplianceGap]:
+        today = date.today()
+        today_str = today.isoformat()
+        warn_until = (today + timedelta(days=warning_days)).isoformat()
+        gaps = []
+        with self._lock.read_locked():
+            # Required pass types per department, resolved once, as sets
+            site_wide = set(self.requirements['*'].pass_type_ids) if '*' in self.requirements else set()
+            required_by_department = {}
+            for employee_id, employee in self.employees.items():
+                required = required_by_department.get(employee.department)
+                if required is None:
+                    requirement = self.requirements.get(employee.department)
+                    required = site_wide | set(requirement.pass_type_ids if requirement else ())
+                    required_by_department[employee.department] = required
+                if not required:
+                    continue
+
+                # Pass types the employee has held, from the clearance index; the rest are missing
+                held = {pass_type_id for pass_type_id in required if (employee_id, pass_type_id) in self._clearance}
+                for pass_type_id in sorted(required - held):
+                    gaps.append(ComplianceGap(employee_id, pass_type_id, 'missing'))
+                for pass_type_id in sorted(held):
+                    # Latest expiry among passes that have started; windows are latest expiry first
+                    expiry = next((expiry for expiry, issue in self._clearance[(employee_id, pass_type_id)]
+                                   if issue <= today_str), None)
+                    if expiry is None:
+                        gaps.append(ComplianceGap(employee_id, pass_type_id, 'missing'))
+                    elif expiry < today_str:
+                        gaps.append(ComplianceGap(employee_id, pass_type_id, 'expired', expiry))
+                    elif expiry <= warn_until:
+                        gaps.append(ComplianceGap(employee_id, pass_type_id, 'expiring', expiry))
+        return gaps
+
+    @METRICS.timed('expiry_sweep')
     def update_expired_passes(self):
         """Update status of expired passes"""
         today = datetime.now().strftime('%Y-%m-%d')
-        for safety_pass in self.safety_passes.values():
-            if safety_pass.status == 'active' and safety_pass.expiry_date < today:
-                safety_pass.status = 'expired'
-        self._save_safety_passes()
+        with self._transaction():
+            expired = 0
+            for safety_pass in self.safety_passes.values():
+                if safety_pass.status == 'active' and safety_pass.expiry_date < today:
+                    expired += 1
+                    previous = replace(safety_pass)
+                    safety_pass.status = 'expired'
+                    self._record_change('safety_passes', safety_pass.pass_id, previous, safety_pass)
+                    self._audit('expired', pass_id=safety_pass.pass_id, employee_id=safety_pass.employee_id,
+                                expiry_date=safety_pass.expiry_date)
+            # An unchanged file is not rewritten, so other processes have nothing to reload
+            if expired:
+                self._save_safety_passes()
+
+    # Bulk Import
+    @METRICS.timed('bulk_import')
+    def bulk_import(self, table: str, rows, delete_missing: bool = False) -> ImportSummary:
+        """Apply rows from an export file to 'employees', 'pass_types' or 'passes'.
+
+        Rows are streamed and each is compared by primary key against a hash
+        of the current record, so only inserts, updates and (with
+        delete_missing, for full exports such as a nightly HR roster) deletes
+        are applied, and the file is written once, only if something changed.
+        Pass rows may leave out expiry_date and status, as in a pass issuance
+        file; those are then calculated as for issue_safety_pass.
+        """
+        attribute, fieldnames, record_type, save = {
+            'employees': ('employees', EMPLOYEE_FIELDS, Employee, self._save_employees),
+            'pass_types': ('pass_types', PASS_TYPE_FIELDS, SafetyPassType, self._save_pass_types),
+            'passes': ('safety_passes', SAFETY_PASS_FIELDS, SafetyPass, self._save_safety_passes),
+        }[table]
+        summary = ImportSummary()
+
+        with self._transaction():
+            records = getattr(self, attribute)
+            fingerprints = {key: hash(_record_row(record, fieldnames)) for key, record in records.items()}
+            seen = set()
+
+            for line_number, row in enumerate(rows, start=2):
+                try:
+                    if table == 'passes':
+                        record = self._pass_from_import_row(row)
+                    else:
+                        record = record_type.from_dict({name: row.get(name) for name in fieldnames})
+                    problem = self._row_problem(attribute, dict(zip(fieldnames, _record_row(record, fieldnames))))
+                    if problem:
+                        raise ValueError(problem)
+                except (KeyError, TypeError, ValueError) as e:
+                    summary.errors.append(f"line {line_number}: {e}")
+                    continue
+
+                key = getattr(record, fieldnames[0])
+                seen.add(key)
+                fingerprint = hash(_record_row(record, fieldnames))
+                if fingerprints.get(key) == fingerprint:
+                    summary.unchanged += 1
+                    continue
+
+                existing = records.get(key)
+                previous = None
+                if existing is None:
+                    records[key] = record
+                    summary.inserted += 1
+                else:
+                    # Update in place so references held elsewhere stay valid
+                    previous = replace(existing)
+                    for name in fieldnames:
+                        setattr(existing, name, getattr(record, name))
+                    summary.updated += 1
+                fingerprints[key] = fingerprint
+                if table == 'passes':
+                    self._update_pass_index(key, previous)
+                self._record_change(attribute, key, previous, records[key])
+                self._audit_record_change(attribute, key, records[key], previous, fieldnames, 'import')
+
+            if delete_missing:
+                missing = [key for key in records if key not in seen]
+                if table == 'employees':
+                    # Leavers in a full roster are offboarded, not just deleted
+                    summary.deleted += self._offboard(missing, archive_passes=True).employees_removed
+                else:
+                    for key in missing:
+                        previous = records.pop(key)
+                        if table == 'passes':
+                            self._update_pass_index(key, previous)
+                        self._record_change(attribute, key, previous, None)
+                        self._audit_record_change(attribute, key, None, previous, fieldnames, 'import')
+                        summary.deleted += 1
+
+            if summary.inserted or summary.updated or summary.deleted:
+                save()
+        return summary
+
+    def _audit_record_change(self, attribute: str, key: str, record, previous, fieldnames: List[str],
+                             source: str):
+        """Record an imported or externally written employee or pass row in the audit log.
+
+        The row is logged as the lifecycle event it amounts to; record is None
+        for a removed row and previous is None for a new one.
+        """
+        if attribute == 'employees':
+            if record is None:
+                self._audit('employee_removed', employee_id=key, name=previous.name, source=source)
+            elif previous is None:
+                self._audit('employee_added', employee_id=key, name=record.name,
+                            department=record.department, manager=record.manager, source=source)
+            else:
+                self._audit('employee_updated', employee_id=key,
+                            changes=_record_changes(previous, record, fieldnames), source=source)
+        elif attribute == 'safety_passes':
+            if record is None:
+                self._audit('pass_deleted', pass_id=key, employee_id=previous.employee_id, source=source)
+            elif previous is None:
+                self._audit('issued', pass_id=key, employee_id=record.employee_id,
+                            pass_type_id=record.pass_type_id, issue_date=record.issue_date,
+                            expiry_date=record.expiry_date, source=source)
+            elif record.status != previous.status and record.status in ('revoked', 'expired'):
+                self._audit(record.status, pass_id=key, employee_id=record.employee_id, source=source)
+            else:
+                self._audit('pass_updated', pass_id=key, employee_id=record.employee_id,
+                            changes=_record_changes(previous, record, fieldnames), source=source)
+
+    def _pass_from_import_row(self, row: Dict[str, str]) -> SafetyPass:
+        """Build a pass from an import row, filling in expiry and status if absent"""
+        for name in ('pass_id', 'employee_id', 'pass_type_id'):
+            if not row.get(name):
+                raise ValueError(f"{name} is required")
+        if row['employee_id'] not in self.employees:
+            raise ValueError(f"unknown employee '{row['employee_id']}'")
+        if row['pass_type_id'] not in self.pass_types:
+            raise ValueError(f"unknown pass type '{row['pass_type_id']}'")
+
+        # Re-importing an issuance file keeps an existing pass's issue date and
+        # status, so it is reported unchanged and a revoked pass stays revoked
+        existing = self.safety_passes.get(row['pass_id'])
+        issue_date = (row.get('issue_date') or (existing.issue_date if existing else None)
+                      or datetime.now().strftime('%Y-%m-%d'))
+        expiry_date = row.get('expiry_date') or self._calculate_expiry_date(row['pass_type_id'], issue_date)
+        status = row.get('status') or (existing.status if existing else 'active')
+        revoked_at = row.get('revoked_at') or (existing.revoked_at if existing and status == 'revoked' else '')
+        return SafetyPass(row['pass_id'], row['employee_id'], row['pass_type_id'],
+                          issue_date, expiry_date, status, revoked_at)
+
+    @METRICS.timed('get_statistics')
+    def get_statistics(self) -> Dict[str, int]:
+        """Counts of employees, pass types and passes by status"""
+        return dict(self._cached('statistics', ('employees', 'pass_types', 'safety_passes'),
+                                 self._compute_statistics))
+
+    def _compute_statistics(self) -> Dict[str, int]:
+        with self._lock.read_locked():
+            statuses = [p.status for p in self.safety_passes.values()]
+            return {
+                'employees': len(self.employees),
+                'pass_types': len(self.pass_types),
+                'total_passes': len(statuses),
+                'active_passes': statuses.count('active'),
+                'expired_passes': statuses.count('expired'),
+                'revoked_passes': statuses.count('revoked'),
+                'expiring_soon': len(self.get_expiring_passes(15)),
+            }
 
     # Reporting and Display
     def display_employees(self):
         """Display all employees"""
-        if not self.employees:
+        employees = self.get_all_employees()
+        if not employees:
             print("No employees found.")
             return
 
         print("\n=== EMPLOYEES ===")
-        for emp in self.employees.values():
+        for emp in employees:
             print(f"ID: {emp.employee_id}, Name: {emp.name}, Email: {emp.email}, Dept: {emp.department}")
 
     def display_pass_types(self):
         """Display all safety pass types"""
-        if not self.pass_types:
+        pass_types = self.get_all_pass_types()
+        if not pass_types:
             print("No safety pass types found.")
             return
 
         print("\n=== SAFETY PASS TYPES ===")
-        for pass_type in self.pass_types.values():
+        for pass_type in pass_types:
             print(
                 f"ID: {pass_type.pass_type_id}, Name: {pass_type.name}, Category: {pass_type.category}, Valid for: {pass_type.validity_period_days} days")
 
@@ -312,6 +2751,278 @@ class SafetyPassManager:
             print(f"Pass: {pass_name}, Expires: {safety_pass.expiry_date}, Days left: {days_left}")
 
 
+# Report Engine
+REPORT_FORMATS = ('text', 'csv', 'html')
+
+
+@dataclass
+class Report:
+    """A titled report whose rows are produced lazily, one tuple per record"""
+    title: str
+    columns: List[str]
+    rows: Iterable[tuple]
+    # Formats one row as a block of text for the on-screen and plain-text output
+    format_text: Callable[[tuple], str] = None
+    empty_message: str = "No records found."
+
+
+def iter_report_text(report: Report) -> Iterator[str]:
+    """Yield a report as plain text: the heading, then one block per row"""
+    yield f"{report.title}\n{'=' * max(len(report.title), 25)}\n\n"
+    format_text = report.format_text or (
+        lambda row: "".join(f"   {column}: {value}\n" for column, value in zip(report.columns, row)) + "\n")
+    empty = True
+    for row in report.rows:
+        empty = False
+        yield format_text(row)
+    if empty:
+        yield report.empty_message + "\n"
+
+
+def write_report(report: Report, out, fmt: str = 'text'):
+    """Stream a report to an open text file as 'text', 'csv' or 'html', row by row"""
+    if fmt == 'text':
+        out.writelines(iter_report_text(report))
+    elif fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(report.columns)
+        writer.writerows(report.rows)
+    elif fmt == 'html':
+        title = html.escape(report.title)
+        out.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title></head>\n"
+                  f"<body><h1>{title}</h1>\n<table border=\"1\">\n<tr>"
+                  + "".join(f"<th>{html.escape(column)}</th>" for column in report.columns) + "</tr>\n")
+        for row in report.rows:
+            out.write("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>\n")
+        out.write("</table>\n</body></html>\n")
+    else:
+        raise ValueError(f"Unknown report format '{fmt}'")
+
+
+class ReportEngine:
+    """Builds the standard reports over a manager's data.
+
+    Each report takes a snapshot of the records it covers when its first row
+    is requested, then generates its rows on demand, so a report can be
+    rendered or written out incrementally without ever holding its full text
+    in memory. The rows of a fully read report are cached until the data or
+    the date changes.
+    """
+
+    REPORTS = {
+        'expiring': 'expiring_passes',
+        'expired': 'expired_passes',
+        'active': 'active_passes',
+        'employees': 'employee_summary',
+        'stats': 'system_statistics',
+        'forecast': 'renewal_forecast',
+        'compliance': 'compliance_gaps',
+        'departments': 'team_summary',
+    }
+
+    def __init__(self, manager: 'SafetyPassManager'):
+        self.manager = manager
+
+    def build(self, name: str) -> Report:
+        """The report registered under a short name such as 'expiring'"""
+        report = getattr(self, self.REPORTS[name])()
+        key = ('report', name)
+        versions = self.manager._cache_versions(tuple(self.manager._table_versions))
+        hit, rows = self.manager._cache.get(key, versions)
+        report.rows = iter(rows) if hit else self._recorded(report.rows, key, versions)
+        return report
+
+    def _recorded(self, rows, key, versions):
+        """Pass rows through, caching them once the report has been read to the end"""
+        seen = []
+        for row in rows:
+            seen.append(row)
+            yield row
+        self.manager._cache.put(key, versions, seen)
+
+    def _names(self, safety_pass: SafetyPass):
+        """(employee name, employee email, pass type name) for a pass"""
+        employee = self.manager.employees.get(safety_pass.employee_id)
+        pass_type = self.manager.pass_types.get(safety_pass.pass_type_id)
+        return (employee.name if employee else 'Unknown', employee.email if employee else 'Unknown',
+                pass_type.name if pass_type else 'Unknown')
+
+    def expiring_passes(self, days_ahead: int = 15) -> Report:
+        def rows():
+            for safety_pass in sorted(self.manager.get_expiring_passes(days_ahead), key=lambda p: p.expiry_date):
+                days_left = safety_pass.days_until_expiry()
+                urgency = "🔴 URGENT" if days_left <= 3 else "🟡 WARNING" if days_left <= 7 else "🟢 NOTICE"
+                name, email, pass_name = self._names(safety_pass)
+                yield urgency, name, email, pass_name, safety_pass.expiry_date, days_left
+
+        return Report(f"PASSES EXPIRING IN NEXT {days_ahead} DAYS",
+                      ['Urgency', 'Employee', 'Email', 'Pass', 'Expiry Date', 'Days Left'], rows(),
+                      lambda row: (f"{row[0]} - {row[1]}\n   Pass: {row[3]}\n"
+                                   f"   Expires: {row[4]} ({row[5]} days)\n   Email: {row[2]}\n\n"),
+                      f"✅ No passes expiring in the next {days_ahead} days.")
+
+    def expired_passes(self) -> Report:
+        def rows():
+            for safety_pass in [p for p in self.manager.get_all_passes() if p.status == 'expired']:
+                name, email, pass_name = self._names(safety_pass)
+                yield name, email, pass_name, safety_pass.expiry_date
+
+        return Report("EXPIRED PASSES REPORT", ['Employee', 'Email', 'Pass', 'Expired'], rows(),
+                      lambda row: f"❌ {row[0]}\n   Pass: {row[2]}\n   Expired: {row[3]}\n   Email: {row[1]}\n\n",
+                      "✅ No expired passes found.")
+
+    def active_passes(self) -> Report:
+        def rows():
+            for safety_pass in [p for p in self.manager.get_all_passes() if p.status == 'active']:
+                days_left = safety_pass.days_until_expiry()
+                name, _, pass_name = self._names(safety_pass)
+                yield "🔴" if days_left <= 7 else "🟢", name, pass_name, safety_pass.expiry_date, days_left
+
+        return Report("ACTIVE PASSES REPORT", ['Status', 'Employee', 'Pass', 'Expiry Date', 'Days Left'], rows(),
+                      lambda row: f"{row[0]} {row[1]}\n   Pass: {row[2]}\n   Expires: {row[3]} ({row[4]} days)\n\n",
+                      "No active passes found.")
+
+    def passes_as_of(self, on_date: str, pass_type_id: str = None) -> Report:
+        """Who held a valid pass (of a type) on a past date, for audits"""
+        def rows():
+            for safety_pass in self.manager.get_passes_as_of(on_date, pass_type_id):
+                name, _, pass_name = self._names(safety_pass)
+                yield (safety_pass.employee_id, name, pass_name, safety_pass.pass_id, safety_pass.issue_date,
+                       safety_pass.expiry_date, safety_pass.revoked_at)
+
+        def format_text(row):
+            revoked = f"\n   Revoked: {row[6]}" if row[6] else ""
+            return f"✅ {row[1]} ({row[0]})\n   Pass: {row[2]} ({row[3]})\n   Valid: {row[4]} to {row[5]}{revoked}\n\n"
+
+        pass_type = self.manager.pass_types.get(pass_type_id) if pass_type_id else None
+        title = f"CLEARED AS OF {on_date}" + (f" - {pass_type.name.upper()}" if pass_type else "")
+        return Report(title, ['Employee ID', 'Employee', 'Pass', 'Pass ID', 'Issue Date', 'Expiry Date', 'Revoked At'],
+                      rows(), format_text, f"No valid passes on {on_date}.")
+
+    def employee_summary(self) -> Report:
+        def rows():
+            for employee in self.manager.get_all_employees():
+                passes = []
+                for safety_pass in self.manager.get_employee_passes(employee.employee_id):
+                    pass_type = self.manager.pass_types.get(safety_pass.pass_type_id)
+                    passes.append(f"{pass_type.name if pass_type else 'Unknown'} "
+                                  f"(expires in {safety_pass.days_until_expiry()} days)")
+                yield (employee.employee_id, employee.name, employee.department, employee.manager,
+                       employee.email, len(passes), "; ".join(passes))
+
+        def format_text(row):
+            passes = row[6].split("; ") if row[6] else ["No active passes"]
+            return (f"👤 {row[1]} ({row[0]})\n   Department: {row[2]}\n   Manager: {row[3]}\n"
+                    f"   Email: {row[4]}\n   Active Passes: {row[5]}\n"
+                    + "".join(f"     • {line}\n" for line in passes) + "\n")
+
+        return Report("EMPLOYEE SUMMARY REPORT",
+                      ['Employee ID', 'Name', 'Department', 'Manager', 'Email', 'Active Passes', 'Passes'],
+                      rows(), format_text, "No employees found.")
+
+    def renewal_forecast(self, horizon_days: int = 91, period: str = 'week') -> Report:
+        def rows():
+            for start, pass_type_id, category, department, count in \
+                    self.manager.get_renewal_forecast(horizon_days, period):
+                pass_type = self.manager.pass_types.get(pass_type_id)
+                yield start, pass_type.name if pass_type else 'Unknown', category, department, count
+
+        periods_seen = set()
+
+        def format_text(row):
+            # Each period gets a heading before its first line
+            heading = ""
+            if row[0] not in periods_seen:
+                heading = ("\n" if periods_seen else "") + f"📅 {period.title()} of {row[0]}\n"
+                periods_seen.add(row[0])
+            return f"{heading}   {row[1]} ({row[2]}), {row[3]}: {row[4]} due\n"
+
+        return Report(f"RENEWAL FORECAST - NEXT {horizon_days} DAYS BY {period.upper()}",
+                      [f'{period.title()} Starting', 'Pass', 'Category', 'Department', 'Renewals Due'],
+                      rows(), format_text, f"✅ No renewals due in the next {horizon_days} days.")
+
+    def compliance_gaps(self, warning_days: int = 30, department: str = None) -> Report:
+        icons = {'missing': "❌ MISSING", 'expired': "🔴 EXPIRED", 'expiring': "🟡 EXPIRING"}
+
+        def rows():
+            for gap in self.manager.get_compliance_gaps(warning_days):
+                employee = self.manager.employees.get(gap.employee_id)
+                if employee is None or (department is not None and employee.department != department):
+                    continue
+                pass_type = self.manager.pass_types.get(gap.pass_type_id)
+                yield (gap.employee_id, employee.name, employee.department,
+                       pass_type.name if pass_type else 'Unknown', gap.status, gap.expiry_date)
+
+        def format_text(row):
+            expiry = f" (expires {row[5]})" if row[4] == 'expiring' else f" (expired {row[5]})" if row[5] else ""
+            return f"{icons[row[4]]} - {row[1]} ({row[0]}, {row[2]})\n   Required: {row[3]}{expiry}\n\n"
+
+        return Report("COMPLIANCE GAPS" + (f" - {department.upper()}" if department else ""),
+                      ['Employee ID', 'Name', 'Department', 'Required Pass', 'Status', 'Expiry Date'],
+                      rows(), format_text, "✅ Everyone holds every pass their department requires.")
+
+    def team_summary(self, by: str = 'department', days_ahead: int = 30) -> Report:
+        """Members, active and expiring passes for every department or every manager's team"""
+        def rows():
+            for summary in self.manager.get_team_summaries(by, days_ahead):
+                yield summary.name, summary.members, summary.active_passes, summary.expiring_passes
+
+        def format_text(row):
+            flag = "⚠️" if row[3] else "✅"
+            return (f"{flag} {row[0]}\n   Members: {row[1]}\n   Active Passes: {row[2]}\n"
+                    f"   Expiring in {days_ahead} days: {row[3]}\n\n")
+
+        title = "DEPARTMENT SUMMARY" if by == 'department' else "MANAGER TEAM SUMMARY"
+        return Report(title, [by.title(), 'Members', 'Active Passes', f'Expiring ({days_ahead} days)'],
+                      rows(), format_text, "No employees found.")
+
+    def team_passes(self, by: str, name: str, expiring_within: int = None) -> Report:
+        """One department's or manager's active passes, or those expiring within some days"""
+        def rows():
+            for safety_pass in self.manager.get_team_passes(by, name, 'active', expiring_within):
+                employee_name, _, pass_name = self._names(safety_pass)
+                yield (safety_pass.pass_id, employee_name, pass_name, safety_pass.expiry_date,
+                       safety_pass.days_until_expiry())
+
+        subject = f"{name.upper()}" if by == 'department' else f"{name.upper()}'S TEAM"
+        title = (f"{subject} - EXPIRING IN {expiring_within} DAYS" if expiring_within is not None
+                 else f"{subject} - ACTIVE PASSES")
+        return Report(title, ['Pass ID', 'Employee', 'Pass', 'Expiry Date', 'Days Left'], rows(),
+                      lambda row: f"🎫 {row[1]}\n   Pass: {row[2]} ({row[0]})\n   Expires: {row[3]} ({row[4]} days)\n\n",
+                      "No matching passes.")
+
+    def system_statistics(self) -> Report:
+        def rows():
+            stats = self.manager.get_statistics()
+            issued_by_type = {}
+            for safety_pass in self.manager.get_all_passes():
+                issued_by_type[safety_pass.pass_type_id] = issued_by_type.get(safety_pass.pass_type_id, 0) + 1
+            yield "📊 OVERVIEW", "Total Employees", stats['employees']
+            yield "📊 OVERVIEW", "Total Pass Types", stats['pass_types']
+            yield "📊 OVERVIEW", "Total Passes Issued", stats['total_passes']
+            yield "🎫 PASS STATUS", "Active Passes", stats['active_passes']
+            yield "🎫 PASS STATUS", "Expired Passes", stats['expired_passes']
+            yield "🎫 PASS STATUS", "Revoked Passes", stats['revoked_passes']
+            yield "🎫 PASS STATUS", "Expiring Soon (15 days)", stats['expiring_soon']
+            if stats['total_passes'] > 0:
+                yield "📈 PERCENTAGES", "Active", f"{stats['active_passes'] / stats['total_passes'] * 100:.1f}%"
+                yield "📈 PERCENTAGES", "Expired", f"{stats['expired_passes'] / stats['total_passes'] * 100:.1f}%"
+            for pass_type in self.manager.get_all_pass_types():
+                yield "🏷️ PASS TYPE USAGE", pass_type.name, f"{issued_by_type.get(pass_type.pass_type_id, 0)} issued"
+
+        sections_seen = set()
+
+        def format_text(row):
+            # Each section gets a heading before its first line
+            heading = ""
+            if row[0] not in sections_seen:
+                heading = ("\n" if sections_seen else "") + f"{row[0]}\n"
+                sections_seen.add(row[0])
+            return f"{heading}   {row[1]}: {row[2]}\n"
+
+        return Report("SYSTEM STATISTICS REPORT", ['Section', 'Metric', 'Value'], rows(), format_text)
+
+
 # Email Notification System
 class EmailNotificationSystem:
     def __init__(self, smtp_server: str, smtp_port: int, email_username: str, email_password: str):
@@ -322,9 +3033,14 @@ class EmailNotificationSystem:
 
     def send_expiry_notification(self, employee_email: str, employee_name: str, pass_name: str, days_until_expiry: int):
         """Send expiry notification email"""
+        # Imported here so loading the data (the GUI, the service) doesn't pay for the mail modules
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
         try:
             # Create message
-            msg = email.mime.multipart.MimeMultipart()
+            msg = MIMEMultipart()
             msg['From'] = self.email_username
             msg['To'] = employee_email
             msg['Subject'] = f"Safety Pass Expiry Reminder - {pass_name}"
@@ -353,26 +3069,30 @@ If you have any questions, please contact your manager.
 Best regards,
 Safety Pass Management System"""
 
-            msg.attach(email.mime.text.MimeText(body, 'plain'))
+            msg.attach(MIMEText(body, 'plain'))
 
             # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_username, self.email_password)
+            with METRICS.timed('smtp_connect'):
+                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+                server.starttls()
+                server.login(self.email_username, self.email_password)
             text = msg.as_string()
-            server.sendmail(self.email_username, employee_email, text)
+            with METRICS.timed('smtp_send'):
+                server.sendmail(self.email_username, employee_email, text)
             server.quit()
 
+            METRICS.count('emails_sent')
             print(f"Expiry notification sent to {employee_name} ({employee_email}) for {pass_name}")
 
         except Exception as e:
+            METRICS.count('emails_failed')
             print(f"Failed to send email to {employee_email}: {str(e)}")
 
 
 # Main Application Class
 class SafetyPassApp:
-    def __init__(self):
-        self.manager = SafetyPassManager()
+    def __init__(self, data_folder: str = "safety_pass_data", progress: Callable[[str, float], None] = None):
+        self.manager = SafetyPassManager(data_folder, progress)
         # Initialize email system (you'll need to configure these)
         self.email_system = EmailNotificationSystem(
             smtp_server="smtp.gmail.com",  # Update with your SMTP server
@@ -381,29 +3101,41 @@ class SafetyPassApp:
             email_password="your_app_password"  # Update with your app password
         )
 
+    @METRICS.timed('daily_notifications')
     def run_daily_notifications(self):
         """Run daily notification check"""
         print("Running daily expiry check...")
         self.manager.update_expired_passes()
 
-        # Check for passes expiring in 1-15 days
-        for days in range(1, 16):
-            expiring_passes = [p for p in self.manager.get_expiring_passes(15)
-                               if p.days_until_expiry() == days]
-
-            for safety_pass in expiring_passes:
-                employee = self.manager.employees[safety_pass.employee_id]
-                pass_type = self.manager.pass_types[safety_pass.pass_type_id]
-
-                self.email_system.send_expiry_notification(
-                    employee.email,
-                    employee.name,
-                    pass_type.name,
-                    days
-                )
+        # Check for passes expiring in 1-15 days; resolve names under the read lock,
+        # then send without holding it so the GUI is not blocked on SMTP
+        notifications = []
+        with self.manager.read_locked():
+            expiring = self.manager.get_expiring_passes(15)
+            for days in range(1, 16):
+                for safety_pass in expiring:
+                    if safety_pass.days_until_expiry() != days:
+                        continue
+                    # Passes left behind by a removed employee or pass type are skipped
+                    employee = self.manager.employees.get(safety_pass.employee_id)
+                    pass_type = self.manager.pass_types.get(safety_pass.pass_type_id)
+                    if employee is None or pass_type is None:
+                        continue
+                    notifications.append((employee.email, employee.name, pass_type.name, days))
+
+        for employee_email, employee_name, pass_name, days in notifications:
+            self.email_system.send_expiry_notification(
+                employee_email,
+                employee_name,
+                pass_name,
+                days
+            )
 
     def schedule_daily_checks(self):
         """Schedule daily checks"""
+        import schedule
+
+        self.manager.start_metrics_export()
         schedule.every().day.at("09:00").do(self.run_daily_notifications)
 
         print("Daily notification system started. Checks will run at 9:00 AM daily.")
@@ -538,7 +3270,7 @@ class SafetyPassApp:
             choice = input("\nSelect an option: ").strip()
 
             if choice == '1':
-                pass_id = input("Pass ID: ")
+                pass_id = input("Pass ID (leave blank to generate): ").strip() or None
                 employee_id = input("Employee ID: ")
                 pass_type_id = input("Pass Type ID: ")
                 issue_date = input("Issue Date (YYYY-MM-DD, leave blank for today): ").strip()
@@ -586,7 +3318,7 @@ class SafetyPassApp:
                     print("No passes expiring in the next 15 days.")
 
             elif choice == '2':
-                expired = [p for p in self.manager.safety_passes.values() if p.status == 'expired']
+                expired = [p for p in self.manager.get_all_passes() if p.status == 'expired']
                 if expired:
                     print("\n=== EXPIRED PASSES ===")
                     for safety_pass in expired:
@@ -597,7 +3329,7 @@ class SafetyPassApp:
                     print("No expired passes found.")
 
             elif choice == '3':
-                active = [p for p in self.manager.safety_passes.values() if p.status == 'active']
+                active = [p for p in self.manager.get_all_passes() if p.status == 'active']
                 if active:
                     print("\n=== ALL ACTIVE PASSES ===")
                     for safety_pass in active:
@@ -613,8 +3345,9 @@ class SafetyPassApp:
                 print(f"\n=== SYSTEM SUMMARY ===")
                 print(f"Total Employees: {len(self.manager.employees)}")
                 print(f"Total Pass Types: {len(self.manager.pass_types)}")
-                active_passes = len([p for p in self.manager.safety_passes.values() if p.status == 'active'])
-                expired_passes = len([p for p in self.manager.safety_passes.values() if p.status == 'expired'])
+                all_passes = self.manager.get_all_passes()
+                active_passes = len([p for p in all_passes if p.status == 'active'])
+                expired_passes = len([p for p in all_passes if p.status == 'expired'])
                 print(f"Active Passes: {active_passes}")
                 print(f"Expired Passes: {expired_passes}")
                 expiring_soon = len(self.manager.get_expiring_passes(15))